@@ -0,0 +1,101 @@
+"""
+Benchmark for hyper_sleep
+Compares lib/precision_timer.py against the original 1 ms sleep + 30 ms busy-wait loop
+for CPU time and deadline error
+
+CPU is process time over wall time while sleeping (1.0 = a core pinned).
+Error is wake-up time minus deadline. --load starts busy processes to see
+how both behave on a loaded machine.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_hyper_sleep
+    python3 -m benchmarks.bench_hyper_sleep --load 4
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from lib.precision_timer import PrecisionTimer
+
+DURATIONS_MS = (1, 5, 10, 30, 100)
+REPEAT = 20
+
+
+def legacy_hyper_sleep(ms: float):
+    """The original hyper_sleep, kept as the reference implementation"""
+    start_time = time.perf_counter()
+    end_time = start_time + (ms / 1000.0)
+
+    while time.perf_counter() < end_time:
+        remaining = end_time - time.perf_counter()
+        if remaining > 0.03:  # 30ms threshold
+            time.sleep(0.001)  # Sleep for 1ms
+        # Busy wait for remaining time for higher precision
+
+
+def measure(sleep, ms: float, repeat: int):
+    """
+    Sleep repeatedly and measure
+
+    Returns:
+        (CPU fraction, mean error ms, p99 error ms, max error ms)
+    """
+    errors = []
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(repeat):
+        deadline = time.perf_counter() + ms / 1000.0
+        sleep(ms)
+        errors.append((time.perf_counter() - deadline) * 1000.0)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    errors = np.asarray(errors)
+    return cpu / wall, float(errors.mean()), float(np.percentile(errors, 99)), float(errors.max())
+
+
+def burn(stop_event):
+    """Background load: spin until told to stop"""
+    while not stop_event.is_set():
+        pass
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare hyper_sleep implementations")
+    parser.add_argument('--load', type=int, default=0, help="Busy background processes")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="Sleeps per duration")
+    args = parser.parse_args()
+
+    stop_event = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=burn, args=(stop_event,), daemon=True)
+               for _ in range(args.load)]
+    for worker in workers:
+        worker.start()
+
+    try:
+        timer = PrecisionTimer()
+        print(f"Calibrated spin window: {timer.spin_window * 1000:.3f} ms, background load: {args.load}")
+        print(f"{'ms':>6} {'legacy cpu':>10} {'err mean':>9} {'p99':>8} {'max':>8} "
+              f"{'timer cpu':>10} {'err mean':>9} {'p99':>8} {'max':>8}")
+
+        for ms in DURATIONS_MS:
+            legacy = measure(legacy_hyper_sleep, ms, args.repeat)
+            precise = measure(timer.sleep_ms, ms, args.repeat)
+            print(f"{ms:>6} {legacy[0]:>10.1%} {legacy[1]:>9.3f} {legacy[2]:>8.3f} {legacy[3]:>8.3f} "
+                  f"{precise[0]:>10.1%} {precise[1]:>9.3f} {precise[2]:>8.3f} {precise[3]:>8.3f}")
+
+        stats = timer.stats()
+        print(f"Timer: {stats.late} late wake-ups, final spin window {stats.spin_ms:.3f} ms")
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
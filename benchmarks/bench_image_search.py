@@ -0,0 +1,280 @@
+"""
+Benchmark for ImageSearch over recorded frames
+Latency percentiles and throughput per needle category, checked against a saved baseline
+
+Runs headless: screenshots come from a ReplayCapture corpus (a directory of
+frames recorded with lib.capture_backends.record_frames, or a video). Without
+--frames a synthetic corpus is built with the benchmarked needles planted in it.
+
+Timed calls, per category:
+    search_bitmap       full-frame search_bitmap per needle
+    image_search        full-frame image_search per needle file
+    multi_image_search  every sampled needle of the category against one capture
+    filter              suppress_matches over dense low-threshold candidates
+
+Run from the repository root:
+    python3 -m benchmarks.bench_image_search --save-baseline
+    python3 -m benchmarks.bench_image_search            # exits 1 on a regression or missing baseline
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from lib.capture_backends import ReplayCapture, TIMESTAMPS_FILE
+from lib.image_assets import CATEGORY_BITMAPS
+from lib.image_search import ImageSearch
+from lib.json_utils import JSON
+from lib.match_suppression import suppress_matches
+from lib.needle_cache import COLOR_BGR, decode_bitmap_mask, decode_bitmap_needle
+
+CATEGORIES = ('inventory', 'quests', 'memorymatch', 'mutatorgui')
+NEEDLES_PER_CATEGORY = 6
+FRAME_SHAPE = (720, 1280, 3)
+SYNTHETIC_FRAMES = 4
+# Correlation threshold used to generate candidates for the filter benchmark
+FILTER_THRESHOLD = 0.5
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE = Path(__file__).with_name("bench_image_search_baseline.json")
+# Allowed slowdown against the baseline (fraction), and an absolute floor for tiny timings
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_MS = 0.5
+
+
+def sample_keys(category: str, count: int = NEEDLES_PER_CATEGORY):
+    """Pick needles spread evenly through a category (sorted, so runs are comparable)"""
+    keys = sorted(CATEGORY_BITMAPS[category])
+    step = max(1, len(keys) // count)
+    return keys[::step][:count]
+
+
+def plant(frame: np.ndarray, key: str, x: int, y: int):
+    """Draw a bitmap into a frame, honouring its transparency"""
+    needle = decode_bitmap_needle(key, COLOR_BGR)
+    mask = decode_bitmap_mask(key)
+    height, width = needle.shape[:2]
+    target = frame[y:y + height, x:x + width]
+    if mask is None:
+        target[:] = needle
+    else:
+        opaque = mask > 0
+        target[opaque] = needle[opaque]
+
+
+def build_corpus(directory: Path, keys_by_category, frame_count: int = SYNTHETIC_FRAMES,
+                 seed: int = 0):
+    """
+    Write a synthetic replay corpus: flat colored blocks with every needle planted
+    once per frame at a frame-dependent position
+    """
+    rng = np.random.default_rng(seed)
+    height, width = FRAME_SHAPE[:2]
+    timestamps = {}
+
+    for index in range(frame_count):
+        blocks = rng.integers(0, 256, size=(height // 40 + 1, width // 40 + 1, 3), dtype=np.uint8)
+        frame = np.ascontiguousarray(cv2.resize(blocks, (width, height),
+                                                interpolation=cv2.INTER_NEAREST)[:height, :width])
+
+        # One band of rows per category, needles side by side (wrapping within the band)
+        band_height = height // len(keys_by_category)
+        for band, keys in enumerate(keys_by_category.values()):
+            x = 10 + index * 13
+            y = band * band_height + 10 + (index * 7) % 40
+            for key in keys:
+                needle_height, needle_width = decode_bitmap_needle(key, COLOR_BGR).shape[:2]
+                if x + needle_width >= width:
+                    x = 10 + index * 13
+                    y += needle_height + 12
+                plant(frame, key, x, y)
+                x += needle_width + 12
+
+        name = f"frame_{index:06d}.png"
+        cv2.imwrite(str(directory / name), frame)
+        timestamps[name] = index / 30.0
+
+    JSON.dump(timestamps, str(directory / TIMESTAMPS_FILE), indent=2)
+
+
+def write_needle_files(directory: Path, keys):
+    """Write bitmaps to PNG files for image_search (alpha preserved)"""
+    from lib.image_assets import get_bitmap_image
+
+    paths = {}
+    for key in keys:
+        path = directory / f"{key}.png"
+        with get_bitmap_image(key) as image:
+            image.save(path)
+        paths[key] = path
+    return paths
+
+
+def percentile_summary(samples_ms, hits: int):
+    """Latency percentiles and throughput for one call type"""
+    samples = np.asarray(samples_ms)
+    return {
+        'count': len(samples),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'ops_per_s': float(len(samples) / (samples.sum() / 1000.0)) if samples.sum() else 0.0,
+        'hits': hits,
+    }
+
+
+def timed(func):
+    """Run func and return (elapsed ms, result)"""
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000.0, result
+
+
+def bench_category(search: ImageSearch, capture: ReplayCapture, keys, paths, variation: int,
+                   rounds: int):
+    """Time every call type for one category's needles"""
+    samples = {'search_bitmap': [], 'image_search': [], 'multi_image_search': [], 'filter': []}
+    hits = dict.fromkeys(samples, 0)
+
+    for _ in range(rounds):
+        for key in keys:
+            elapsed, count = timed(lambda: search.search_bitmap(key, [], variation=variation))
+            samples['search_bitmap'].append(elapsed)
+            hits['search_bitmap'] += max(0, count)
+
+            elapsed, count = timed(lambda: search.image_search(paths[key], [], variation=variation))
+            samples['image_search'].append(elapsed)
+            hits['image_search'] += max(0, count)
+
+        elapsed, found = timed(lambda: search.multi_image_search([paths[key] for key in keys],
+                                                                  variation=variation))
+        samples['multi_image_search'].append(elapsed)
+        hits['multi_image_search'] += found is not None
+
+    # Filter path: dense candidates like a low-threshold correlation search produces
+    frame, _ = capture.grab()
+    for key in keys:
+        needle = decode_bitmap_needle(key, COLOR_BGR)
+        needle_height, needle_width = needle.shape[:2]
+        result = cv2.matchTemplate(frame, needle, cv2.TM_CCOEFF_NORMED)
+        ys, xs = np.nonzero(np.nan_to_num(result) >= FILTER_THRESHOLD)
+        for _ in range(rounds):
+            elapsed, (kept, _) = timed(lambda: suppress_matches(xs, ys, needle_width, needle_height,
+                                                                 frame.shape, 1))
+            samples['filter'].append(elapsed)
+        hits['filter'] += len(kept)
+
+    return {call: percentile_summary(samples[call], hits[call]) for call in samples}
+
+
+def compare(results, baseline, tolerance: float):
+    """
+    List regressions against a baseline
+
+    Returns:
+        List of human-readable regression descriptions
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+
+        for metric in ('p50_ms', 'p95_ms'):
+            limit = max(previous[metric] * (1 + tolerance), previous[metric] + MIN_REGRESSION_MS)
+            if result[metric] > limit:
+                regressions.append(f"{name} {metric}: {result[metric]:.2f} ms "
+                                   f"(baseline {previous[metric]:.2f} ms)")
+
+        if result['hits'] != previous['hits']:
+            regressions.append(f"{name} hits: {result['hits']} (baseline {previous['hits']})")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ImageSearch on recorded frames")
+    parser.add_argument('--frames', help="ReplayCapture corpus (directory or video); synthetic if omitted")
+    parser.add_argument('--scale', type=float, default=1.0, help="Pixels per point of the corpus")
+    parser.add_argument('--variation', type=int, default=0)
+    parser.add_argument('--rounds', type=int, default=3, help="Passes over each category")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args()
+
+    keys_by_category = {category: sample_keys(category) for category in CATEGORIES}
+
+    with tempfile.TemporaryDirectory() as temp:
+        temp = Path(temp)
+        if args.frames:
+            corpus = Path(args.frames)
+        else:
+            corpus = temp / "frames"
+            corpus.mkdir()
+            build_corpus(corpus, keys_by_category)
+
+        needle_dir = temp / "needles"
+        needle_dir.mkdir()
+        paths = write_needle_files(needle_dir, [key for keys in keys_by_category.values() for key in keys])
+
+        capture = ReplayCapture(corpus, loop=True, scale=args.scale)
+        search = ImageSearch(None, capture_backend=capture)
+
+        # Warm the needle cache so decode time is not measured
+        for keys in keys_by_category.values():
+            search.needle_cache.warm(keys, scale=search.capture_scale())
+
+        results = {}
+        try:
+            for category, keys in keys_by_category.items():
+                for call, summary in bench_category(search, capture, keys, paths, args.variation,
+                                                    args.rounds).items():
+                    results[f"{category}/{call}"] = summary
+        finally:
+            search.shutdown()
+            capture.close()
+
+    print(f"{'category/call':>32} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'ops/s':>8} {'hits':>5}")
+    for name, result in results.items():
+        print(f"{name:>32} {result['count']:>5} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['ops_per_s']:>8.1f} {result['hits']:>5}")
+
+    if args.save_baseline:
+        JSON.dump({'version': BASELINE_VERSION, 'corpus': args.frames or "synthetic",
+                   'variation': args.variation, 'results': results}, str(args.baseline), indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        # A missing baseline must not pass as "no regressions"
+        print(f"No baseline at {args.baseline} (run with --save-baseline on this machine to create one)")
+        return 1
+
+    baseline = JSON.load(str(args.baseline))
+    if (baseline.get('version') != BASELINE_VERSION or
+            baseline.get('corpus') != (args.frames or "synthetic") or
+            baseline.get('variation') != args.variation):
+        print(f"Baseline {args.baseline} was recorded with a different corpus or settings")
+        return 1
+
+    regressions = compare(results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regressions against {args.baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
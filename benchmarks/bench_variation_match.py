@@ -0,0 +1,113 @@
+"""
+Benchmark for AHK-style variation matching
+Compares lib/variation_match.py against the correlation-threshold path for speed and hit parity
+
+Needles from the bitmap assets are planted into a synthetic frame with
+per-channel noise of up to +/- NOISE, then searched for with each engine.
+Recall is the fraction of planted copies found; extra is every other hit.
+
+Run from the repository root:
+    python3 -m benchmarks.bench_variation_match
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from lib.match_suppression import suppress_matches
+from lib.needle_cache import COLOR_BGR, decode_bitmap_needle
+from lib.variation_match import find_variation_matches
+
+HAYSTACK_SHAPE = (720, 1280, 3)
+NEEDLE_KEYS = ('e_button', 'redcannon', 'tokenlink', 'close')
+COPIES = 6
+NOISE = 12
+VARIATIONS = (8, 16, 32)
+
+
+def make_haystack(needle: np.ndarray, seed: int = 0):
+    """
+    Build a frame of flat colored blocks with noisy copies of the needle planted in it
+
+    Returns:
+        (haystack, planted top-left positions as a set of (x, y))
+    """
+    rng = np.random.default_rng(seed)
+    height, width = HAYSTACK_SHAPE[:2]
+    blocks = rng.integers(0, 256, size=(height // 40 + 1, width // 40 + 1, 3), dtype=np.uint8)
+    haystack = cv2.resize(blocks, (width, height), interpolation=cv2.INTER_NEAREST)
+    haystack = np.ascontiguousarray(haystack[:height, :width])
+
+    needle_height, needle_width = needle.shape[:2]
+    planted = set()
+    grid_columns = width // (needle_width + 20)
+    for i in range(COPIES):
+        x = 10 + (i % grid_columns) * (needle_width + 20)
+        y = 10 + (i // grid_columns) * (needle_height + 20) + i * 7
+        noise = rng.integers(-NOISE, NOISE + 1, size=needle.shape)
+        haystack[y:y + needle_height, x:x + needle_width] = np.clip(needle + noise, 0, 255)
+        planted.add((x, y))
+
+    return haystack, planted
+
+
+def correlation_search(haystack: np.ndarray, needle: np.ndarray, variation: int):
+    """The ImageSearch correlation path: (100 - variation) / 100 as a TM_CCOEFF_NORMED threshold"""
+    result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    ys, xs = np.nonzero(result >= (100 - variation) / 100.0)
+    return xs, ys
+
+
+def time_call(func, repeat: int = 5):
+    """Best-of-N wall time in milliseconds, plus the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def score(xs, ys, needle: np.ndarray, planted):
+    """Suppress overlaps like ImageSearch does, then count planted hits and extra hits"""
+    needle_height, needle_width = needle.shape[:2]
+    xs, ys = suppress_matches(np.asarray(xs), np.asarray(ys), needle_width, needle_height,
+                              HAYSTACK_SHAPE, 1)
+    hits = set(zip(xs.tolist(), ys.tolist()))
+    return len(hits & planted), len(hits - planted)
+
+
+def main() -> int:
+    print(f"{'needle':>10} {'var':>4} {'ahk ms':>8} {'recall':>7} {'extra':>6} "
+          f"{'corr ms':>8} {'recall':>7} {'extra':>6}")
+    failures = 0
+
+    for key in NEEDLE_KEYS:
+        needle = np.ascontiguousarray(decode_bitmap_needle(key, COLOR_BGR, None))
+        haystack, planted = make_haystack(needle)
+
+        for variation in VARIATIONS:
+            ahk_ms, (ax, ay) = time_call(lambda: find_variation_matches(haystack, needle, variation))
+            corr_ms, (cx, cy) = time_call(lambda: correlation_search(haystack, needle, variation))
+            ahk_found, ahk_extra = score(ax, ay, needle, planted)
+            corr_found, corr_extra = score(cx, cy, needle, planted)
+
+            # With variation >= NOISE every planted copy is within tolerance by construction
+            if variation >= NOISE and ahk_found != len(planted):
+                failures += 1
+                print(f"MISSED planted copies of {key} at variation {variation}")
+
+            print(f"{key:>10} {variation:>4} {ahk_ms:>8.2f} {ahk_found:>3}/{len(planted):<3} {ahk_extra:>6} "
+                  f"{corr_ms:>8.2f} {corr_found:>3}/{len(planted):<3} {corr_extra:>6}")
+
+    if failures:
+        print(f"{failures} recall failures")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
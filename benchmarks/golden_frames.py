@@ -0,0 +1,347 @@
+"""
+Golden-frame regression harness for image search
+Replays labelled frames and checks that every search still finds the same hits, and how fast
+
+A golden set is a directory of frames plus golden.json, which lists for each
+frame the searches run on it (needle, region, variation, ...) and the hits
+they are expected to return. `record` labels frames with ReferenceSearch, a
+pinned copy of the original matcher (full-surface TM_CCOEFF_NORMED, then the
+pairwise overlap filter), never with the ImageSearch being tested, so a bug in
+a new fast path cannot end up in its own labels. `verify` replays every search
+through the current ImageSearch, optionally with another matcher
+configuration, and reports precision, recall, coordinate drift and latency.
+verify exits 1 when any hit is lost, gained or drifts (by default any drift at
+all, so a new matcher has to be exactly equivalent).
+
+Run from the repository root:
+    python3 -m benchmarks.golden_frames record FRAMES_DIR --needle tokenlink --needle e_button
+    python3 -m benchmarks.golden_frames record FRAMES_DIR --searches searches.json
+    python3 -m benchmarks.golden_frames verify FRAMES_DIR --variation-mode ahk --pyramid-levels 2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from lib.capture_backends import FRAME_EXTENSIONS, ReplayCapture
+from lib.frame_context import FrameContext
+from lib.image_assets import bitmap_exists
+from lib.image_search import ImageSearch
+from lib.json_utils import JSON
+from lib.match_suppression import SEARCH_DIRECTION_ORDER
+from lib.pyramid_search import PyramidConfig
+from lib.variation_match import VARIATION_MODE_CORRELATION
+
+GOLDEN_FILE = "golden.json"
+GOLDEN_VERSION = 1
+# Largest distance (points) between an expected and an actual hit still paired as the same hit
+DEFAULT_MAX_DRIFT = 2.0
+# Drift (points) a paired hit may have without failing verification
+DEFAULT_ALLOWED_DRIFT = 0.0
+# Reference scores this far below the threshold still count: float32 TM_CCOEFF_NORMED
+# scores a pixel-identical match as low as 1 - 2.4e-7, which variation 0 would reject
+REFERENCE_SCORE_EPSILON = 1e-5
+
+
+class GoldenSearch(NamedTuple):
+    """One labelled search: its parameters and the hits it should return"""
+    needle: str                                   # Bitmap key or needle image path
+    region: Optional[Tuple[int, int, int, int]] = None
+    variation: int = 0
+    trans_color: Optional[int] = None
+    search_direction: int = 1
+    first_only: bool = False
+    expected: Tuple[Tuple[int, int], ...] = ()
+
+    @property
+    def label(self) -> str:
+        """Configuration name used to group the report"""
+        mode = "first" if self.first_only else "all"
+        return f"{self.needle} v{self.variation} d{self.search_direction} {mode}"
+
+    def to_json(self) -> dict:
+        data = self._asdict()
+        data['expected'] = [list(hit) for hit in self.expected]
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'GoldenSearch':
+        data = dict(data)
+        if data.get('region'):
+            data['region'] = tuple(data['region'])
+        data['expected'] = tuple(tuple(hit) for hit in data.get('expected', ()))
+        return cls(**data)
+
+
+def load_frame(directory: Path, name: str, scale: float) -> FrameContext:
+    """Load a golden frame as a full-screen FrameContext"""
+    image = cv2.imread(str(directory / name), cv2.IMREAD_COLOR)
+    if image is None:
+        raise FileNotFoundError(f"Could not load golden frame {directory / name}")
+    return FrameContext(image, 0, 0, max_age=None, scale=scale)
+
+
+def run_search(search: ImageSearch, golden: GoldenSearch, frame: FrameContext):
+    """
+    Run one golden search against a frame
+
+    Returns:
+        (hits as a list of (x, y), elapsed ms)
+    """
+    x1, y1, x2, y2 = golden.region if golden.region else (0, 0, 0, 0)
+    hits = []
+    start = time.perf_counter()
+    if bitmap_exists(golden.needle):
+        count = search.search_bitmap(golden.needle, hits, x1, y1, x2, y2, golden.variation,
+                                     golden.trans_color, golden.search_direction,
+                                     frame=frame, first_only=golden.first_only)
+    else:
+        count = search.image_search(golden.needle, hits, x1, y1, x2, y2, golden.variation,
+                                    golden.trans_color, golden.search_direction,
+                                    frame=frame, first_only=golden.first_only)
+    elapsed = (time.perf_counter() - start) * 1000.0
+
+    if count < 0:
+        raise RuntimeError(f"Search for {golden.needle} failed with code {count}")
+    return hits, elapsed
+
+
+def match_hits(expected, actual, max_drift: float):
+    """
+    Pair actual hits with expected ones, nearest first
+
+    Returns:
+        (matched count, list of drift distances of the matched pairs)
+    """
+    if not expected or not actual:
+        return 0, []
+
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    distances = np.hypot(expected[:, None, 0] - actual[None, :, 0],
+                         expected[:, None, 1] - actual[None, :, 1])
+
+    drifts = []
+    for flat in np.argsort(distances, axis=None):
+        i, j = np.unravel_index(flat, distances.shape)
+        distance = distances[i, j]
+        if distance > max_drift:
+            break
+        if np.isinf(distance):
+            continue
+        drifts.append(float(distance))
+        distances[i, :] = np.inf
+        distances[:, j] = np.inf
+
+    return len(drifts), drifts
+
+
+def make_search(directory: Path, scale: float, variation_mode: str = VARIATION_MODE_CORRELATION,
+                pyramid_levels: int = 0) -> ImageSearch:
+    """ImageSearch over the golden frames with the matcher configuration under test (0 levels = no pyramid)"""
+    pyramid = PyramidConfig(levels=pyramid_levels) if pyramid_levels > 0 else None
+    return ImageSearch(None, capture_backend=ReplayCapture(directory, loop=True, scale=scale),
+                       variation_mode=variation_mode, pyramid=pyramid)
+
+
+class ReferenceSearch(ImageSearch):
+    """
+    ImageSearch pinned to the original matcher, used only to record labels
+
+    Every search correlates the whole region and keeps scores at or above
+    (100 - variation) / 100 (less REFERENCE_SCORE_EPSILON), then filters
+    candidates one by one in search order.
+    Exact, binary, AHK-variation, pyramid, early-exit first_only and location
+    memory paths are never taken; first_only just keeps the first filtered hit.
+    Needle decoding, masks and frame cropping are shared with ImageSearch.
+    """
+
+    def __init__(self, directory: Path, scale: float):
+        super().__init__(None, capture_backend=ReplayCapture(directory, loop=True, scale=scale),
+                         variation_mode=VARIATION_MODE_CORRELATION, pyramid=None,
+                         location_memory=None)
+
+    def _find_matches(self, needle, outer_x1=0, outer_y1=0, outer_x2=0, outer_y2=0, variation=0,
+                      search_direction=1, frame=None, mask=None, binary=None, first_only=False,
+                      timings=None):
+        needle_height, needle_width = needle.shape[:2]
+        haystack, origin_x, origin_y, scale = self._get_haystack(outer_x1, outer_y1,
+                                                                 outer_x2, outer_y2, frame)
+        if needle.ndim == 2:
+            haystack = cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)
+
+        result = self._match_template(haystack, needle, mask)
+        ys, xs = np.nonzero(result >= (100 - variation) / 100.0 - REFERENCE_SCORE_EPSILON)
+        matches = reference_filter(list(zip(xs.tolist(), ys.tolist())), needle_width, needle_height,
+                                   search_direction, haystack.shape)
+        if first_only:
+            matches = matches[:1]
+
+        xs = np.array([x for x, _ in matches], dtype=np.int64)
+        ys = np.array([y for _, y in matches], dtype=np.int64)
+        if scale != 1:
+            xs = np.floor(xs / scale).astype(np.int64)
+            ys = np.floor(ys / scale).astype(np.int64)
+        return xs + origin_x, ys + origin_y
+
+
+def reference_filter(matches, needle_width: int, needle_height: int, search_direction: int,
+                     haystack_shape) -> List[Tuple[int, int]]:
+    """
+    Original overlap filter: sort by search direction, then accept each in-bounds
+    match that does not overlap an accepted one (deliberately unoptimized)
+    """
+    direction = SEARCH_DIRECTION_ORDER.get(search_direction)
+    if direction is not None:
+        primary_axis, primary_sign, secondary_axis, secondary_sign = direction
+        matches = sorted(matches, key=lambda m: (primary_sign * m[primary_axis],
+                                                 secondary_sign * m[secondary_axis]))
+
+    haystack_height, haystack_width = haystack_shape[:2]
+    filtered = []
+    for x, y in matches:
+        overlaps = any(abs(x - existing_x) < needle_width and abs(y - existing_y) < needle_height
+                       for existing_x, existing_y in filtered)
+        if not overlaps and 0 <= x < haystack_width - needle_width and 0 <= y < haystack_height - needle_height:
+            filtered.append((x, y))
+    return filtered
+
+
+def load_searches(args) -> List[GoldenSearch]:
+    """Search configurations to record, from --searches and --needle"""
+    searches = []
+    if args.searches:
+        searches.extend(GoldenSearch.from_json(entry) for entry in JSON.load(args.searches))
+    for needle in args.needle or ():
+        searches.append(GoldenSearch(needle, variation=args.variation))
+        searches.append(GoldenSearch(needle, variation=args.variation, first_only=True))
+    return searches
+
+
+def record(args) -> int:
+    """Label every frame with the hits the pinned reference matcher returns"""
+    directory = Path(args.frames)
+    searches = load_searches(args)
+    if not searches:
+        print("Nothing to record: pass --needle or --searches")
+        return 1
+
+    frames = sorted(path.name for path in directory.iterdir() if path.suffix.lower() in FRAME_EXTENSIONS)
+    search = ReferenceSearch(directory, args.scale)
+    cases = []
+    try:
+        for name in frames:
+            frame = load_frame(directory, name, args.scale)
+            labelled = []
+            for golden in searches:
+                hits, _ = run_search(search, golden, frame)
+                labelled.append(golden._replace(expected=tuple(hits)).to_json())
+            cases.append({'frame': name, 'searches': labelled})
+    finally:
+        search.shutdown()
+
+    JSON.dump({'version': GOLDEN_VERSION, 'scale': args.scale, 'cases': cases},
+              str(directory / GOLDEN_FILE), indent=2)
+    hit_count = sum(len(entry['expected']) for case in cases for entry in case['searches'])
+    print(f"Recorded {len(cases)} frames, {len(searches)} searches each, {hit_count} hits "
+          f"to {directory / GOLDEN_FILE}")
+    return 0
+
+
+def verify(args) -> int:
+    """Replay every golden search and report accuracy and latency"""
+    directory = Path(args.frames)
+    golden_path = directory / GOLDEN_FILE
+    if not golden_path.exists():
+        print(f"No golden set at {golden_path} (run record first)")
+        return 1
+
+    data = JSON.load(str(golden_path))
+    if data.get('version') != GOLDEN_VERSION:
+        print(f"Unsupported golden set version in {golden_path}")
+        return 1
+
+    scale = float(data.get('scale', 1.0))
+    search = make_search(directory, scale, args.variation_mode, args.pyramid_levels)
+
+    # Per configuration: expected, actual, matched, drifts, timings
+    stats = {}
+    failures = []
+    try:
+        for case in data['cases']:
+            frame = load_frame(directory, case['frame'], scale)
+            for entry in case['searches']:
+                golden = GoldenSearch.from_json(entry)
+                hits, elapsed = run_search(search, golden, frame)
+                matched, drifts = match_hits(golden.expected, hits, args.max_drift)
+
+                row = stats.setdefault(golden.label, {'expected': 0, 'actual': 0, 'matched': 0,
+                                                      'drifts': [], 'ms': []})
+                row['expected'] += len(golden.expected)
+                row['actual'] += len(hits)
+                row['matched'] += matched
+                row['drifts'].extend(drifts)
+                row['ms'].append(elapsed)
+
+                if (matched != len(golden.expected) or matched != len(hits) or
+                        any(drift > args.allowed_drift for drift in drifts)):
+                    failures.append(f"{case['frame']} {golden.label}: expected "
+                                    f"{list(golden.expected)}, got {hits}")
+    finally:
+        search.shutdown()
+
+    print(f"{'configuration':>40} {'precision':>9} {'recall':>7} {'mean drift':>10} "
+          f"{'max drift':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, row in stats.items():
+        precision = row['matched'] / row['actual'] if row['actual'] else 1.0
+        recall = row['matched'] / row['expected'] if row['expected'] else 1.0
+        drifts = row['drifts'] or [0.0]
+        print(f"{label:>40} {precision:>9.3f} {recall:>7.3f} {np.mean(drifts):>10.2f} "
+              f"{max(drifts):>9.2f} {np.percentile(row['ms'], 50):>8.2f} "
+              f"{np.percentile(row['ms'], 95):>8.2f}")
+
+    if failures:
+        print(f"{len(failures)} searches differ from the golden set:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+
+    print(f"All {sum(len(row['ms']) for row in stats.values())} searches match the golden set")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Record or verify golden image search frames")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="Label frames with the reference matcher's results")
+    record_parser.add_argument('frames', help="Directory of frames")
+    record_parser.add_argument('--needle', action='append', help="Bitmap key or image path (repeatable)")
+    record_parser.add_argument('--searches', help="JSON list of search configurations")
+    record_parser.add_argument('--variation', type=int, default=0, help="Variation for --needle searches")
+    record_parser.add_argument('--scale', type=float, default=1.0, help="Pixels per point of the frames")
+    record_parser.set_defaults(func=record)
+
+    verify_parser = commands.add_parser('verify', help="Replay the golden searches and compare")
+    verify_parser.add_argument('frames', help="Directory holding the frames and golden.json")
+    verify_parser.add_argument('--variation-mode', default=VARIATION_MODE_CORRELATION,
+                               help="ImageSearch variation_mode to verify")
+    verify_parser.add_argument('--pyramid-levels', type=int, default=0,
+                               help="Coarse-to-fine levels to verify (0 = off, 1 = half scale)")
+    verify_parser.add_argument('--max-drift', type=float, default=DEFAULT_MAX_DRIFT,
+                               help="Largest distance (points) between paired hits")
+    verify_parser.add_argument('--allowed-drift', type=float, default=DEFAULT_ALLOWED_DRIFT,
+                               help="Drift (points) of a paired hit that still passes")
+    verify_parser.set_defaults(func=verify)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
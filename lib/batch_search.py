@@ -0,0 +1,49 @@
+"""
+Batched multi-needle search types
+Jobs and results for ImageSearch.batch_search
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class SearchJob(NamedTuple):
+    """One needle to look for in a batch"""
+
+    needle: str                                            # Bitmap key or needle image path
+    region: Optional[Tuple[int, int, int, int]] = None     # (x1, y1, x2, y2), None = whole frame
+    variation: int = 0
+    trans_color: Optional[int] = None
+    search_direction: int = 1
+    priority: int = 0                                      # Lower runs first; ties keep list order
+
+
+class SearchResult(NamedTuple):
+    """Outcome of one SearchJob"""
+
+    index: int                       # Position of the job in the submitted list
+    job: SearchJob
+    count: int                       # Number of matches (negative = error)
+    matches: List[Tuple[int, int]]
+
+    @property
+    def found(self) -> bool:
+        return self.count > 0 and bool(self.matches)
+
+
+def union_region(jobs: List[SearchJob]) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Get the (x, y, width, height) capture region that covers every job
+
+    Returns:
+        Capture region, or None if any job searches the full screen
+    """
+    regions = [job.region for job in jobs]
+    if not regions or any(region is None or region[2] <= region[0] or region[3] <= region[1]
+                          for region in regions):
+        return None
+
+    x1 = min(region[0] for region in regions)
+    y1 = min(region[1] for region in regions)
+    x2 = max(region[2] for region in regions)
+    y2 = max(region[3] for region in regions)
+    return (x1, y1, x2 - x1, y2 - y1)
@@ -0,0 +1,206 @@
+"""
+Binary / palette matching for image search
+Matches needles with at most two colors as bit-packed planes instead of BGR pixels
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .variation_match import tolerance_mask
+
+# Needles with more colors than this are matched as BGR
+MAX_BINARY_COLORS = 2
+# Bytes read per 64-bit window (8 plus one for the bit offset)
+WINDOW_BYTES = 9
+
+# SWAR popcount constants
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+class BinaryNeedle(NamedTuple):
+    """A needle reduced to one bit plane per color"""
+
+    colors: np.ndarray   # (n, 3) BGR colors
+    bits: np.ndarray     # (n, height, chunks) uint64; bit k of chunk j = column 64j+k is color i
+    width: int
+    height: int
+
+
+class ColorPlane(NamedTuple):
+    """Haystack pixels within tolerance of one color"""
+
+    mask: np.ndarray     # HxW uint8 (255 = within tolerance)
+    packed: np.ndarray   # Hx(W/8 + WINDOW_BYTES) uint8, little-endian bits, zero padded
+    count: int           # Pixels within tolerance
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Count the set bits of each uint64"""
+    values = values - ((values >> np.uint64(1)) & _M1)
+    values = (values & _M2) + ((values >> np.uint64(2)) & _M2)
+    values = (values + (values >> np.uint64(4))) & _M4
+    return (values * _H01) >> np.uint64(56)
+
+
+def compile_binary_needle(needle: np.ndarray, mask: Optional[np.ndarray] = None) -> Optional[BinaryNeedle]:
+    """
+    Reduce a BGR needle with at most MAX_BINARY_COLORS colors (ignoring masked pixels) to bit planes
+
+    Args:
+        needle: BGR needle array
+        mask: Optional needle mask (nonzero = pixel must match, 0 = ignored)
+
+    Returns:
+        BinaryNeedle, or None if the needle has too many colors
+    """
+    if needle.ndim != 3:
+        return None
+
+    height, width = needle.shape[:2]
+    care = np.ones((height, width), dtype=bool) if mask is None else mask != 0
+    colors = np.unique(needle[care], axis=0)
+    if not 0 < len(colors) <= MAX_BINARY_COLORS:
+        return None
+
+    chunks = (width + 63) // 64
+    bits = np.zeros((len(colors), height, chunks), dtype=np.uint64)
+    for i, color in enumerate(colors):
+        plane = np.zeros((height, chunks * 64), dtype=np.uint8)
+        plane[:, :width] = care & np.all(needle == color, axis=-1)
+        packed = np.packbits(plane, axis=1, bitorder='little')
+        bits[i] = packed.view('<u8').reshape(height, chunks)
+
+    return BinaryNeedle(colors, bits, width, height)
+
+
+def color_plane(haystack: np.ndarray, color: np.ndarray, variation: int = 0) -> ColorPlane:
+    """
+    Threshold a BGR haystack against one color and bit-pack the result
+
+    Args:
+        haystack: BGR search image
+        color: BGR color
+        variation: Per-channel color tolerance (0-255)
+
+    Returns:
+        ColorPlane
+    """
+    mask = tolerance_mask(haystack, color, variation)
+    packed = np.packbits(mask, axis=1, bitorder='little')
+    # Padding lets windows near the right edge read a full WINDOW_BYTES
+    packed = np.pad(packed, ((0, 0), (0, WINDOW_BYTES)))
+    return ColorPlane(mask, packed, cv2.countNonZero(mask))
+
+
+def frame_color_plane(frame, color: np.ndarray, variation: int = 0,
+                      x1: int = 0, y1: int = 0, x2: int = 0, y2: int = 0) -> ColorPlane:
+    """
+    Get a ColorPlane for a frame region, cached on the frame so every needle
+    with the same color shares it
+
+    Args:
+        frame: FrameContext the region comes from
+        color: BGR color
+        variation: Per-channel color tolerance (0-255)
+        x1, y1, x2, y2: Screen region bounds (x2 <= x1 or y2 <= y1 = whole frame)
+
+    Returns:
+        ColorPlane
+    """
+    if not (x2 > x1 and y2 > y1):
+        x1, y1, x2, y2 = frame.region
+
+    cache_key = (tuple(int(value) for value in color), variation, x1, y1, x2, y2)
+    plane = frame.plane_cache.get(cache_key)
+    if plane is None:
+        # Two threads may both build it; the result is the same either way
+        plane = color_plane(frame.view(x1, y1, x2, y2), color, variation)
+        frame.plane_cache[cache_key] = plane
+    return plane
+
+
+def _windows(packed: np.ndarray, rows: np.ndarray, xs: np.ndarray) -> np.ndarray:
+    """Read the 64 bits starting at (row, x) for each candidate as uint64"""
+    start = xs >> 3
+    shift = (xs & 7).astype(np.uint64)
+    raw = packed[rows[:, np.newaxis], start[:, np.newaxis] + np.arange(WINDOW_BYTES)]
+    low = np.ascontiguousarray(raw[:, :8]).view('<u8').reshape(-1)
+    high = raw[:, 8].astype(np.uint64)
+    # Shift in two steps so a zero offset shifts the spill byte out entirely
+    return (low >> shift) | ((high << (np.uint64(63) - shift)) << np.uint64(1))
+
+
+def find_binary_matches(haystack: np.ndarray, needle: BinaryNeedle, variation: int = 0,
+                        max_mismatches: int = 0,
+                        planes: Optional[List[ColorPlane]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find every position where at most max_mismatches needle pixels fall outside
+    the tolerance of their color, comparing 64 pixels per word (XOR + popcount)
+
+    Args:
+        haystack: BGR search image
+        needle: BinaryNeedle from compile_binary_needle
+        variation: Per-channel color tolerance (0-255)
+        max_mismatches: Needle pixels allowed to differ
+        planes: ColorPlane per needle color (e.g. from frame_color_plane), built if None
+
+    Returns:
+        (xs, ys) of matching top-left positions, in row-major order
+    """
+    haystack_height, haystack_width = haystack.shape[:2]
+    empty = np.empty(0, dtype=np.int64)
+    if needle.height > haystack_height or needle.width > haystack_width:
+        return empty, empty
+
+    if planes is None:
+        planes = [color_plane(haystack, color, variation) for color in needle.colors]
+
+    # Seed from a pixel of the needle color that is rarest in the haystack
+    # (only useful when no mismatches are allowed; otherwise every position is a candidate)
+    result_height = haystack_height - needle.height + 1
+    result_width = haystack_width - needle.width + 1
+    if max_mismatches == 0:
+        seed = min(range(len(planes)), key=lambda i: planes[i].count)
+        rows, cols = np.nonzero(np.unpackbits(needle.bits[seed].view(np.uint8), axis=1,
+                                              bitorder='little')[:, :needle.width])
+        anchor_row, anchor_col = int(rows[0]), int(cols[0])
+        area = planes[seed].mask[anchor_row:anchor_row + result_height,
+                                 anchor_col:anchor_col + result_width]
+        ys, xs = np.nonzero(area)
+    else:
+        ys, xs = np.mgrid[0:result_height, 0:result_width]
+        ys, xs = ys.reshape(-1), xs.reshape(-1)
+    ys, xs = ys.astype(np.int64), xs.astype(np.int64)
+
+    # Verify one needle row chunk (up to 64 pixels) at a time; the first
+    # steps spread across the needle since neighbouring rows tend to agree
+    steps = [(row, chunk) for row in range(needle.height) for chunk in range(needle.bits.shape[2])]
+    order = np.random.RandomState(len(steps)).permutation(len(steps))
+    mismatches = np.zeros(len(xs), dtype=np.uint64)
+
+    for step in order:
+        if len(xs) == 0:
+            break
+        row, chunk = steps[step]
+
+        wrong = np.zeros(len(xs), dtype=np.uint64)
+        for i, plane in enumerate(planes):
+            expected = needle.bits[i, row, chunk]
+            if expected:
+                # Bits the needle wants set (XOR with the haystack) that the haystack does not have
+                wrong |= (_windows(plane.packed, ys + row, xs + chunk * 64) ^ expected) & expected
+
+        if max_mismatches == 0:
+            keep = wrong == 0
+        else:
+            mismatches += popcount64(wrong)
+            keep = mismatches <= max_mismatches
+            mismatches = mismatches[keep]
+        ys, xs = ys[keep], xs[keep]
+
+    return xs, ys
@@ -0,0 +1,392 @@
+"""
+Screen capture backends for image search
+Lets the vision code run against the live desktop or against recorded frames
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from .json_utils import JSON
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+logger = logging.getLogger(__name__)
+
+FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+
+# Sidecar file mapping frame file names to their capture timestamps
+TIMESTAMPS_FILE = "timestamps.json"
+
+
+class CaptureBackend:
+    """Base class for screen capture backends"""
+
+    name = "base"
+    # True if grabbed frames live in reused buffers that later grabs overwrite
+    # (copy frames that have to outlive them)
+    reuses_buffers = False
+
+    def grab(self, region=None) -> Tuple[np.ndarray, float]:
+        """
+        Capture the screen or a region of it
+
+        Args:
+            region: (x, y, width, height) or None for the full screen
+
+        Returns:
+            (BGR frame array, capture time as a Unix timestamp)
+        """
+        raise NotImplementedError
+
+    def scale_factor(self) -> float:
+        """
+        Get the capture scale: frame pixels per logical screen point
+        (2.0 on Retina displays, where regions are given in points)
+
+        Returns:
+            Scale factor
+        """
+        return 1.0
+
+    def close(self):
+        """Release any resources held by the backend"""
+        pass
+
+
+def _round_scale(scale: float) -> float:
+    """Snap a measured scale factor to the nearest quarter (e.g. 1.9995 -> 2.0)"""
+    return max(0.25, round(scale * 4) / 4)
+
+
+class PyAutoGUICapture(CaptureBackend):
+    """Captures with pyautogui.screenshot (the original behaviour)"""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        # Imported here so headless machines can use the other backends
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def grab(self, region=None) -> Tuple[np.ndarray, float]:
+        timestamp = time.time()
+        if region:
+            image = self._pyautogui.screenshot(region=tuple(region))
+        else:
+            image = self._pyautogui.screenshot()
+
+        # Convert PIL to OpenCV format
+        return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR), timestamp
+
+    def scale_factor(self) -> float:
+        # Screenshots are in pixels, pyautogui.size() is in points
+        return _round_scale(self._pyautogui.screenshot().width / self._pyautogui.size()[0])
+
+
+class MSSCapture(CaptureBackend):
+    """
+    Captures with mss and converts into preallocated buffers
+
+    Frames are written into a small ring of reused buffers per size and thread,
+    so a frame is only valid until the same thread grabs `buffer_count` more
+    frames of that size. Grabs on other threads never overwrite it.
+    """
+
+    name = "mss"
+    reuses_buffers = True
+
+    def __init__(self, buffer_count: int = 3):
+        """
+        Args:
+            buffer_count: Number of reused output buffers per frame size
+
+        Raises:
+            ImportError: If mss is not installed
+        """
+        if mss is None:
+            raise ImportError("MSSCapture requires the 'mss' package (pip install mss)")
+
+        self.buffer_count = max(1, buffer_count)
+        # mss handles are not thread safe, so each thread gets its own, and its
+        # own buffer rings so threads cannot overwrite each other's frames
+        self._local = threading.local()
+
+    def _sct(self):
+        """Get this thread's mss handle"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def _buffer(self, height: int, width: int) -> np.ndarray:
+        """Get this thread's next preallocated output buffer for a frame size"""
+        rings = getattr(self._local, 'rings', None)
+        if rings is None:
+            rings = self._local.rings = {}
+
+        key = (height, width)
+        ring = rings.get(key)
+        if ring is None:
+            ring = rings[key] = [[np.empty((height, width, 3), dtype=np.uint8)
+                                  for _ in range(self.buffer_count)], 0]
+
+        buffers, index = ring
+        ring[1] = (index + 1) % self.buffer_count
+        return buffers[index]
+
+    def grab(self, region=None) -> Tuple[np.ndarray, float]:
+        sct = self._sct()
+        if region:
+            x, y, width, height = region
+            monitor = {'left': int(x), 'top': int(y), 'width': int(width), 'height': int(height)}
+        else:
+            # Monitor 1 is the primary display
+            monitor = sct.monitors[1]
+
+        timestamp = time.time()
+        shot = sct.grab(monitor)
+
+        # mss returns BGRA; convert straight into a reused buffer
+        raw = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        frame = self._buffer(shot.height, shot.width)
+        cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR, dst=frame)
+        return frame, timestamp
+
+    def scale_factor(self) -> float:
+        # Monitor geometry is in points, grabbed images are in pixels
+        monitor = self._sct().monitors[1]
+        return _round_scale(self._sct().grab(monitor).width / monitor['width'])
+
+    def close(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class ReplayCapture(CaptureBackend):
+    """
+    Replays recorded frames from a directory of images or a video file
+
+    Directory frames are played in file name order. Their timestamps come from
+    a timestamps.json sidecar ({file name: unix time}) when present, otherwise
+    they are spaced by 1 / fps. Video timestamps come from the container.
+    """
+
+    name = "replay"
+
+    def __init__(self, source, loop: bool = False, realtime: bool = False, fps: float = 30.0,
+                 scale: float = 1.0):
+        """
+        Args:
+            source: Directory of frames or a video file
+            loop: Start over after the last frame instead of raising EOFError
+            realtime: Pick frames by elapsed wall time (like a live screen)
+                      instead of advancing one frame per grab
+            fps: Frame spacing for directories without timestamps
+            scale: Pixels per point the frames were recorded at (2.0 for Retina)
+
+        Raises:
+            FileNotFoundError: If the source does not exist or has no frames
+        """
+        self.source = Path(source)
+        self.loop = loop
+        self.realtime = realtime
+        self.fps = fps
+        self.scale = scale
+
+        self._video = None
+        self._frames: List[Path] = []
+        self._timestamps: List[float] = []
+        self._index = 0
+        self._start_time = None
+        self._cached_index = None
+        self._cached_frame = None
+
+        if self.source.is_dir():
+            self._load_directory()
+        elif self.source.is_file() and self.source.suffix.lower() in VIDEO_EXTENSIONS:
+            self._load_video()
+        else:
+            raise FileNotFoundError(f"No replay frames found at {self.source}")
+
+        if not self._timestamps:
+            raise FileNotFoundError(f"No replay frames found at {self.source}")
+
+        # Currently replayed frame's original capture time
+        self.last_timestamp = self._timestamps[0]
+
+    def _load_directory(self):
+        """Index the frame files and their timestamps"""
+        self._frames = sorted(path for path in self.source.iterdir()
+                              if path.suffix.lower() in FRAME_EXTENSIONS)
+
+        timestamps_path = self.source / TIMESTAMPS_FILE
+        recorded = JSON.load(str(timestamps_path)) if timestamps_path.exists() else {}
+
+        interval = 1.0 / self.fps
+        self._timestamps = [float(recorded.get(path.name, index * interval))
+                            for index, path in enumerate(self._frames)]
+
+    def _load_video(self):
+        """Read frame timestamps from the video container"""
+        self._video = cv2.VideoCapture(str(self.source))
+        if not self._video.isOpened():
+            raise FileNotFoundError(f"Could not open replay video {self.source}")
+
+        frame_count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = self._video.get(cv2.CAP_PROP_FPS) or self.fps
+        self._timestamps = [index / fps for index in range(frame_count)]
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    @property
+    def timestamps(self) -> List[float]:
+        """Original capture timestamps of every frame"""
+        return list(self._timestamps)
+
+    def rewind(self):
+        """Start the replay over from the first frame"""
+        self._index = 0
+        self._start_time = None
+
+    def _next_index(self) -> int:
+        """Pick the frame to return for this grab"""
+        count = len(self._timestamps)
+
+        if self.realtime:
+            now = time.perf_counter()
+            if self._start_time is None:
+                self._start_time = now
+            elapsed = now - self._start_time + self._timestamps[0]
+            if self.loop:
+                duration = self._timestamps[-1] - self._timestamps[0] + 1.0 / self.fps
+                elapsed = self._timestamps[0] + (elapsed - self._timestamps[0]) % duration
+            elif elapsed > self._timestamps[-1] + 1.0 / self.fps:
+                raise EOFError(f"Replay of {self.source} finished")
+            return max(0, int(np.searchsorted(self._timestamps, elapsed, side='right')) - 1)
+
+        if self._index >= count:
+            if not self.loop:
+                raise EOFError(f"Replay of {self.source} finished")
+            self._index = 0
+
+        index = self._index
+        self._index += 1
+        return index
+
+    def _read_frame(self, index: int) -> np.ndarray:
+        """Load a frame by index (the last frame read is kept in memory)"""
+        if index == self._cached_index:
+            return self._cached_frame
+
+        if self._video is not None:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ok, frame = self._video.read()
+            if not ok:
+                raise EOFError(f"Could not read frame {index} from {self.source}")
+        else:
+            frame = cv2.imread(str(self._frames[index]), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError(f"Could not load replay frame {self._frames[index]}")
+
+        self._cached_index = index
+        self._cached_frame = frame
+        return frame
+
+    def grab(self, region=None) -> Tuple[np.ndarray, float]:
+        index = self._next_index()
+        frame = self._read_frame(index)
+        self.last_timestamp = self._timestamps[index]
+
+        if region:
+            # Regions are in points, like on the live screen
+            x, y, width, height = (int(round(value * self.scale)) for value in region)
+            frame = frame[y:y + height, x:x + width]
+
+        return frame, self.last_timestamp
+
+    def scale_factor(self) -> float:
+        return self.scale
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+
+def record_frames(backend: CaptureBackend, directory, count: int, interval: float = 0.0,
+                  region=None) -> int:
+    """
+    Record frames from a backend into a directory ReplayCapture can play back
+
+    Args:
+        backend: Capture backend to record from
+        directory: Output directory (created if missing)
+        count: Number of frames to record
+        interval: Seconds to wait between frames
+        region: (x, y, width, height) or None for the full screen
+
+    Returns:
+        Number of frames written
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    timestamps = {}
+    for index in range(count):
+        frame, timestamp = backend.grab(region)
+        name = f"frame_{index:06d}.png"
+        if not cv2.imwrite(str(directory / name), frame):
+            logger.error(f"Could not write frame {directory / name}")
+            break
+        timestamps[name] = timestamp
+        if interval > 0:
+            time.sleep(interval)
+
+    JSON.dump(timestamps, str(directory / TIMESTAMPS_FILE), indent=2)
+    return len(timestamps)
+
+
+def create_capture_backend(name: str = "pyautogui", **kwargs) -> CaptureBackend:
+    """
+    Create a capture backend by name
+
+    Args:
+        name: "pyautogui", "mss", "replay" or "bus"
+        **kwargs: Backend-specific arguments (e.g. source= for replay, bus_name= for bus)
+
+    Returns:
+        CaptureBackend instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name == 'bus':
+        # Imported here because the frame bus builds on this module
+        from .frame_bus import BusCapture
+        return BusCapture(**kwargs)
+
+    backends = {
+        'pyautogui': PyAutoGUICapture,
+        'mss': MSSCapture,
+        'replay': ReplayCapture,
+    }
+
+    if name not in backends:
+        raise ValueError(f"Unknown capture backend: {name}. "
+                         f"Available backends: {list(backends.keys()) + ['bus']}")
+
+    return backends[name](**kwargs)
@@ -0,0 +1,119 @@
+"""
+Change-gated polling for image waits
+Only re-run a full match when the watched region changed, and poll faster right after changes
+"""
+
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Longest side of the downsampled signature
+SIGNATURE_SIZE = 64
+# Max per-cell difference (0-255) still treated as "unchanged"
+DIFF_THRESHOLD = 2
+# Poll interval bounds (seconds) and backoff factor while the region is static
+MIN_POLL_INTERVAL = 0.1
+MAX_POLL_INTERVAL = 0.5
+POLL_BACKOFF = 2.0
+# Longest time (seconds) a static region goes without a full search (well above the poll cap,
+# so unchanged polls really skip matching)
+FORCE_SEARCH_INTERVAL = 5.0
+
+
+def region_signature(image: np.ndarray, size: int = SIGNATURE_SIZE) -> np.ndarray:
+    """
+    Downsample an image to a small signature (area-averaged, so any visible change
+    in a cell moves its value)
+
+    Args:
+        image: BGR or grayscale image
+        size: Longest side of the signature
+
+    Returns:
+        int16 signature array
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, size / max(height, width))
+    signature_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, signature_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+class ChangeGate:
+    """
+    Decides when a polled region needs a full search and how long to wait until the next poll
+
+    Every poll is compared with the signature saved at the last full search (not the
+    previous poll), so slow fades and small changes still add up to a search, and a
+    full search runs at least every force_interval regardless of the difference.
+    """
+
+    def __init__(self, threshold: int = DIFF_THRESHOLD,
+                 min_interval: float = MIN_POLL_INTERVAL,
+                 max_interval: float = MAX_POLL_INTERVAL,
+                 backoff: float = POLL_BACKOFF,
+                 force_interval: float = FORCE_SEARCH_INTERVAL):
+        """
+        Args:
+            threshold: Max per-cell signature difference treated as unchanged
+            min_interval: Poll interval right after a change (seconds)
+            max_interval: Poll interval cap while the region is static (seconds)
+            backoff: Factor the interval grows by on every static poll
+            force_interval: Longest time between full searches (seconds)
+        """
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.force_interval = force_interval
+
+        self.interval = min_interval
+        self.checks = 0
+        self.changes = 0
+        self.forced = 0
+        # Signature and time of the last full search
+        self._signature: Optional[np.ndarray] = None
+        self._searched_at = 0.0
+
+    def check(self, image: np.ndarray) -> bool:
+        """
+        Compare an image with the region at the last full search and adjust the poll interval
+        The caller runs a full search whenever this returns True
+
+        Args:
+            image: Current capture of the watched region
+
+        Returns:
+            True if the region changed since the last search, or the last search is
+            force_interval old (always True on the first poll)
+        """
+        signature = region_signature(image)
+        reference = self._signature
+        now = time.perf_counter()
+        self.checks += 1
+
+        changed = (reference is None or reference.shape != signature.shape or
+                   int(np.abs(signature - reference).max()) > self.threshold)
+        overdue = not changed and now - self._searched_at >= self.force_interval
+
+        if changed:
+            self.changes += 1
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+            if overdue:
+                self.forced += 1
+
+        if changed or overdue:
+            # A search runs on this frame: later polls are compared with it
+            self._signature = signature
+            self._searched_at = now
+            return True
+        return False
+
+    def reset(self):
+        """Forget the last search so the next poll searches"""
+        self._signature = None
+        self._searched_at = 0.0
+        self.interval = self.min_interval
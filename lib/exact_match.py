@@ -0,0 +1,27 @@
+"""
+Exact-match fast path for image search
+Finds pixel-identical needles (variation 0) without a full correlation pass
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .variation_match import find_variation_matches
+
+
+def find_exact_matches(haystack: np.ndarray, needle: np.ndarray,
+                       mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find every position where the needle appears pixel-for-pixel
+    (the variation matcher at variation 0, see lib/variation_match.py)
+
+    Args:
+        haystack: BGR or grayscale search image
+        needle: Needle with the same number of channels
+        mask: Optional needle mask (nonzero = pixel must match, 0 = ignored)
+
+    Returns:
+        (xs, ys) of matching top-left positions, in row-major order
+    """
+    return find_variation_matches(haystack, needle, 0, mask)
@@ -0,0 +1,459 @@
+"""
+Shared-memory frame bus for vision worker processes
+One capture publisher writes frames into a shared memory ring; workers map the latest one without copying
+
+Torn reads are detected with a per-slot seqlock. Python has no memory fence, so the
+seqlock alone relies on stores becoming visible in program order, which x86 guarantees
+but ARM (Apple Silicon) does not. Where stores can be reordered the publisher also
+stores a CRC32 of every frame and subscribers verify it on copied reads; zero-copy
+views are never validated beyond the seqlock.
+"""
+
+import logging
+import multiprocessing
+import os
+import platform
+import time
+import zlib
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .capture_backends import CaptureBackend
+from .frame_context import FrameContext, DEFAULT_FRAME_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+BUS_MAGIC = 0x4E4D4642   # "NMFB"
+BUS_VERSION = 2
+DEFAULT_BUS_NAME = "natro_frame_bus"
+# Frames kept in the ring; a zero-copy frame stays valid until this many newer frames are published
+DEFAULT_SLOTS = 4
+DEFAULT_MAX_WIDTH = 3840
+DEFAULT_MAX_HEIGHT = 2160
+CHANNELS = 3
+# Seconds between polls while waiting for a new frame
+WAIT_POLL_INTERVAL = 0.002
+# Reads retried when the publisher overwrites the slot being read
+READ_RETRIES = 8
+# Machines whose stores may become visible to other cores out of order
+WEAK_MEMORY_ORDER = platform.machine().lower().startswith(("arm", "aarch64"))
+
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'), ('version', '<u4'), ('slots', '<u4'), ('max_height', '<u4'),
+    ('max_width', '<u4'), ('channels', '<u4'), ('checksums', '<u4'), ('latest', '<u8'),
+])
+# seq is a seqlock: 2n - 1 while frame n is being written, 2n once it is complete
+SLOT_DTYPE = np.dtype([
+    ('seq', '<u8'), ('height', '<u4'), ('width', '<u4'), ('x', '<i4'), ('y', '<i4'),
+    ('timestamp', '<f8'), ('capture_time', '<f8'), ('scale', '<f8'), ('checksum', '<u4'),
+])
+ALIGNMENT = 64
+
+# Buses published by this process (their tracker registration belongs to the publisher)
+_published = set()
+
+
+def _aligned(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(slots: int, max_height: int, max_width: int) -> Tuple[int, int, int, int]:
+    """
+    Byte layout of the bus
+
+    Returns:
+        (slot header offset, frame data offset, bytes per frame slot, total size)
+    """
+    slot_offset = _aligned(HEADER_DTYPE.itemsize)
+    data_offset = _aligned(slot_offset + SLOT_DTYPE.itemsize * slots)
+    slot_bytes = _aligned(max_height * max_width * CHANNELS)
+    return slot_offset, data_offset, slot_bytes, data_offset + slot_bytes * slots
+
+
+class BusFrame(NamedTuple):
+    """A frame read from the bus"""
+    sequence: int           # Frame number (1 = first frame published)
+    image: np.ndarray       # BGR frame (a view into shared memory unless copied)
+    x: int
+    y: int
+    timestamp: float        # time.perf_counter() at capture (system-wide monotonic clock)
+    capture_time: float     # Unix time at capture
+    scale: float            # Pixels per screen point
+
+
+class _FrameRing:
+    """Shared memory block and the NumPy views over it"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, max_height: int, max_width: int):
+        self.shm = shm
+        self.slot_count = slots
+        self.max_height = max_height
+        self.max_width = max_width
+
+        slot_offset, data_offset, slot_bytes, _ = _layout(slots, max_height, max_width)
+        self.header = np.ndarray((1,), HEADER_DTYPE, buffer=shm.buf)
+        self.slots = np.ndarray((slots,), SLOT_DTYPE, buffer=shm.buf, offset=slot_offset)
+        self.data = [np.ndarray((max_height * max_width * CHANNELS,), np.uint8, buffer=shm.buf,
+                                offset=data_offset + index * slot_bytes)
+                     for index in range(slots)]
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def release(self):
+        """Drop the views so the shared memory can be closed"""
+        self.header = None
+        self.slots = None
+        self.data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A zero-copy frame handed out earlier is still alive
+            logger.warning(f"Frame bus {self.shm.name} closed while frames are still referenced")
+
+
+class FramePublisher:
+    """Writes captured frames into the bus (one publisher per bus)"""
+
+    def __init__(self, name: str = DEFAULT_BUS_NAME, slots: int = DEFAULT_SLOTS,
+                 max_width: int = DEFAULT_MAX_WIDTH, max_height: int = DEFAULT_MAX_HEIGHT,
+                 checksums: Optional[bool] = None):
+        """
+        Args:
+            name: Shared memory name workers attach to
+            slots: Frames kept in the ring
+            max_width, max_height: Largest frame (pixels) the bus can hold
+            checksums: Store a CRC32 of every frame for subscribers to validate copies
+                       against (None = only on WEAK_MEMORY_ORDER machines)
+
+        Raises:
+            FileExistsError: If a bus with this name already exists
+        """
+        size = _layout(slots, max_height, max_width)[3]
+        self._ring = _FrameRing(shared_memory.SharedMemory(name=name, create=True, size=size),
+                                slots, max_height, max_width)
+        _published.add(self._ring.name)
+        self.checksums = WEAK_MEMORY_ORDER if checksums is None else checksums
+
+        header = self._ring.header[0]
+        header['magic'] = BUS_MAGIC
+        header['version'] = BUS_VERSION
+        header['slots'] = slots
+        header['max_height'] = max_height
+        header['max_width'] = max_width
+        header['channels'] = CHANNELS
+        header['checksums'] = int(self.checksums)
+        header['latest'] = 0
+        self._ring.slots['seq'] = 0
+        self.sequence = 0
+
+        logger.info(f"Frame bus {name} created: {slots} slots of {max_width}x{max_height} "
+                    f"({size / 1e6:.1f} MB{', checksummed' if self.checksums else ''})")
+
+    @property
+    def name(self) -> str:
+        return self._ring.name
+
+    def publish(self, frame: np.ndarray, x: int = 0, y: int = 0, scale: float = 1.0,
+                capture_time: Optional[float] = None) -> int:
+        """
+        Copy a frame into the next ring slot
+
+        Args:
+            frame: BGR frame (HxWx3 uint8)
+            x, y: Screen coordinates of the frame's top-left pixel
+            scale: Pixels per screen point
+            capture_time: Unix time of the capture (defaults to now)
+
+        Returns:
+            Sequence number of the published frame
+
+        Raises:
+            ValueError: If the frame is larger than the bus or not HxWx3
+        """
+        height, width = frame.shape[:2]
+        if frame.ndim != 3 or frame.shape[2] != CHANNELS:
+            raise ValueError(f"Frame bus expects HxWx{CHANNELS} frames, got {frame.shape}")
+        if height > self._ring.max_height or width > self._ring.max_width:
+            raise ValueError(f"Frame {width}x{height} exceeds the bus size "
+                             f"{self._ring.max_width}x{self._ring.max_height}")
+
+        sequence = self.sequence + 1
+        index = (sequence - 1) % self._ring.slot_count
+        slot = self._ring.slots[index:index + 1]
+
+        # Odd seq tells readers the slot is being overwritten
+        slot['seq'] = 2 * sequence - 1
+        pixels = self._ring.data[index][:height * width * CHANNELS]
+        pixels.reshape(height, width, CHANNELS)[:] = frame
+        slot['checksum'] = zlib.crc32(pixels) if self.checksums else 0
+        slot['height'] = height
+        slot['width'] = width
+        slot['x'] = x
+        slot['y'] = y
+        slot['timestamp'] = time.perf_counter()
+        slot['capture_time'] = time.time() if capture_time is None else capture_time
+        slot['scale'] = scale
+        slot['seq'] = 2 * sequence
+
+        self._ring.header['latest'] = sequence
+        self.sequence = sequence
+        return sequence
+
+    def run(self, backend: CaptureBackend, stop_event, interval: float = 0.0, region=None):
+        """
+        Capture and publish until stop_event is set (run it in its own thread or process)
+
+        Args:
+            backend: Capture backend to publish frames from
+            stop_event: threading.Event or multiprocessing.Event
+            interval: Minimum seconds between frames
+            region: (x, y, width, height) to capture, or None for the full screen
+        """
+        scale = backend.scale_factor()
+        x, y = (region[0], region[1]) if region else (0, 0)
+
+        while not stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                frame, capture_time = backend.grab(region)
+                self.publish(frame, x, y, scale, capture_time)
+            except EOFError:
+                break
+            except Exception as e:
+                logger.error(f"Frame bus capture failed: {e}")
+
+            remaining = interval - (time.perf_counter() - started)
+            if remaining > 0:
+                stop_event.wait(remaining)
+
+    def close(self):
+        """Close and remove the bus (attached workers keep their mapping until they close)"""
+        ring, self._ring = self._ring, None
+        if ring is None:
+            return
+        shm = ring.shm
+        ring.release()
+        _published.discard(shm.name)
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class FrameSubscriber:
+    """Reads frames from a bus created by a FramePublisher, typically in another process"""
+
+    def __init__(self, name: str = DEFAULT_BUS_NAME):
+        """
+        Args:
+            name: Shared memory name the publisher created
+
+        Raises:
+            FileNotFoundError: If no bus with this name exists
+            ValueError: If the shared memory is not a frame bus
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+
+        header = np.ndarray((1,), HEADER_DTYPE, buffer=shm.buf)[0]
+        if header['magic'] != BUS_MAGIC or header['version'] != BUS_VERSION:
+            del header
+            shm.close()
+            raise ValueError(f"Shared memory {name} is not a version {BUS_VERSION} frame bus")
+
+        slots, max_height, max_width = int(header['slots']), int(header['max_height']), int(header['max_width'])
+        # Whether the publisher stores frame checksums to validate copies against
+        self.checksums = bool(header['checksums'])
+        del header
+        self._ring = _FrameRing(shm, slots, max_height, max_width)
+
+    @property
+    def latest_sequence(self) -> int:
+        """Sequence number of the newest complete frame (0 = none yet)"""
+        return int(self._ring.header['latest'][0])
+
+    def latest_scale(self) -> Optional[float]:
+        """Pixel density of the newest frame, without reading the frame (None = none yet)"""
+        sequence = self.latest_sequence
+        if sequence == 0:
+            return None
+        return float(self._ring.slots[(sequence - 1) % self._ring.slot_count]['scale'])
+
+    def _read(self, sequence: int, copy: bool) -> Optional[BusFrame]:
+        """Read frame `sequence` from its slot, or None if it was overwritten"""
+        index = (sequence - 1) % self._ring.slot_count
+        slot = self._ring.slots[index]
+        if int(slot['seq']) != 2 * sequence:
+            return None
+
+        height, width = int(slot['height']), int(slot['width'])
+        image = self._ring.data[index][:height * width * CHANNELS].reshape(height, width, CHANNELS)
+        if copy:
+            image = image.copy()
+        frame = BusFrame(sequence, image, int(slot['x']), int(slot['y']), float(slot['timestamp']),
+                         float(slot['capture_time']), float(slot['scale']))
+
+        # Seqlock: everything read above is only valid if the slot was not rewritten meanwhile
+        if int(slot['seq']) != 2 * sequence:
+            return None
+        # The seqlock alone can miss a torn copy where stores are reordered
+        if copy and self.checksums and zlib.crc32(image) != int(slot['checksum']):
+            return None
+        return frame
+
+    def latest(self, copy: bool = False) -> Optional[BusFrame]:
+        """
+        Get the newest frame
+
+        Args:
+            copy: Copy the pixels out of shared memory (checksum-validated when the
+                  publisher stores checksums); otherwise the image is a view that stays
+                  valid until the publisher wraps around the ring (see is_valid)
+
+        Returns:
+            BusFrame, or None if nothing was published yet
+        """
+        for _ in range(READ_RETRIES):
+            sequence = self.latest_sequence
+            if sequence == 0:
+                return None
+            frame = self._read(sequence, copy)
+            if frame is not None:
+                return frame
+
+        logger.warning("Frame bus publisher kept overwriting the frame being read")
+        return None
+
+    def wait_for_frame(self, after: int = 0, timeout: float = 1.0, copy: bool = False) -> Optional[BusFrame]:
+        """
+        Wait for a frame newer than `after`
+
+        Args:
+            after: Sequence number already seen
+            timeout: Seconds to wait
+            copy: See latest()
+
+        Returns:
+            BusFrame, or None on timeout
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            if self.latest_sequence > after:
+                frame = self.latest(copy)
+                if frame is not None:
+                    return frame
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(WAIT_POLL_INTERVAL)
+
+    def is_valid(self, frame: BusFrame) -> bool:
+        """Check that a zero-copy frame has not been overwritten yet (check after using it)"""
+        index = (frame.sequence - 1) % self._ring.slot_count
+        return int(self._ring.slots[index]['seq']) == 2 * frame.sequence
+
+    def frame_context(self, max_age: Optional[float] = DEFAULT_FRAME_MAX_AGE,
+                      copy: bool = False) -> Optional[FrameContext]:
+        """
+        Wrap the newest frame for ImageSearch (pass it as frame=)
+
+        Args:
+            max_age: Seconds after which the frame expires (None = never)
+            copy: See latest(); without a copy, searches that outlive the ring
+                  (slots / capture rate) can see a partly overwritten frame
+
+        Returns:
+            FrameContext, or None if nothing was published yet
+        """
+        frame = self.latest(copy)
+        if frame is None:
+            return None
+        return FrameContext(frame.image, frame.x, frame.y, frame.timestamp, max_age,
+                            frame.capture_time, frame.scale)
+
+    def close(self):
+        """Detach from the bus (the publisher owns and removes it)"""
+        ring, self._ring = self._ring, None
+        if ring is not None:
+            ring.release()
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    """
+    Stop the resource tracker from removing a bus this process only attached to
+    (it would otherwise unlink the publisher's memory when the worker exits)
+
+    Children started by multiprocessing share their parent's tracker, which
+    already tracks the bus, so only independent processes unregister. Only POSIX
+    shared memory is tracked, under the name with its leading slash.
+    """
+    if os.name != 'posix' or multiprocessing.parent_process() is not None or shm.name in _published:
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister("/" + shm.name.lstrip("/"), 'shared_memory')
+    except Exception:
+        pass
+
+
+class BusCapture(CaptureBackend):
+    """Capture backend that serves the newest frame bus frame instead of taking screenshots"""
+
+    name = "bus"
+
+    def __init__(self, bus_name: str = DEFAULT_BUS_NAME, timeout: float = 1.0):
+        """
+        Args:
+            bus_name: Frame bus to read from
+            timeout: Seconds to wait for the first frame
+        """
+        self.subscriber = FrameSubscriber(bus_name)
+        self.timeout = timeout
+
+    def _frame(self, copy: bool = False) -> BusFrame:
+        frame = self.subscriber.latest(copy) or self.subscriber.wait_for_frame(timeout=self.timeout,
+                                                                             copy=copy)
+        if frame is None:
+            raise TimeoutError("No frame published on the frame bus")
+        return frame
+
+    @staticmethod
+    def _crop(frame: BusFrame, region) -> np.ndarray:
+        image = frame.image
+        if region:
+            # Regions are in screen points, relative to the published frame's origin
+            x, y, width, height = region
+            x, y = x - frame.x, y - frame.y
+            image = image[int(round(y * frame.scale)):int(round((y + height) * frame.scale)),
+                          int(round(x * frame.scale)):int(round((x + width) * frame.scale))]
+        return image
+
+    def grab(self, region=None) -> Tuple[np.ndarray, float]:
+        if self.subscriber.checksums:
+            # Checksums cover whole frames: take a validated full copy
+            frame = self._frame(copy=True)
+            return self._crop(frame, region).copy(), frame.capture_time
+
+        # Copy only the region out of shared memory, then check the slot was not
+        # rewritten while copying (seqlock); retry on a torn copy
+        for _ in range(READ_RETRIES):
+            frame = self._frame()
+            image = self._crop(frame, region).copy()
+            if self.subscriber.is_valid(frame):
+                return image, frame.capture_time
+
+        # The publisher keeps lapping the reader: take a validated full copy
+        frame = self._frame(copy=True)
+        return self._crop(frame, region).copy(), frame.capture_time
+
+    def scale_factor(self) -> float:
+        scale = self.subscriber.latest_scale()
+        if scale is None and self.subscriber.wait_for_frame(timeout=self.timeout) is not None:
+            scale = self.subscriber.latest_scale()
+        return scale if scale is not None else 1.0
+
+    def close(self):
+        self.subscriber.close()
@@ -0,0 +1,104 @@
+"""
+Shared screen frames for image search
+Capture the screen once per tick and run any number of searches against it
+"""
+
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Frames older than this (seconds) are treated as expired unless told otherwise
+DEFAULT_FRAME_MAX_AGE = 0.25
+
+
+class FrameContext:
+    """One captured BGR frame plus where on screen it came from"""
+
+    def __init__(self, frame: np.ndarray, x: int = 0, y: int = 0,
+                 timestamp: Optional[float] = None,
+                 max_age: Optional[float] = DEFAULT_FRAME_MAX_AGE,
+                 capture_time: Optional[float] = None, scale: float = 1.0):
+        """
+        Args:
+            frame: BGR frame array (HxWx3)
+            x, y: Screen coordinates of the frame's top-left pixel
+            timestamp: time.perf_counter() value at capture (defaults to now)
+            max_age: Seconds after which the frame expires (None = never)
+            capture_time: Unix time the backend reports for the frame
+                          (the original recording time for replayed frames)
+            scale: Frame pixels per screen point (2.0 for Retina captures)
+        """
+        self.frame = frame
+        self.x = x
+        self.y = y
+        self.scale = scale
+        # Size in screen points; frame.shape is in pixels
+        self.height = int(round(frame.shape[0] / scale))
+        self.width = int(round(frame.shape[1] / scale))
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+        self.max_age = max_age
+        self.capture_time = time.time() if capture_time is None else capture_time
+        self._expired = False
+
+        # Downscaled copies of the frame shared by every needle (see lib/pyramid_search.py)
+        self.pyramid_cache = {}
+        # Bit-packed color planes shared by every binary needle (see lib/binary_match.py)
+        self.plane_cache = {}
+
+    @property
+    def age(self) -> float:
+        """Seconds since the frame was captured"""
+        return time.perf_counter() - self.timestamp
+
+    @property
+    def expired(self) -> bool:
+        """Whether the frame was expired explicitly or is older than max_age"""
+        if self._expired:
+            return True
+        return self.max_age is not None and self.age > self.max_age
+
+    def expire(self):
+        """Mark the frame as stale (e.g. after clicking something on screen)"""
+        self._expired = True
+
+    @property
+    def region(self) -> Tuple[int, int, int, int]:
+        """Screen region covered by the frame as (x1, y1, x2, y2)"""
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+    def contains(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """
+        Check if a screen region lies entirely inside the frame
+
+        Args:
+            x1, y1, x2, y2: Screen region bounds
+
+        Returns:
+            True if the region can be served from this frame
+        """
+        return (x1 >= self.x and y1 >= self.y and
+                x2 <= self.x + self.width and y2 <= self.y + self.height)
+
+    def view(self, x1: int = 0, y1: int = 0, x2: int = 0, y2: int = 0) -> np.ndarray:
+        """
+        Get a region of the frame without copying
+
+        Args:
+            x1, y1, x2, y2: Screen region bounds in points (x2 <= x1 or y2 <= y1 = whole frame)
+
+        Returns:
+            NumPy view into the frame (in pixels)
+
+        Raises:
+            ValueError: If the region is not inside the frame
+        """
+        if not (x2 > x1 and y2 > y1):
+            return self.frame
+
+        if not self.contains(x1, y1, x2, y2):
+            raise ValueError(f"Region {(x1, y1, x2, y2)} is outside frame {self.region}")
+
+        scale = self.scale
+        return self.frame[int(round((y1 - self.y) * scale)):int(round((y2 - self.y) * scale)),
+                          int(round((x1 - self.x) * scale)):int(round((x2 - self.x) * scale))]
@@ -3,7 +3,7 @@ High-precision sleep function
 Equivalent to lib/HyperSleep.ahk
 """
 
-import time
+from .precision_timer import get_timer
 
 
 def hyper_sleep(ms: float):
@@ -11,17 +11,13 @@ def hyper_sleep(ms: float):
     High-precision sleep function
     Equivalent to HyperSleep()
 
+    Sleeps natively and spins only for the calibrated sleep overshoot
+    (see lib/precision_timer.py)
+
     Args:
         ms: Milliseconds to sleep
     """
-    start_time = time.perf_counter()
-    end_time = start_time + (ms / 1000.0)
-
-    while time.perf_counter() < end_time:
-        remaining = end_time - time.perf_counter()
-        if remaining > 0.03:  # 30ms threshold
-            time.sleep(0.001)  # Sleep for 1ms
-        # Busy wait for remaining time for higher precision
+    get_timer().sleep_ms(ms)
 
 
 def sleep_ms(ms: float):
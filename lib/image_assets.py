@@ -6,7 +6,7 @@ Provides access to all game UI element bitmaps for image recognition
 import base64
 from PIL import Image
 import io
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 # Import all bitmap modules
 from nm_image_assets.beemenu.bitmaps import bitmaps as beemenu_bitmaps
@@ -60,6 +60,33 @@ BITMAPS = {
     **webhook_gui_bitmaps,
 }
 
+# Bitmaps grouped by category, in the same order they are merged into BITMAPS
+CATEGORY_BITMAPS = {
+    'beemenu': beemenu_bitmaps,
+    'boost': boost_bitmaps,
+    'buffs': buffs_bitmaps,
+    'collect': collect_bitmaps,
+    'convert': convert_bitmaps,
+    'fdc': fdc_bitmaps,
+    'general': general_bitmaps,
+    'gui': gui_bitmaps,
+    'inventory': inventory_bitmaps,
+    'kill': kill_bitmaps,
+    'memorymatch': memorymatch_bitmaps,
+    'mutator': mutator_bitmaps,
+    'mutatorgui': mutatorgui_bitmaps,
+    'night': night_bitmaps,
+    'offset': offset_bitmaps,
+    'perfstats': perfstats_bitmaps,
+    'quests': quests_bitmaps,
+    'reconnect': reconnect_bitmaps,
+    'reset': reset_bitmaps,
+    'sprinkler': sprinkler_bitmaps,
+    'stickerprinter': stickerprinter_bitmaps,
+    'stickerstack': stickerstack_bitmaps,
+    'webhook_gui': webhook_gui_bitmaps,
+}
+
 def get_bitmap_base64(key: str) -> str:
     """
     Get base64 encoded bitmap data for a given key
@@ -126,33 +153,23 @@ def get_category_bitmaps(category: str) -> Dict[str, str]:
     Raises:
         ValueError: If category not found
     """
-    categories = {
-        'beemenu': beemenu_bitmaps,
-        'boost': boost_bitmaps,
-        'buffs': buffs_bitmaps,
-        'collect': collect_bitmaps,
-        'convert': convert_bitmaps,
-        'fdc': fdc_bitmaps,
-        'general': general_bitmaps,
-        'gui': gui_bitmaps,
-        'inventory': inventory_bitmaps,
-        'kill': kill_bitmaps,
-        'memorymatch': memorymatch_bitmaps,
-        'mutator': mutator_bitmaps,
-        'mutatorgui': mutatorgui_bitmaps,
-        'night': night_bitmaps,
-        'offset': offset_bitmaps,
-        'perfstats': perfstats_bitmaps,
-        'quests': quests_bitmaps,
-        'reconnect': reconnect_bitmaps,
-        'reset': reset_bitmaps,
-        'sprinkler': sprinkler_bitmaps,
-        'stickerprinter': stickerprinter_bitmaps,
-        'stickerstack': stickerstack_bitmaps,
-        'webhook_gui': webhook_gui_bitmaps,
-    }
-
-    if category not in categories:
-        raise ValueError(f"Unknown category: {category}. Available categories: {list(categories.keys())}")
-
-    return categories[category].copy()
+    if category not in CATEGORY_BITMAPS:
+        raise ValueError(f"Unknown category: {category}. Available categories: {list(CATEGORY_BITMAPS.keys())}")
+
+    return CATEGORY_BITMAPS[category].copy()
+
+def find_duplicate_bitmap_keys() -> Dict[str, List[str]]:
+    """
+    Find bitmap keys defined in more than one category
+    Later categories silently overwrite earlier ones when merged into BITMAPS
+
+    Returns:
+        Dictionary mapping each duplicate key to its categories, in merge order
+        (the last category is the one BITMAPS actually uses)
+    """
+    seen: Dict[str, List[str]] = {}
+    for category, bitmaps in CATEGORY_BITMAPS.items():
+        for key in bitmaps:
+            seen.setdefault(key, []).append(category)
+
+    return {key: categories for key, categories in seen.items() if len(categories) > 1}
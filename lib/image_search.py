@@ -5,25 +5,67 @@ Equivalent to lib/Gdip_ImageSearch.ahk
 
 import cv2
 import numpy as np
-import pyautogui
 from PIL import Image
 import logging
 from pathlib import Path
 import time
-import base64
-import io
-
-from .image_assets import get_bitmap_image, bitmap_exists
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .image_assets import bitmap_exists
+from .needle_cache import (NeedleCache, COLOR_BGR, alpha_mask, combine_masks, decode_needle_image,
+                           scale_needle, trans_color_mask)
+from .needle_pack import load_needle_pack
+from .match_suppression import first_match, first_on_surface, preceding_region, suppress_matches
+from .frame_context import FrameContext, DEFAULT_FRAME_MAX_AGE
+from .capture_backends import PyAutoGUICapture
+from .change_gate import ChangeGate
+from .batch_search import SearchJob, SearchResult, union_region
+from .exact_match import find_exact_matches
+from .binary_match import find_binary_matches, frame_color_plane, color_plane
+from .pyramid_search import coarse_view, downscale, pyramid_match
+from .variation_match import find_variation_matches, VARIATION_MODE_AHK, VARIATION_MODE_CORRELATION
+from .search_profiler import SearchProfiler, SearchTimings
+from .pixel_search import bgr_to_rgb, find_color, match_colors, point_grid, rgb_to_bgr
 
 logger = logging.getLogger(__name__)
 
 class ImageSearch:
-    def __init__(self, macro_instance):
+    def __init__(self, macro_instance, capture_backend=None,
+                 variation_mode=VARIATION_MODE_CORRELATION, pyramid=None, location_memory=None,
+                 profiler=None):
         self.macro = macro_instance
 
+        # How variation is interpreted: a correlation threshold (legacy port behaviour)
+        # or a per-channel 0-255 color tolerance like Gdip_ImageSearch
+        self.variation_mode = variation_mode
+
+        # Coarse-to-fine settings for large correlation searches (None = always full resolution)
+        self.pyramid = pyramid
+
+        # Where needles were found before, searched first by first-match searches (None = off)
+        self.location_memory = location_memory
+
+        # Per-needle capture/match/filter timings (see lib/search_profiler.py)
+        self.profiler = profiler if profiler is not None else SearchProfiler()
+
+        # Capture pixels per screen point (2.0 on Retina), detected on first use
+        self.scale = None
+
+        # Where screenshots come from (see lib/capture_backends.py)
+        self.capture = capture_backend if capture_backend is not None else PyAutoGUICapture()
+        self.needle_cache = NeedleCache(pack=load_needle_pack())
+
+        # Frame shared by all searches in the current tick
+        self.current_frame = None
+
+        # Persistent pool for batch searches (created on first use)
+        self.max_workers = os.cpu_count() or 4
+        self._executor = None
+
     def image_search(self, needle_path, output_list=None, outer_x1=0, outer_y1=0,
                     outer_x2=0, outer_y2=0, variation=0, trans_color=None,
-                    search_direction=1, center_results=False):
+                    search_direction=1, center_results=False, frame=None, first_only=False):
         """
         Search for pBitmapNeedle within the screen
         Equivalent to Gdip_ImageSearch()
@@ -33,9 +75,11 @@ class ImageSearch:
             output_list: List to store found coordinates (x, y)
             outer_x1, outer_y1, outer_x2, outer_y2: Search region bounds
             variation: Color variation tolerance (0-255)
-            trans_color: Transparent color (RGB)
+            trans_color: Extra transparent color (0xRRGGBB); alpha transparency is always masked
             search_direction: Search direction (1-8)
             center_results: Whether to return center coordinates
+            frame: Shared FrameContext to search instead of taking a new screenshot
+            first_only: Stop at the first match in search order (returns 0 or 1)
 
         Returns:
             Number of matches found (negative = error)
@@ -47,60 +91,79 @@ class ImageSearch:
                 return -1
 
             # Load needle image
-            needle = cv2.imread(str(needle_path))
-            if needle is None:
-                logger.error(f"Could not load needle image: {needle_path}")
+            try:
+                with Image.open(needle_path) as needle_image:
+                    needle, alpha = decode_needle_image(needle_image)
+            except Exception as e:
+                logger.error(f"Could not load needle image: {needle_path} ({e})")
                 return -2
 
-            needle_height, needle_width = needle.shape[:2]
-
-            # Handle transparent color
-            if trans_color is not None:
-                # Convert RGB to BGR for OpenCV
-                trans_bgr = (trans_color & 0xFF, (trans_color >> 8) & 0xFF, (trans_color >> 16) & 0xFF)
-                # Create mask for transparent pixels
-                mask = cv2.inRange(needle, trans_bgr, trans_bgr)
-                needle = cv2.bitwise_and(needle, needle, mask=cv2.bitwise_not(mask))
-
-            # Take screenshot of search area
-            if outer_x2 > outer_x1 and outer_y2 > outer_y1:
-                # Specific region
-                region = (outer_x1, outer_y1, outer_x2 - outer_x1, outer_y2 - outer_y1)
-                haystack_img = pyautogui.screenshot(region=region)
-            else:
-                # Full screen
-                haystack_img = pyautogui.screenshot()
+            # Transparent pixels (alpha, palette transparency or trans_color) are masked out
+            mask = combine_masks(alpha_mask(alpha), trans_color_mask(needle, trans_color))
 
-            # Convert PIL to OpenCV format
-            haystack = cv2.cvtColor(np.array(haystack_img), cv2.COLOR_RGB2BGR)
+            # Needle files are 1x; match them at the capture's pixel density
+            scale = self.capture_scale()
+            needle = scale_needle(needle, scale)
+            mask = None if mask is None else scale_needle(mask, scale, is_mask=True)
 
-            # Perform template matching
-            result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            return self._search_image(needle, output_list, outer_x1, outer_y1,
+                                      outer_x2, outer_y2, variation,
+                                      search_direction, center_results, frame, mask,
+                                      first_only=first_only, needle_key=str(needle_path))
 
-            # Apply variation threshold (convert to similarity threshold)
-            threshold = (100 - variation) / 100.0
+        except Exception as e:
+            logger.error(f"Image search error: {e}")
+            return -3
 
-            # Find all matches above threshold
-            locations = np.where(result >= threshold)
-            matches = list(zip(*locations[::-1]))  # Reverse to get (x, y) tuples
+    def _search_image(self, needle, output_list=None, outer_x1=0, outer_y1=0,
+                      outer_x2=0, outer_y2=0, variation=0,
+                      search_direction=1, center_results=False, frame=None, mask=None,
+                      binary=None, first_only=False, needle_key=None):
+        """
+        Search for a decoded needle array within the screen
 
-            if not matches:
-                return 0
+        Args:
+            needle: BGR (or grayscale) needle array
+            output_list: List to store found coordinates (x, y)
+            outer_x1, outer_y1, outer_x2, outer_y2: Search region bounds
+            variation: Color variation tolerance (0-255)
+            search_direction: Search direction (1-8)
+            center_results: Whether to return center coordinates
+            frame: Shared FrameContext to search instead of taking a new screenshot
+            mask: Optional needle mask (255 = match, 0 = transparent)
+            binary: BinaryNeedle form of the needle, if it has at most two colors
+            first_only: Stop at the first match in search order (returns 0 or 1)
+            needle_key: Bitmap key or path, used by location memory and the profiler
 
-            # Filter matches based on search direction and avoid overlapping
-            filtered_matches = self._filter_matches(matches, needle_width, needle_height,
-                                                  search_direction, haystack.shape)
+        Returns:
+            Number of matches found (negative = error)
+        """
+        try:
+            needle_width, needle_height = self._needle_size(needle)
+            profiling = needle_key is not None and self.profiler.enabled
+            timings = SearchTimings() if profiling else None
+
+            if first_only and needle_key is not None and self.location_memory is not None:
+                # Look where the needle was seen before searching the whole area
+                xs, ys = self._find_remembered(needle_key, needle, outer_x1, outer_y1,
+                                               outer_x2, outer_y2, variation, search_direction,
+                                               frame, mask, binary, timings)
+            else:
+                xs, ys = self._find_matches(needle, outer_x1, outer_y1, outer_x2, outer_y2,
+                                            variation, search_direction, frame, mask, binary,
+                                            first_only, timings)
+
+            if profiling:
+                self.profiler.record_timings(needle_key, timings, len(xs) > 0)
+
+            if len(xs) == 0:
+                return 0
+            filtered_matches = list(zip(xs.tolist(), ys.tolist()))
 
             # Store results
             if output_list is not None:
                 output_list.clear()
                 for x, y in filtered_matches:
-                    # Adjust coordinates if searching in a region
-                    if outer_x2 > outer_x1 and outer_y2 > outer_y1:
-                        x += outer_x1
-                        y += outer_y1
-
                     # Return center coordinates if requested
                     if center_results:
                         x += needle_width // 2
@@ -114,6 +177,315 @@ class ImageSearch:
             logger.error(f"Image search error: {e}")
             return -3
 
+    def _find_matches(self, needle, outer_x1=0, outer_y1=0, outer_x2=0, outer_y2=0, variation=0,
+                      search_direction=1, frame=None, mask=None, binary=None, first_only=False,
+                      timings=None):
+        """
+        Match a needle in a region and suppress overlapping matches
+
+        Args:
+            timings: SearchTimings to add this search's capture/match/filter time to
+
+        Returns:
+            (xs, ys) arrays of top-left screen coordinates, in search order
+        """
+        needle_height, needle_width = needle.shape[:2]
+        started = time.perf_counter()
+
+        # Use the shared frame if it covers the search area, otherwise take a screenshot
+        haystack, origin_x, origin_y, scale = self._get_haystack(outer_x1, outer_y1,
+                                                                 outer_x2, outer_y2, frame)
+        if needle.ndim == 2:
+            haystack = cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)
+        captured = time.perf_counter()
+
+        if binary is not None and (variation == 0 or self.variation_mode == VARIATION_MODE_AHK):
+            # Two-color needle: compare bit planes, 64 pixels per word
+            planes = self._get_color_planes(haystack, binary, variation, frame,
+                                            outer_x1, outer_y1, outer_x2, outer_y2)
+            xs, ys = find_binary_matches(haystack, binary, variation, planes=planes)
+        elif variation == 0:
+            # Exact match: seed from the rarest needle pixel and verify,
+            # instead of correlating over the whole region
+            xs, ys = find_exact_matches(haystack, needle, mask)
+        elif self.variation_mode == VARIATION_MODE_AHK:
+            # Every channel of every needle pixel within +/- variation
+            xs, ys = find_variation_matches(haystack, needle, variation, mask)
+        else:
+            # Apply variation threshold (convert to similarity threshold)
+            threshold = (100 - variation) / 100.0
+
+            # Try a coarse pass first on large areas, falling back to a full search
+            matches = None
+            if self.pyramid is not None:
+                coarse = self._get_coarse_haystack(haystack, frame, outer_x1, outer_y1,
+                                                   outer_x2, outer_y2)
+                matches = pyramid_match(haystack, needle, threshold, self._match_template,
+                                        mask, self.pyramid, coarse)
+
+            if matches is not None:
+                xs, ys = matches
+            else:
+                # Perform template matching
+                result = self._match_template(haystack, needle, mask)
+
+                if first_only:
+                    # Scan the surface in search order and stop at the first hit
+                    xs, ys = first_on_surface(result, threshold, needle_width, needle_height,
+                                              haystack.shape, search_direction)
+                else:
+                    # Find all matches above threshold
+                    ys, xs = np.nonzero(result >= threshold)
+
+        matched = time.perf_counter()
+        if first_only:
+            # Only the match suppression would accept first matters
+            xs, ys = first_match(xs, ys, needle_width, needle_height,
+                                 haystack.shape, search_direction)
+        else:
+            # Filter matches based on search direction and avoid overlapping
+            xs, ys = suppress_matches(xs, ys, needle_width, needle_height,
+                                      haystack.shape, search_direction)
+
+        # Adjust coordinates to the screen (pixels back to points on Retina)
+        if scale != 1:
+            xs = np.floor(xs / scale).astype(np.int64)
+            ys = np.floor(ys / scale).astype(np.int64)
+        xs, ys = xs + origin_x, ys + origin_y
+
+        if timings is not None:
+            timings.capture += captured - started
+            timings.match += matched - captured
+            timings.filter += time.perf_counter() - matched
+            timings.area += haystack.shape[0] * haystack.shape[1]
+        return xs, ys
+
+    def _find_remembered(self, needle_key, needle, outer_x1=0, outer_y1=0, outer_x2=0, outer_y2=0,
+                         variation=0, search_direction=1, frame=None, mask=None, binary=None,
+                         timings=None):
+        """
+        Find the first match, trying small windows around the needle's previous
+        hits (see lib/location_memory.py) before the whole region
+
+        A window hit is returned directly, so with several instances on screen
+        the remembered one can win over one earlier in search order. With
+        location_memory.strict_order the part of the region preceding the hit
+        is searched too, giving the same first match as a full scan.
+
+        Returns:
+            (xs, ys) arrays holding the first match's top-left screen coordinates, or empty
+        """
+        needle_width, needle_height = self._needle_size(needle)
+        has_region = outer_x2 > outer_x1 and outer_y2 > outer_y1
+
+        # Capture once so a miss in the windows does not cost a second screenshot
+        if frame is None or frame.expired or (has_region and
+                                              not frame.contains(outer_x1, outer_y1, outer_x2, outer_y2)):
+            started = time.perf_counter()
+            haystack, origin_x, origin_y, scale = self._get_haystack(outer_x1, outer_y1,
+                                                                     outer_x2, outer_y2)
+            frame = FrameContext(haystack, origin_x, origin_y, max_age=None, scale=scale)
+            if timings is not None:
+                timings.capture += time.perf_counter() - started
+
+        bounds = (outer_x1, outer_y1, outer_x2, outer_y2) if has_region else frame.region
+        windows = self.location_memory.windows(needle_key, *bounds, needle_width, needle_height)
+
+        for window in windows + [bounds]:
+            xs, ys = self._find_matches(needle, *window, variation, search_direction,
+                                        frame, mask, binary, first_only=True, timings=timings)
+            if not len(xs):
+                continue
+
+            hit = (int(xs[0]), int(ys[0]))
+            if window is not bounds and self.location_memory.strict_order:
+                # Another instance earlier in search order wins over the remembered one
+                preceding = preceding_region(*bounds, *hit, needle_width, needle_height,
+                                             search_direction)
+                earlier_xs, earlier_ys = self._find_matches(needle, *preceding, variation,
+                                                            search_direction, frame, mask, binary,
+                                                            first_only=True, timings=timings)
+                if len(earlier_xs):
+                    xs, ys = earlier_xs, earlier_ys
+
+            first = (int(xs[0]), int(ys[0]))
+            self.location_memory.record(needle_key, *first,
+                                        hit_in_window=window is not bounds and first == hit)
+            return xs, ys
+
+        if windows:
+            self.location_memory.record_miss(needle_key)
+        return xs, ys
+
+    def _match_template(self, haystack, needle, mask=None):
+        """
+        Correlate the needle over the haystack (TM_CCOEFF_NORMED)
+        Masked-out needle pixels are left out of the correlation entirely
+
+        Returns:
+            Result surface (one score per top-left position)
+        """
+        if mask is None:
+            return cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+
+        if needle.ndim == 3:
+            mask = cv2.merge([mask] * needle.shape[2])
+
+        if needle[mask != 0].std() == 0:
+            # A single-color needle has no variance to correlate; score by distance instead
+            result = cv2.matchTemplate(haystack, needle, cv2.TM_SQDIFF_NORMED, mask=mask)
+            return 1.0 - np.nan_to_num(result, nan=1.0, posinf=1.0, neginf=1.0, copy=False)
+
+        result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED, mask=mask)
+        # Flat haystack windows divide by zero under a mask
+        return np.nan_to_num(result, nan=0.0, posinf=0.0, neginf=0.0, copy=False)
+
+    def _get_color_planes(self, haystack, binary, variation, frame,
+                          outer_x1, outer_y1, outer_x2, outer_y2):
+        """
+        Get the haystack's bit plane for each color of a binary needle, shared
+        through the frame when the haystack came from one
+
+        Returns:
+            List of ColorPlane in needle color order
+        """
+        if frame is not None and np.may_share_memory(haystack, frame.frame):
+            return [frame_color_plane(frame, color, variation, outer_x1, outer_y1, outer_x2, outer_y2)
+                    for color in binary.colors]
+        return [color_plane(haystack, color, variation) for color in binary.colors]
+
+    def _get_coarse_haystack(self, haystack, frame, outer_x1, outer_y1, outer_x2, outer_y2):
+        """
+        Get the haystack at the pyramid's coarse level, shared through the frame
+        when the haystack came from one
+
+        Returns:
+            Downscaled haystack
+        """
+        if frame is not None and np.may_share_memory(haystack, frame.frame):
+            return coarse_view(frame, self.pyramid.levels, outer_x1, outer_y1, outer_x2, outer_y2)
+        return downscale(haystack, self.pyramid.levels)
+
+    def _capture(self, region=None):
+        """
+        Take a screenshot with the capture backend
+
+        Args:
+            region: (x, y, width, height) or None for the full screen
+
+        Returns:
+            BGR frame array
+        """
+        haystack, _ = self.capture.grab(region)
+        return haystack
+
+    def _get_haystack(self, outer_x1, outer_y1, outer_x2, outer_y2, frame=None):
+        """
+        Get the search area and the screen position of its top-left pixel
+        Served from the shared frame when it is fresh and covers the area
+
+        Returns:
+            (BGR array, origin_x, origin_y, pixels per screen point)
+        """
+        has_region = outer_x2 > outer_x1 and outer_y2 > outer_y1
+
+        if frame is not None and not frame.expired:
+            if not has_region:
+                return frame.frame, frame.x, frame.y, frame.scale
+            if frame.contains(outer_x1, outer_y1, outer_x2, outer_y2):
+                return (frame.view(outer_x1, outer_y1, outer_x2, outer_y2),
+                        outer_x1, outer_y1, frame.scale)
+
+        if has_region:
+            region = (outer_x1, outer_y1, outer_x2 - outer_x1, outer_y2 - outer_y1)
+            return self._capture(region), outer_x1, outer_y1, self.capture_scale()
+
+        return self._capture(), 0, 0, self.capture_scale()
+
+    def capture_scale(self):
+        """
+        Get the capture's pixels per screen point (2.0 on Retina displays)
+        Detected once from the capture backend and then reused
+
+        Returns:
+            Scale factor
+        """
+        if self.scale is None:
+            try:
+                self.scale = self.capture.scale_factor()
+            except Exception as e:
+                logger.warning(f"Could not detect capture scale, assuming 1x: {e}")
+                self.scale = 1.0
+            if self.scale != 1:
+                logger.info(f"Capture scale is {self.scale}x, matching with pre-scaled needles")
+        return self.scale
+
+    def _needle_size(self, needle):
+        """Needle (width, height) in screen points"""
+        scale = self.capture_scale()
+        height, width = needle.shape[:2]
+        return int(round(width / scale)), int(round(height / scale))
+
+    def capture_frame(self, region=None, max_age=DEFAULT_FRAME_MAX_AGE):
+        """
+        Capture a frame to share between searches and make it the current frame
+
+        Args:
+            region: (x, y, width, height) to capture; defaults to the Roblox window,
+                    or the full screen if the window is unknown
+            max_age: Seconds after which the frame expires (None = only on expire())
+
+        Returns:
+            FrameContext
+        """
+        if region is None:
+            roblox = getattr(self.macro, 'roblox', None)
+            region = roblox.get_roblox_window_region() if roblox else None
+
+        timestamp = time.perf_counter()
+        if region:
+            x, y = region[0], region[1]
+            haystack, capture_time = self.capture.grab(region)
+        else:
+            x = y = 0
+            haystack, capture_time = self.capture.grab()
+
+        if self.capture.reuses_buffers:
+            # The shared frame is used by other searches (and threads) after later
+            # grabs would have overwritten the backend's buffer
+            haystack = haystack.copy()
+
+        self.current_frame = FrameContext(haystack, x, y, timestamp, max_age, capture_time,
+                                          self.capture_scale())
+        return self.current_frame
+
+    def get_frame(self, region=None, max_age=DEFAULT_FRAME_MAX_AGE):
+        """
+        Get the current shared frame, capturing a new one if it expired
+
+        Args:
+            region: (x, y, width, height) the frame must cover (see capture_frame)
+            max_age: Max age for a newly captured frame
+
+        Returns:
+            FrameContext
+        """
+        frame = self.current_frame
+        if frame is not None and not frame.expired:
+            if region is None:
+                return frame
+            x, y, width, height = region
+            if frame.contains(x, y, x + width, y + height):
+                return frame
+
+        return self.capture_frame(region, max_age)
+
+    def expire_frame(self):
+        """Expire the current shared frame (call after anything changes the screen)"""
+        if self.current_frame is not None:
+            self.current_frame.expire()
+            self.current_frame = None
+
     def _filter_matches(self, matches, needle_width, needle_height, search_direction, haystack_shape):
         """
         Filter matches to avoid overlapping and respect search direction
@@ -121,58 +493,32 @@ class ImageSearch:
         if not matches:
             return []
 
-        filtered = []
-        haystack_height, haystack_width = haystack_shape[:2]
-
-        # Sort matches based on search direction
-        if search_direction == 1:  # Top-left to bottom-right
-            matches.sort(key=lambda m: (m[1], m[0]))  # Sort by y, then x
-        elif search_direction == 2:  # Bottom-left to top-right
-            matches.sort(key=lambda m: (-m[1], m[0]))  # Sort by -y, then x
-        elif search_direction == 3:  # Bottom-right to top-left
-            matches.sort(key=lambda m: (-m[1], -m[0]))  # Sort by -y, then -x
-        elif search_direction == 4:  # Top-right to bottom-left
-            matches.sort(key=lambda m: (m[1], -m[0]))  # Sort by y, then -x
-        # Add more directions as needed...
-
-        for match in matches:
-            x, y = match
-
-            # Check if this match overlaps with any previously found match
-            overlaps = False
-            for existing_x, existing_y in filtered:
-                if (abs(x - existing_x) < needle_width and
-                    abs(y - existing_y) < needle_height):
-                    overlaps = True
-                    break
-
-            if not overlaps:
-                # Ensure match is within bounds
-                if (0 <= x < haystack_width - needle_width and
-                    0 <= y < haystack_height - needle_height):
-                    filtered.append((x, y))
-
-        return filtered
-
-    def imagesearch_in_region(self, needle_path, x1, y1, x2, y2, variation=0):
+        xs, ys = np.asarray(matches, dtype=np.int64).reshape(-1, 2).T
+        xs, ys = suppress_matches(xs, ys, needle_width, needle_height,
+                                  haystack_shape, search_direction)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def imagesearch_in_region(self, needle_path, x1, y1, x2, y2, variation=0, frame=None):
         """
         Simple image search in a specific region
         Returns: (x, y) of first match or None
         """
         output_list = []
-        result = self.image_search(needle_path, output_list, x1, y1, x2, y2, variation)
+        result = self.image_search(needle_path, output_list, x1, y1, x2, y2, variation,
+                                   frame=frame, first_only=True)
 
         if result > 0 and output_list:
             return output_list[0]
         return None
 
-    def imagesearch_on_screen(self, needle_path, variation=0):
+    def imagesearch_on_screen(self, needle_path, variation=0, frame=None):
         """
         Simple image search on entire screen
         Returns: (x, y) of first match or None
         """
         output_list = []
-        result = self.image_search(needle_path, output_list, variation=variation)
+        result = self.image_search(needle_path, output_list, variation=variation, frame=frame,
+                                   first_only=True)
 
         if result > 0 and output_list:
             return output_list[0]
@@ -183,25 +529,57 @@ class ImageSearch:
         Wait for an image to appear on screen
         Returns: (x, y) of match or None if timeout
         """
+        if region:
+            x1, y1, x2, y2 = region
+            return self._wait_for_change(
+                lambda frame: self.imagesearch_in_region(needle_path, x1, y1, x2, y2,
+                                                         variation, frame=frame),
+                timeout, region)
+
+        return self._wait_for_change(
+            lambda frame: self.imagesearch_on_screen(needle_path, variation, frame=frame),
+            timeout, region)
+
+    def _wait_for_change(self, search, timeout, region=None, gate=None):
+        """
+        Poll the screen until search(frame) returns a match
+        The search only re-runs when the region changed since the last search
+        (or that search is gate.force_interval old), and polling backs off while
+        it stays static (see lib/change_gate.py)
+
+        Args:
+            search: Function taking a FrameContext and returning a match or None
+            timeout: Seconds to wait
+            region: (x1, y1, x2, y2) to watch, or None for the full screen
+            gate: ChangeGate to use (defaults to a new one)
+
+        Returns:
+            The first match search returns, or None if timeout
+        """
+        gate = gate if gate is not None else ChangeGate()
         start_time = time.time()
 
-        while time.time() - start_time < timeout:
+        while True:
             if region:
                 x1, y1, x2, y2 = region
-                result = self.imagesearch_in_region(needle_path, x1, y1, x2, y2, variation)
+                frame = FrameContext(self._capture((x1, y1, x2 - x1, y2 - y1)), x1, y1,
+                                     max_age=None, scale=self.capture_scale())
             else:
-                result = self.imagesearch_on_screen(needle_path, variation)
-
-            if result:
-                return result
+                frame = FrameContext(self._capture(), max_age=None, scale=self.capture_scale())
 
-            time.sleep(0.5)  # Check every 500ms
+            if gate.check(frame.frame):
+                result = search(frame)
+                if result:
+                    return result
 
-        return None
+            remaining = timeout - (time.time() - start_time)
+            if remaining <= 0:
+                return None
+            time.sleep(min(gate.interval, remaining))
 
     def search_bitmap(self, bitmap_key, output_list=None, outer_x1=0, outer_y1=0,
                      outer_x2=0, outer_y2=0, variation=0, trans_color=None,
-                     search_direction=1, center_results=False):
+                     search_direction=1, center_results=False, frame=None, first_only=False):
         """
         Search for a bitmap by key within the screen
 
@@ -210,9 +588,11 @@ class ImageSearch:
             output_list: List to store found coordinates (x, y)
             outer_x1, outer_y1, outer_x2, outer_y2: Search region bounds
             variation: Color variation tolerance (0-255)
-            trans_color: Transparent color (RGB)
+            trans_color: Extra transparent color (0xRRGGBB); alpha transparency is always masked
             search_direction: Search direction (1-8)
             center_results: Whether to return center coordinates
+            frame: Shared FrameContext to search instead of taking a new screenshot
+            first_only: Stop at the first match in search order (returns 0 or 1)
 
         Returns:
             Number of matches found (negative = error)
@@ -222,28 +602,33 @@ class ImageSearch:
                 logger.error(f"Bitmap key not found: {bitmap_key}")
                 return -1
 
-            # Get PIL image from bitmap
-            needle_pil = get_bitmap_image(bitmap_key)
-
-            # Convert PIL to OpenCV format
-            needle = cv2.cvtColor(np.array(needle_pil), cv2.COLOR_RGB2BGR)
+            # Get decoded needle and its mask (built once, then served from the cache).
+            # The mask covers the bitmap's own transparency, so trans_color is optional
+            # Variants are pre-scaled to the capture's pixel density (Retina)
+            scale = self.capture_scale()
+            needle = self.needle_cache.get(bitmap_key, COLOR_BGR, scale=scale)
+            mask = self.needle_cache.get_mask(bitmap_key, trans_color, scale)
+            # 1-bit and two-color bitmaps are matched as bit planes
+            binary = self.needle_cache.get_binary(bitmap_key, trans_color, scale)
 
             # Use existing image search logic
             return self._search_image(needle, output_list, outer_x1, outer_y1,
-                                    outer_x2, outer_y2, variation, trans_color,
-                                    search_direction, center_results)
+                                    outer_x2, outer_y2, variation,
+                                    search_direction, center_results, frame, mask, binary,
+                                    first_only, bitmap_key)
 
         except Exception as e:
             logger.error(f"Error searching bitmap {bitmap_key}: {e}")
             return -3
 
-    def search_bitmap_on_screen(self, bitmap_key, variation=0):
+    def search_bitmap_on_screen(self, bitmap_key, variation=0, frame=None):
         """
         Simple bitmap search on entire screen
         Returns: (x, y) of first match or None
         """
         output_list = []
-        result = self.search_bitmap(bitmap_key, output_list, variation=variation)
+        result = self.search_bitmap(bitmap_key, output_list, variation=variation, frame=frame,
+                                    first_only=True)
 
         if result > 0 and output_list:
             return output_list[0]
@@ -254,37 +639,210 @@ class ImageSearch:
         Wait for a bitmap to appear on screen
         Returns: (x, y) of match or None if timeout
         """
-        start_time = time.time()
+        if region:
+            x1, y1, x2, y2 = region
 
-        while time.time() - start_time < timeout:
-            if region:
+            def search(frame):
                 output_list = []
-                x1, y1, x2, y2 = region
-                result = self.search_bitmap(bitmap_key, output_list, x1, y1, x2, y2, variation)
-                if result > 0 and output_list:
-                    return output_list[0]
+                result = self.search_bitmap(bitmap_key, output_list, x1, y1, x2, y2, variation,
+                                            frame=frame, first_only=True)
+                return output_list[0] if result > 0 and output_list else None
+
+            return self._wait_for_change(search, timeout, region)
+
+        return self._wait_for_change(
+            lambda frame: self.search_bitmap_on_screen(bitmap_key, variation, frame=frame),
+            timeout, region)
+
+    def _get_points(self, outer_x1=0, outer_y1=0, outer_x2=0, outer_y2=0, frame=None):
+        """
+        Get an area with one pixel per screen point, and the screen position of its top-left pixel
+
+        Returns:
+            (BGR array, origin_x, origin_y)
+        """
+        haystack, origin_x, origin_y, scale = self._get_haystack(outer_x1, outer_y1,
+                                                                 outer_x2, outer_y2, frame)
+        return point_grid(haystack, scale), origin_x, origin_y
+
+    def pixel_get_color(self, x, y, frame=None):
+        """
+        Get the color of a screen pixel
+        Equivalent to PixelGetColor
+
+        Args:
+            x, y: Screen coordinates
+            frame: Shared FrameContext to read instead of taking a new screenshot
+
+        Returns:
+            Color as 0xRRGGBB, or None if the pixel could not be read
+        """
+        try:
+            image, origin_x, origin_y = self._get_points(x, y, x + 1, y + 1, frame)
+            return bgr_to_rgb(image[y - origin_y, x - origin_x])
+
+        except Exception as e:
+            logger.error(f"Pixel read error at ({x}, {y}): {e}")
+            return None
+
+    def pixel_check(self, points, colors, variation=0, frame=None):
+        """
+        Check many screen pixels against expected colors in one pass
+        (one capture covering every point, or the shared frame)
+
+        Args:
+            points: List of (x, y) screen coordinates
+            colors: One 0xRRGGBB color for every point, or a list with one per point
+            variation: Per-channel color tolerance (0-255)
+            frame: Shared FrameContext to read instead of taking a new screenshot
+
+        Returns:
+            Bool array, True where the pixel matches (None on error)
+        """
+        try:
+            points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+            if len(points) == 0:
+                return np.zeros(0, dtype=bool)
+
+            xs, ys = points[:, 0], points[:, 1]
+            image, origin_x, origin_y = self._get_points(int(xs.min()), int(ys.min()),
+                                                         int(xs.max()) + 1, int(ys.max()) + 1, frame)
+
+            if isinstance(colors, int):
+                expected = rgb_to_bgr(colors)
             else:
-                result = self.search_bitmap_on_screen(bitmap_key, variation)
-                if result:
-                    return result
+                expected = np.array([rgb_to_bgr(color) for color in colors], dtype=np.int16)
+                if len(expected) != len(points):
+                    raise ValueError(f"{len(points)} points but {len(expected)} colors")
 
-            time.sleep(0.5)  # Check every 500ms
+            return match_colors(image[ys - origin_y, xs - origin_x], expected, variation)
 
-        return None
+        except Exception as e:
+            logger.error(f"Pixel check error: {e}")
+            return None
+
+    def pixel_search(self, color, output_list=None, outer_x1=0, outer_y1=0,
+                     outer_x2=0, outer_y2=0, variation=0, search_direction=1,
+                     frame=None, first_only=True):
+        """
+        Search for pixels of a color within the screen
+        Equivalent to PixelSearch (which stops at the first pixel; pass first_only=False for all)
+
+        Args:
+            color: Color to find (0xRRGGBB)
+            output_list: List to store found coordinates (x, y)
+            outer_x1, outer_y1, outer_x2, outer_y2: Search region bounds
+            variation: Per-channel color tolerance (0-255)
+            search_direction: Search direction (1-8)
+            frame: Shared FrameContext to search instead of taking a new screenshot
+            first_only: Stop at the first pixel in search order (returns 0 or 1)
+
+        Returns:
+            Number of pixels found (negative = error)
+        """
+        try:
+            image, origin_x, origin_y = self._get_points(outer_x1, outer_y1, outer_x2, outer_y2, frame)
+            xs, ys = find_color(image, color, variation, search_direction, first_only)
+
+            if output_list is not None:
+                output_list.clear()
+                output_list.extend(zip((xs + origin_x).tolist(), (ys + origin_y).tolist()))
+
+            return len(xs)
+
+        except Exception as e:
+            logger.error(f"Pixel search error: {e}")
+            return -3
+
+    def _get_executor(self):
+        """Get the persistent batch search thread pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="image_search")
+        return self._executor
+
+    def shutdown(self):
+        """Stop the batch search thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run_job(self, index, job, frame, first_only=False):
+        """Run one SearchJob against the shared frame"""
+        output_list = []
+        x1, y1, x2, y2 = job.region if job.region else (0, 0, 0, 0)
+
+        if bitmap_exists(job.needle):
+            count = self.search_bitmap(job.needle, output_list, x1, y1, x2, y2, job.variation,
+                                       job.trans_color, job.search_direction, frame=frame,
+                                       first_only=first_only)
+        else:
+            count = self.image_search(job.needle, output_list, x1, y1, x2, y2, job.variation,
+                                      job.trans_color, job.search_direction, frame=frame,
+                                      first_only=first_only)
+
+        return SearchResult(index, job, count, list(output_list))
+
+    def batch_search(self, jobs, frame=None, first_hit=True):
+        """
+        Match several needles against one frame on the thread pool
+        cv2.matchTemplate releases the GIL, so needles are matched in parallel
+
+        Args:
+            jobs: List of SearchJob (or tuples in SearchJob field order)
+            frame: Shared FrameContext; if None, one capture covering every job is taken
+            first_hit: If True, return as soon as the highest-priority job that
+                       matched is known and cancel the rest (each job stops at its
+                       first match); if False, collect all
+
+        Returns:
+            List of SearchResult in priority order (just the winning one, or empty,
+            when first_hit is True)
+        """
+        jobs = [job if isinstance(job, SearchJob) else SearchJob(*job) for job in jobs]
+        if not jobs:
+            return []
+
+        if frame is None:
+            region = union_region(jobs)
+            x, y = (region[0], region[1]) if region else (0, 0)
+            frame = FrameContext(self._capture(region), x, y, max_age=None,
+                                 scale=self.capture_scale())
+
+        order = sorted(range(len(jobs)), key=lambda i: (jobs[i].priority, i))
+        executor = self._get_executor()
+        futures = [(i, executor.submit(self._run_job, i, jobs[i], frame, first_hit)) for i in order]
+
+        results = []
+        for position, (i, future) in enumerate(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Batch search job {jobs[i].needle} failed: {e}")
+                result = SearchResult(i, jobs[i], -3, [])
+
+            if first_hit:
+                if result.found:
+                    # Every higher-priority job already missed, so this one wins
+                    for _, pending in futures[position + 1:]:
+                        pending.cancel()
+                    return [result]
+            else:
+                results.append(result)
+
+        return results
 
     def multi_image_search(self, needle_paths, region=None, variation=0):
         """
         Search for the first matching image from a list
         Returns: (index, x, y) or None
         """
-        for i, needle_path in enumerate(needle_paths):
-            if region:
-                x1, y1, x2, y2 = region
-                result = self.imagesearch_in_region(needle_path, x1, y1, x2, y2, variation)
-            else:
-                result = self.imagesearch_on_screen(needle_path, variation)
+        # Capture once and check every needle against the same frame in parallel
+        jobs = [SearchJob(needle_path, region, variation) for needle_path in needle_paths]
+        results = self.batch_search(jobs, first_hit=True)
 
-            if result:
-                return (i, result[0], result[1])
+        if results:
+            x, y = results[0].matches[0]
+            return (results[0].index, x, y)
 
         return None
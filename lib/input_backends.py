@@ -0,0 +1,238 @@
+"""
+Keyboard and mouse input backends
+Send pre-built batches of input events with explicit delays and no implicit pause
+"""
+
+import logging
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+from .precision_timer import get_timer
+
+logger = logging.getLogger(__name__)
+
+KEY_DOWN = "key_down"
+KEY_UP = "key_up"
+KEY_PRESS = "key_press"
+MOUSE_MOVE = "mouse_move"
+MOUSE_DOWN = "mouse_down"
+MOUSE_UP = "mouse_up"
+CLICK = "click"
+SCROLL = "scroll"
+
+
+class InputEvent(NamedTuple):
+    """One input event and how long to wait after it"""
+    kind: str
+    key: Optional[str] = None       # Key name for key events
+    x: Optional[int] = None         # Screen position for mouse events (None = current position)
+    y: Optional[int] = None
+    button: str = "left"
+    amount: int = 0                 # Scroll clicks (positive = up)
+    delay: float = 0.0              # Milliseconds to wait after the event
+
+
+def key_down(key: str, delay: float = 0.0) -> InputEvent:
+    return InputEvent(KEY_DOWN, key, delay=delay)
+
+
+def key_up(key: str, delay: float = 0.0) -> InputEvent:
+    return InputEvent(KEY_UP, key, delay=delay)
+
+
+def key_press(key: str, delay: float = 0.0) -> InputEvent:
+    return InputEvent(KEY_PRESS, key, delay=delay)
+
+
+def mouse_move(x: int, y: int, delay: float = 0.0) -> InputEvent:
+    return InputEvent(MOUSE_MOVE, x=x, y=y, delay=delay)
+
+
+def mouse_down(button: str = "left", delay: float = 0.0) -> InputEvent:
+    return InputEvent(MOUSE_DOWN, button=button, delay=delay)
+
+
+def mouse_up(button: str = "left", delay: float = 0.0) -> InputEvent:
+    return InputEvent(MOUSE_UP, button=button, delay=delay)
+
+
+def click(x: Optional[int] = None, y: Optional[int] = None, button: str = "left",
+          delay: float = 0.0) -> InputEvent:
+    return InputEvent(CLICK, x=x, y=y, button=button, delay=delay)
+
+
+def scroll(amount: int, x: Optional[int] = None, y: Optional[int] = None,
+           delay: float = 0.0) -> InputEvent:
+    return InputEvent(SCROLL, x=x, y=y, amount=amount, delay=delay)
+
+
+def text_events(text: str, delay: float = 0.0) -> List[InputEvent]:
+    """Press every character of a string in turn (like pyautogui.typewrite)"""
+    return [key_press(char, delay) for char in text]
+
+
+class InputBackend:
+    """
+    Base class for input backends
+
+    send() dispatches a batch in order and waits each event's delay on an
+    absolute schedule from the start of the batch, so a slow event does not
+    stretch the rest of it. The lock is held only while dispatching, so other
+    threads can send input during a batch's waits; events with no delay
+    between them are never split by another thread.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def send(self, events: Iterable[InputEvent], stop_event=None) -> int:
+        """
+        Send a batch of input events
+
+        Args:
+            events: InputEvents in order
+            stop_event: Optional threading.Event; the batch stops before the
+                        next event once it is set (waits end as soon as it is)
+
+        Returns:
+            Number of events sent
+        """
+        timer = get_timer()
+        events = iter(events)
+        count = 0
+
+        # Batch start plus the delays so far; never moved to "now", so dispatch
+        # time and late wake-ups are absorbed by the following waits
+        deadline = time.perf_counter()
+        while True:
+            delay = 0.0
+            # Dispatch up to the next delay under the lock, then wait without it
+            with self._lock:
+                for event in events:
+                    if stop_event is not None and stop_event.is_set():
+                        return count
+                    self._dispatch(event)
+                    count += 1
+                    if event.delay > 0:
+                        delay = event.delay
+                        break
+
+            if delay <= 0:
+                return count
+            deadline += delay / 1000.0
+            if not timer.sleep_until(deadline, stop_event):
+                return count
+
+    def _dispatch(self, event: InputEvent):
+        """Perform one event"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend"""
+        pass
+
+
+class PyAutoGUIInput(InputBackend):
+    """Sends input with pyautogui, skipping its PAUSE after every call"""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        super().__init__()
+        # Imported here so headless machines can use the recording backend
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def _dispatch(self, event: InputEvent):
+        pyautogui = self._pyautogui
+        kind = event.kind
+
+        if kind == KEY_DOWN:
+            pyautogui.keyDown(event.key, _pause=False)
+        elif kind == KEY_UP:
+            pyautogui.keyUp(event.key, _pause=False)
+        elif kind == KEY_PRESS:
+            pyautogui.press(event.key, _pause=False)
+        elif kind == MOUSE_MOVE:
+            pyautogui.moveTo(event.x, event.y, _pause=False)
+        elif kind == MOUSE_DOWN:
+            pyautogui.mouseDown(button=event.button, _pause=False)
+        elif kind == MOUSE_UP:
+            pyautogui.mouseUp(button=event.button, _pause=False)
+        elif kind == CLICK:
+            pyautogui.click(event.x, event.y, button=event.button, _pause=False)
+        elif kind == SCROLL:
+            pyautogui.scroll(event.amount, event.x, event.y, _pause=False)
+        else:
+            raise ValueError(f"Unknown input event: {kind}")
+
+
+class RecordedEvent(NamedTuple):
+    """An event a RecordingInput received, with its time.perf_counter() timestamp"""
+    time: float
+    event: InputEvent
+
+
+class RecordingInput(InputBackend):
+    """
+    Records events in memory with timestamps instead of sending them
+    Lets input timing and throughput be tested without a display
+    """
+
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.events: List[RecordedEvent] = []
+        # Keys and buttons currently held down
+        self.held = set()
+
+    def _dispatch(self, event: InputEvent):
+        self.events.append(RecordedEvent(time.perf_counter(), event))
+
+        if event.kind == KEY_DOWN:
+            self.held.add(event.key)
+        elif event.kind == KEY_UP:
+            self.held.discard(event.key)
+        elif event.kind == MOUSE_DOWN:
+            self.held.add(f"mouse_{event.button}")
+        elif event.kind == MOUSE_UP:
+            self.held.discard(f"mouse_{event.button}")
+
+    def intervals(self) -> List[float]:
+        """Milliseconds between consecutive recorded events"""
+        return [(after.time - before.time) * 1000.0
+                for before, after in zip(self.events, self.events[1:])]
+
+    def clear(self):
+        """Forget the recorded events and held keys"""
+        self.events.clear()
+        self.held.clear()
+
+
+def create_input_backend(name: str = "pyautogui", **kwargs) -> InputBackend:
+    """
+    Create an input backend by name
+
+    Args:
+        name: "pyautogui" or "recording"
+        **kwargs: Backend-specific arguments
+
+    Returns:
+        InputBackend instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backends = {
+        'pyautogui': PyAutoGUIInput,
+        'recording': RecordingInput,
+    }
+
+    if name not in backends:
+        raise ValueError(f"Unknown input backend: {name}. Available backends: {list(backends.keys())}")
+
+    return backends[name](**kwargs)
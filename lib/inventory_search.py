@@ -6,6 +6,7 @@ Equivalent to lib/nm_InventorySearch.ahk
 import logging
 from pathlib import Path
 from .image_search import ImageSearch
+from .input_backends import mouse_move, scroll
 from .roblox import RobloxController
 
 logger = logging.getLogger(__name__)
@@ -148,9 +149,7 @@ class InventorySearch:
                 center_x = cache['inventory_bounds'][0] + cache['inventory_bounds'][2] // 2
                 center_y = cache['inventory_bounds'][1] + cache['inventory_bounds'][3] // 2
 
-                import pyautogui
-                pyautogui.moveTo(center_x, center_y)
-                pyautogui.scroll(scroll_amount)
+                self.macro.input.send([mouse_move(center_x, center_y), scroll(scroll_amount)])
 
             return True
 
@@ -0,0 +1,197 @@
+"""
+Spatial prior for image search
+Remembers where each needle was found so searches can look there first
+"""
+
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .json_utils import JSON
+
+logger = logging.getLogger(__name__)
+
+MEMORY_VERSION = 1
+# Pixels searched around the needle on each side of a remembered position
+WINDOW_PADDING = 16
+# Heatmap cell size (pixels)
+HEATMAP_CELL = 64
+# Heatmap cells tried (best first) after the window around the last hit
+HEATMAP_WINDOWS = 2
+# Cells kept per needle when saving
+MAX_HEATMAP_CELLS = 32
+
+
+class LocationMemory:
+    """Per-needle last hit and heatmap of hit positions, optionally persisted as JSON"""
+
+    def __init__(self, path=None, padding: int = WINDOW_PADDING,
+                 cell_size: int = HEATMAP_CELL, heatmap_windows: int = HEATMAP_WINDOWS,
+                 strict_order: bool = False):
+        """
+        Args:
+            path: JSON file to load from and save to (None = this session only)
+            padding: Pixels searched around the needle at a remembered position
+            cell_size: Heatmap cell size in pixels
+            heatmap_windows: Heatmap cells tried after the last hit window
+            strict_order: Also search the part of the region before a window hit, so a
+                          needle shown more than once gives the same first match as a full
+                          scan in search_direction order (costs up to a full scan per hit)
+        """
+        self.path = Path(path) if path is not None else None
+        self.padding = padding
+        self.cell_size = cell_size
+        self.heatmap_windows = heatmap_windows
+        self.strict_order = strict_order
+
+        self._last: Dict[str, Tuple[int, int]] = {}
+        self._heat: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+        # Counters for logging
+        self.window_hits = 0
+        self.full_hits = 0
+        self.misses = 0
+
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def windows(self, key: str, x1: int, y1: int, x2: int, y2: int,
+                needle_width: int, needle_height: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Get the small regions to search first, most likely first
+
+        Args:
+            key: Bitmap key or needle path
+            x1, y1, x2, y2: Region being searched (windows are clipped to it)
+            needle_width, needle_height: Needle size
+
+        Returns:
+            List of (x1, y1, x2, y2) windows (empty if the needle was never found)
+        """
+        with self._lock:
+            last = self._last.get(key)
+            cells = [cell for cell, _ in self._heat.get(key, Counter()).most_common(self.heatmap_windows + 1)]
+
+        # A hit at top-left (x, y) lies in a window spanning the needle plus padding
+        positions = []
+        if last is not None:
+            positions.append((last[0], last[1], last[0], last[1]))
+        for cell_x, cell_y in cells:
+            left, top = cell_x * self.cell_size, cell_y * self.cell_size
+            positions.append((left, top, left + self.cell_size - 1, top + self.cell_size - 1))
+
+        windows = []
+        for left, top, right, bottom in positions:
+            window = (max(x1, left - self.padding),
+                      max(y1, top - self.padding),
+                      min(x2, right + needle_width + self.padding),
+                      min(y2, bottom + needle_height + self.padding))
+
+            # Skip windows the needle cannot fit in, or that an earlier window already covers
+            if window[2] - window[0] <= needle_width or window[3] - window[1] <= needle_height:
+                continue
+            if any(w[0] <= window[0] and w[1] <= window[1] and w[2] >= window[2] and w[3] >= window[3]
+                   for w in windows):
+                continue
+
+            windows.append(window)
+            if len(windows) > self.heatmap_windows:
+                break
+
+        return windows
+
+    def record(self, key: str, x: int, y: int, hit_in_window: bool = False):
+        """
+        Remember a hit
+
+        Args:
+            key: Bitmap key or needle path
+            x, y: Top-left screen coordinates of the match
+            hit_in_window: Whether it was found in one of the remembered windows
+        """
+        with self._lock:
+            self._last[key] = (x, y)
+            self._heat.setdefault(key, Counter())[(x // self.cell_size, y // self.cell_size)] += 1
+            if hit_in_window:
+                self.window_hits += 1
+            else:
+                self.full_hits += 1
+
+    def record_miss(self, key: str):
+        """Count a search that had remembered windows but found nothing anywhere"""
+        with self._lock:
+            self.misses += 1
+
+    def forget(self, key: Optional[str] = None):
+        """Drop what is known about one needle, or about every needle"""
+        with self._lock:
+            if key is None:
+                self._last.clear()
+                self._heat.clear()
+            else:
+                self._last.pop(key, None)
+                self._heat.pop(key, None)
+
+    def load(self) -> bool:
+        """
+        Load the heatmaps (and last hits) from the JSON file
+
+        Returns:
+            True if loaded
+        """
+        try:
+            data = JSON.load(str(self.path))
+            if data.get('version') != MEMORY_VERSION or data.get('cell_size') != self.cell_size:
+                logger.info(f"Ignoring location memory with different format: {self.path}")
+                return False
+
+            with self._lock:
+                for key, entry in data.get('needles', {}).items():
+                    if entry.get('last'):
+                        self._last[key] = tuple(entry['last'])
+                    self._heat[key] = Counter({tuple(int(v) for v in cell.split(',')): count
+                                               for cell, count in entry.get('heat', {}).items()})
+            return True
+
+        except Exception as e:
+            logger.warning(f"Could not load location memory: {e}")
+            return False
+
+    def save(self) -> bool:
+        """
+        Save the heatmaps (and last hits) to the JSON file
+
+        Returns:
+            True if saved
+        """
+        if self.path is None:
+            return False
+
+        with self._lock:
+            needles = {}
+            for key in set(self._last) | set(self._heat):
+                heat = self._heat.get(key, Counter()).most_common(MAX_HEATMAP_CELLS)
+                needles[key] = {
+                    'last': list(self._last[key]) if key in self._last else None,
+                    'heat': {f"{cell[0]},{cell[1]}": count for cell, count in heat},
+                }
+
+        try:
+            JSON.dump({'version': MEMORY_VERSION, 'cell_size': self.cell_size, 'needles': needles},
+                      str(self.path))
+            return True
+        except Exception as e:
+            logger.warning(f"Could not save location memory: {e}")
+            return False
+
+    def log_stats(self, level: int = logging.INFO):
+        """Log how often remembered windows paid off"""
+        with self._lock:
+            hits = self.window_hits + self.full_hits
+            rate = self.window_hits / hits if hits else 0.0
+            logger.log(level, f"Location memory: {len(self._last)} needles, "
+                              f"{self.window_hits} window hits, {self.full_hits} full-region hits, "
+                              f"{self.misses} misses ({rate:.1%} found near a previous hit)")
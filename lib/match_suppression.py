@@ -0,0 +1,259 @@
+"""
+Vectorized match suppression for image search
+Orders template-match candidates and drops overlapping ones in NumPy
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Search direction -> (primary axis, primary sign, secondary axis, secondary sign)
+# Axis 0 = x, 1 = y; sign 1 = ascending, -1 = descending
+SEARCH_DIRECTION_ORDER = {
+    1: (1, 1, 0, 1),     # Top-left to bottom-right
+    2: (1, -1, 0, 1),    # Bottom-left to top-right
+    3: (1, -1, 0, -1),   # Bottom-right to top-left
+    4: (1, 1, 0, -1),    # Top-right to bottom-left
+    5: (0, 1, 1, 1),     # Top-left to bottom-right, column by column
+    6: (0, 1, 1, -1),    # Bottom-left to top-right, column by column
+    7: (0, -1, 1, -1),   # Bottom-right to top-left, column by column
+    8: (0, -1, 1, 1),    # Top-right to bottom-left, column by column
+}
+
+# Result surface rows (or columns) thresholded at a time when looking for the first match
+SCAN_CHUNK = 64
+
+
+def order_matches(xs: np.ndarray, ys: np.ndarray, search_direction: int = 1,
+                  scores: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+    """
+    Get the order in which candidates should be considered
+
+    Args:
+        xs, ys: Candidate coordinates
+        search_direction: Search direction (1-8)
+        scores: Optional match scores; if given, best score goes first and the
+                search direction only breaks ties
+
+    Returns:
+        Index array, or None to keep the input order
+    """
+    axes = (xs, ys)
+    direction = SEARCH_DIRECTION_ORDER.get(search_direction)
+
+    keys = []
+    if direction is not None:
+        primary_axis, primary_sign, secondary_axis, secondary_sign = direction
+        # np.lexsort sorts by the last key first
+        keys = [secondary_sign * axes[secondary_axis], primary_sign * axes[primary_axis]]
+
+    if scores is not None:
+        keys.append(-scores)
+
+    if not keys:
+        return None
+    return np.lexsort(keys)
+
+
+def preceding_region(x1: int, y1: int, x2: int, y2: int, x: int, y: int,
+                     needle_width: int, needle_height: int,
+                     search_direction: int = 1) -> Tuple[int, int, int, int]:
+    """
+    Get the part of a region holding every match position that comes before
+    (or at) a given match in search order
+
+    Args:
+        x1, y1, x2, y2: Searched region
+        x, y: Top-left of a match in the region
+        needle_width, needle_height: Needle size
+        search_direction: Search direction (1-8)
+
+    Returns:
+        (x1, y1, x2, y2) sub-region (the whole region for an unknown direction)
+    """
+    direction = SEARCH_DIRECTION_ORDER.get(search_direction)
+    if direction is None:
+        return x1, y1, x2, y2
+
+    primary_axis, primary_sign = direction[0], direction[1]
+    if primary_axis == 1:
+        return (x1, y1, x2, min(y2, y + needle_height)) if primary_sign > 0 else (x1, y, x2, y2)
+    return (x1, y1, min(x2, x + needle_width), y2) if primary_sign > 0 else (x, y1, x2, y2)
+
+
+def suppress_matches(xs: np.ndarray, ys: np.ndarray, needle_width: int, needle_height: int,
+                     haystack_shape, search_direction: int = 1,
+                     scores: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Greedy non-maximum suppression over template-match candidates
+
+    Candidates are visited in search order; each one is accepted unless it
+    overlaps (closer than the needle size on both axes) a previously accepted
+    match. Matches too close to the right/bottom edge are never accepted.
+
+    Args:
+        xs, ys: Candidate coordinates (e.g. from np.nonzero on the result surface)
+        needle_width, needle_height: Needle size
+        haystack_shape: Shape of the searched image
+        search_direction: Search direction (1-8)
+        scores: Optional match scores to order by instead of position
+
+    Returns:
+        (xs, ys) arrays of accepted matches, in search order
+    """
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    haystack_height, haystack_width = haystack_shape[:2]
+
+    # Out-of-bounds candidates are never accepted, so they can never suppress anything either
+    in_bounds = ((xs >= 0) & (xs < haystack_width - needle_width) &
+                 (ys >= 0) & (ys < haystack_height - needle_height))
+    xs = xs[in_bounds]
+    ys = ys[in_bounds]
+    if scores is not None:
+        scores = np.asarray(scores)[in_bounds]
+
+    count = len(xs)
+    if count == 0:
+        return xs, ys
+
+    order = order_matches(xs, ys, search_direction, scores)
+    if order is not None:
+        xs = xs[order]
+        ys = ys[order]
+
+    # When sorted by position along the primary axis, everything an accepted
+    # match can overlap lies in a contiguous window right after it
+    direction = SEARCH_DIRECTION_ORDER.get(search_direction)
+    primary = None
+    if scores is None and direction is not None:
+        primary_axis, primary_sign = direction[:2]
+        primary = primary_sign * (xs, ys)[primary_axis]
+        primary_extent = (needle_width, needle_height)[primary_axis]
+
+    alive = np.ones(count, dtype=bool)
+    accepted = []
+    index = 0
+
+    while index < count:
+        accepted.append(index)
+        x, y = xs[index], ys[index]
+
+        if primary is not None:
+            end = int(np.searchsorted(primary, primary[index] + primary_extent, side='left'))
+        else:
+            end = count
+
+        window = slice(index + 1, end)
+        alive[window] &= ~((np.abs(xs[window] - x) < needle_width) &
+                           (np.abs(ys[window] - y) < needle_height))
+
+        # Next surviving candidate; everything past the window is still alive
+        remaining = alive[window]
+        if remaining.any():
+            index = index + 1 + int(np.argmax(remaining))
+        elif primary is not None:
+            index = end
+        else:
+            break
+
+    accepted = np.asarray(accepted, dtype=np.int64)
+    return xs[accepted], ys[accepted]
+
+
+def first_match(xs: np.ndarray, ys: np.ndarray, needle_width: int, needle_height: int,
+                haystack_shape, search_direction: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the match suppress_matches would accept first, without sorting or
+    suppressing the rest
+
+    Args:
+        xs, ys: Candidate coordinates
+        needle_width, needle_height: Needle size
+        haystack_shape: Shape of the searched image
+        search_direction: Search direction (1-8)
+
+    Returns:
+        (xs, ys) arrays holding the first match, or empty if none is in bounds
+    """
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    haystack_height, haystack_width = haystack_shape[:2]
+
+    in_bounds = ((xs >= 0) & (xs < haystack_width - needle_width) &
+                 (ys >= 0) & (ys < haystack_height - needle_height))
+    xs = xs[in_bounds]
+    ys = ys[in_bounds]
+    if len(xs) == 0:
+        return xs, ys
+
+    direction = SEARCH_DIRECTION_ORDER.get(search_direction)
+    if direction is None:
+        index = 0
+    else:
+        primary_axis, primary_sign, secondary_axis, secondary_sign = direction
+        primary = primary_sign * (xs, ys)[primary_axis]
+        secondary = secondary_sign * (xs, ys)[secondary_axis]
+        # Positions are unique, so the best primary line has one best secondary position
+        candidates = np.flatnonzero(primary == primary.min())
+        index = candidates[np.argmin(secondary[candidates])]
+
+    return xs[index:index + 1], ys[index:index + 1]
+
+
+def first_on_surface(result: np.ndarray, threshold: float, needle_width: int, needle_height: int,
+                     haystack_shape, search_direction: int = 1,
+                     chunk: int = SCAN_CHUNK) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the first result surface position scoring at least threshold in search order,
+    thresholding SCAN_CHUNK rows (or columns) at a time and stopping at the first hit
+
+    Args:
+        result: Template-match result surface
+        threshold: Minimum score
+        needle_width, needle_height: Needle size
+        haystack_shape: Shape of the searched image
+        search_direction: Search direction (1-8)
+        chunk: Rows (or columns) thresholded per step
+
+    Returns:
+        (xs, ys) arrays holding the first match, or empty if there is none
+    """
+    haystack_height, haystack_width = haystack_shape[:2]
+    # Same bounds suppress_matches applies
+    surface = result[:max(0, haystack_height - needle_height), :max(0, haystack_width - needle_width)]
+
+    # Unknown directions keep np.nonzero's row-major order, like suppress_matches
+    direction = SEARCH_DIRECTION_ORDER.get(search_direction, SEARCH_DIRECTION_ORDER[1])
+    primary_axis, primary_sign, _, secondary_sign = direction
+    lines = surface if primary_axis == 1 else surface.T
+    count = lines.shape[0]
+
+    if primary_sign > 0:
+        spans = [(start, min(count, start + chunk)) for start in range(0, count, chunk)]
+    else:
+        spans = [(max(0, stop - chunk), stop) for stop in range(count, 0, -chunk)]
+
+    for start, stop in spans:
+        hits = lines[start:stop] >= threshold
+        line_hits = hits.any(axis=1)
+        if not line_hits.any():
+            continue
+
+        if primary_sign > 0:
+            line = int(np.argmax(line_hits))
+        else:
+            line = len(line_hits) - 1 - int(np.argmax(line_hits[::-1]))
+
+        row = hits[line]
+        if secondary_sign > 0:
+            position = int(np.argmax(row))
+        else:
+            position = len(row) - 1 - int(np.argmax(row[::-1]))
+
+        line += start
+        x, y = (position, line) if primary_axis == 1 else (line, position)
+        return np.array([x], dtype=np.int64), np.array([y], dtype=np.int64)
+
+    empty = np.empty(0, dtype=np.int64)
+    return empty, empty
@@ -129,6 +129,9 @@ class MenuManager:
     def _close_any_menu(self, hwnd, y_offset: int) -> bool:
         """Close any open menu"""
         try:
+            # One capture is shared by every menu check until something is clicked
+            frame = None
+
             for menu_name, pos in self.menu_positions.items():
                 for attempt in range(10):
                     # Update window position
@@ -143,9 +146,13 @@ class MenuManager:
                         80
                     )
 
+                    if frame is None or frame.expired:
+                        frame = self.image_search.capture_frame()
+
                     # Check if this menu is open
                     menu_image = f"menus/{menu_name}.png"
-                    if not self.image_search.imagesearch_in_region(menu_image, *menu_region):
+                    if not self.image_search.imagesearch_in_region(menu_image, *menu_region,
+                                                                   frame=frame):
                         # This menu is not open, continue to next
                         break
 
@@ -160,6 +167,9 @@ class MenuManager:
                     empty_y = self.macro.window_y + y_offset + 100
                     self.macro.click_at(empty_x, empty_y)
 
+                    # The screen changed, so the next check needs a new capture
+                    frame.expire()
+
                     time.sleep(0.5)
 
             self.open_menu = ""
@@ -0,0 +1,404 @@
+"""
+Decoded needle cache for image search
+Keeps ready-to-match needle arrays so bitmaps are not decoded on every search
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .binary_match import BinaryNeedle, compile_binary_needle
+from .image_assets import get_bitmap_image
+from .needle_pack import NeedlePack
+
+logger = logging.getLogger(__name__)
+
+# Supported needle color modes
+COLOR_BGR = "bgr"
+COLOR_GRAY = "gray"
+# Cache slot for needle masks
+COLOR_MASK = "mask"
+
+# Needle pixels less opaque than this are ignored when matching
+# (anti-aliased edges take on whatever is behind them on screen)
+MASK_ALPHA_THRESHOLD = 255
+
+# Cached in place of a mask for needles that are fully opaque
+_NO_MASK = np.zeros(0, dtype=np.uint8)
+_NO_MASK.flags.writeable = False
+
+
+def apply_trans_color(needle: np.ndarray, trans_color: Optional[int]) -> np.ndarray:
+    """
+    Zero out the pixels of a BGR needle that match the transparent color
+
+    Args:
+        needle: BGR needle array
+        trans_color: Transparent color (0xRRGGBB) or None
+
+    Returns:
+        Needle array with transparent pixels zeroed
+    """
+    if trans_color is None:
+        return needle
+
+    # Convert RGB to BGR for OpenCV
+    trans_bgr = (trans_color & 0xFF, (trans_color >> 8) & 0xFF, (trans_color >> 16) & 0xFF)
+    # Create mask for transparent pixels
+    mask = cv2.inRange(needle, trans_bgr, trans_bgr)
+    return cv2.bitwise_and(needle, needle, mask=cv2.bitwise_not(mask))
+
+
+def trans_color_mask(needle: np.ndarray, trans_color: Optional[int]) -> Optional[np.ndarray]:
+    """
+    Build a mask of the needle pixels that are not the transparent color
+
+    Args:
+        needle: BGR needle array (before apply_trans_color)
+        trans_color: Transparent color (0xRRGGBB) or None
+
+    Returns:
+        uint8 mask (255 = match this pixel, 0 = ignore), or None if nothing is transparent
+    """
+    if trans_color is None:
+        return None
+
+    trans_bgr = (trans_color & 0xFF, (trans_color >> 8) & 0xFF, (trans_color >> 16) & 0xFF)
+    return cv2.bitwise_not(cv2.inRange(needle, trans_bgr, trans_bgr))
+
+
+def alpha_mask(alpha: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """
+    Build a needle mask from an alpha plane
+
+    Args:
+        alpha: uint8 alpha plane or None
+
+    Returns:
+        uint8 mask (255 = match this pixel, 0 = ignore), or None if fully opaque
+    """
+    if alpha is None or alpha.min() >= MASK_ALPHA_THRESHOLD:
+        return None
+    return np.where(alpha >= MASK_ALPHA_THRESHOLD, 255, 0).astype(np.uint8)
+
+
+def combine_masks(first: Optional[np.ndarray], second: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """Intersect two optional needle masks (None = match every pixel)"""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return cv2.bitwise_and(first, second)
+
+
+def decode_needle_image(image: Image.Image) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert a PIL image into BGR pixels and its alpha plane
+
+    Args:
+        image: PIL image in any mode
+
+    Returns:
+        (BGR array, alpha array or None if fully opaque)
+    """
+    # Palette, 1-bit and alpha images all need converting before OpenCV can use them;
+    # RGBA also turns palette transparency into alpha
+    rgba = np.array(image.convert("RGBA"))
+    bgr = cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR)
+    alpha = rgba[..., 3]
+    return bgr, (None if alpha.min() == 255 else np.ascontiguousarray(alpha))
+
+
+def scale_needle(needle: np.ndarray, scale: float, is_mask: bool = False) -> np.ndarray:
+    """
+    Resize a needle or mask captured at 1x to the screen capture scale
+
+    Integer scales (Retina 2x) repeat pixels, which keeps exact colors, palettes
+    and mask edges intact; fractional scales interpolate the pixels.
+
+    Args:
+        needle: Needle or mask array
+        scale: Capture pixels per needle pixel
+        is_mask: Always use nearest-neighbour (masks stay 0/255)
+
+    Returns:
+        Resized array (the input itself at scale 1)
+    """
+    if scale == 1:
+        return needle
+
+    height, width = needle.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    nearest = is_mask or float(scale).is_integer()
+    return cv2.resize(needle, size, interpolation=cv2.INTER_NEAREST if nearest else cv2.INTER_LINEAR)
+
+
+def decode_bitmap_needle(bitmap_key: str, color_mode: str = COLOR_BGR,
+                         trans_color: Optional[int] = None,
+                         pack: Optional[NeedlePack] = None) -> np.ndarray:
+    """
+    Decode a bitmap into a ready-to-match needle array
+
+    Args:
+        bitmap_key: Key from image_assets (e.g., 'e_button', 'redcannon')
+        color_mode: COLOR_BGR or COLOR_GRAY
+        trans_color: Transparent color (0xRRGGBB) or None
+        pack: Compiled needle pack to read pixels from instead of decoding the PNG
+
+    Returns:
+        Needle array (HxWx3 for BGR, HxW for gray)
+
+    Raises:
+        KeyError: If bitmap key not found
+        ValueError: If color mode is unknown
+    """
+    if color_mode not in (COLOR_BGR, COLOR_GRAY):
+        raise ValueError(f"Unknown color mode: {color_mode}")
+
+    if pack is not None and bitmap_key in pack:
+        # Zero-copy view into the memory-mapped pack
+        needle = pack.get_pixels(bitmap_key)
+    else:
+        needle, _ = decode_needle_image(get_bitmap_image(bitmap_key))
+    needle = apply_trans_color(needle, trans_color)
+
+    if color_mode == COLOR_GRAY:
+        needle = cv2.cvtColor(needle, cv2.COLOR_BGR2GRAY)
+
+    return needle
+
+
+def decode_bitmap_mask(bitmap_key: str, trans_color: Optional[int] = None,
+                       pack: Optional[NeedlePack] = None) -> Optional[np.ndarray]:
+    """
+    Build the mask for a bitmap from its alpha / palette transparency
+    and an optional transparent color
+
+    Args:
+        bitmap_key: Key from image_assets (e.g., 'e_button', 'redcannon')
+        trans_color: Transparent color (0xRRGGBB) or None
+        pack: Compiled needle pack to read alpha from instead of decoding the PNG
+
+    Returns:
+        uint8 mask (255 = match this pixel, 0 = ignore), or None if every pixel counts
+
+    Raises:
+        KeyError: If bitmap key not found
+    """
+    if pack is not None and bitmap_key in pack:
+        needle = pack.get_pixels(bitmap_key)
+        alpha = pack.get_alpha(bitmap_key)
+    else:
+        needle, alpha = decode_needle_image(get_bitmap_image(bitmap_key))
+
+    mask = combine_masks(alpha_mask(alpha), trans_color_mask(needle, trans_color))
+    if mask is not None and mask.min() == 255:
+        return None
+    return mask
+
+
+class NeedleCache:
+    """Bounded, thread-safe LRU cache of decoded needle arrays"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, pack: Optional[NeedlePack] = None):
+        """
+        Args:
+            max_bytes: Maximum total size of cached arrays before eviction
+            pack: Compiled needle pack used instead of PNG decoding on a miss
+        """
+        self.max_bytes = max_bytes
+        self.pack = pack
+        self.current_bytes = 0
+
+        # Counters for logging
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # (bitmap key, color mode, trans_color, scale) -> array
+        self._entries: "OrderedDict[Tuple[str, str, Optional[int], float], np.ndarray]" = OrderedDict()
+        # Bit-plane forms of needles with at most two colors (None = match as BGR);
+        # tiny, so kept for every key seen instead of going through the LRU
+        self._binary: Dict[Tuple[str, Optional[int], float], Optional[BinaryNeedle]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, bitmap_key: str, color_mode: str = COLOR_BGR,
+            trans_color: Optional[int] = None, scale: float = 1.0) -> np.ndarray:
+        """
+        Get a decoded needle, decoding and caching it on a miss
+
+        Args:
+            bitmap_key: Key from image_assets (e.g., 'e_button', 'redcannon')
+            color_mode: COLOR_BGR or COLOR_GRAY
+            trans_color: Transparent color (0xRRGGBB) or None
+            scale: Capture scale to pre-scale the needle to (2.0 on Retina)
+
+        Returns:
+            Read-only needle array
+
+        Raises:
+            KeyError: If bitmap key not found
+        """
+        if scale != 1:
+            return self._lookup((bitmap_key, color_mode, trans_color, scale),
+                                lambda: scale_needle(self.get(bitmap_key, color_mode, trans_color),
+                                                     scale))
+
+        return self._lookup((bitmap_key, color_mode, trans_color, 1),
+                            lambda: decode_bitmap_needle(bitmap_key, color_mode,
+                                                         trans_color, self.pack))
+
+    def get_mask(self, bitmap_key: str, trans_color: Optional[int] = None,
+                 scale: float = 1.0) -> Optional[np.ndarray]:
+        """
+        Get a needle's mask (alpha / palette transparency plus trans_color),
+        building and caching it on a miss
+
+        Args:
+            bitmap_key: Key from image_assets (e.g., 'e_button', 'redcannon')
+            trans_color: Transparent color (0xRRGGBB) or None
+            scale: Capture scale to pre-scale the mask to (2.0 on Retina)
+
+        Returns:
+            Read-only uint8 mask (255 = match, 0 = ignore), or None if every pixel counts
+
+        Raises:
+            KeyError: If bitmap key not found
+        """
+        def decode():
+            if scale != 1:
+                mask = self.get_mask(bitmap_key, trans_color)
+                mask = None if mask is None else scale_needle(mask, scale, is_mask=True)
+            else:
+                mask = decode_bitmap_mask(bitmap_key, trans_color, self.pack)
+            return _NO_MASK if mask is None else mask
+
+        mask = self._lookup((bitmap_key, COLOR_MASK, trans_color, scale), decode)
+        return None if mask is _NO_MASK else mask
+
+    def get_binary(self, bitmap_key: str, trans_color: Optional[int] = None,
+                   scale: float = 1.0) -> Optional[BinaryNeedle]:
+        """
+        Get a needle's bit-plane form if it has at most two colors (ignoring
+        transparent pixels), detecting the color mode on first use
+
+        Args:
+            bitmap_key: Key from image_assets (e.g., 'e_button', 'redcannon')
+            trans_color: Transparent color (0xRRGGBB) or None
+            scale: Capture scale to pre-scale the needle to (2.0 on Retina)
+
+        Returns:
+            BinaryNeedle, or None if the needle has to be matched as BGR
+
+        Raises:
+            KeyError: If bitmap key not found
+        """
+        cache_key = (bitmap_key, trans_color, scale)
+        with self._lock:
+            if cache_key in self._binary:
+                return self._binary[cache_key]
+
+        binary = compile_binary_needle(self.get(bitmap_key, COLOR_BGR, scale=scale),
+                                       self.get_mask(bitmap_key, trans_color, scale))
+        with self._lock:
+            self._binary[cache_key] = binary
+        return binary
+
+    def _lookup(self, cache_key, decode: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return a cached array, or decode, store and return it on a miss"""
+        with self._lock:
+            array = self._entries.get(cache_key)
+            if array is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return array
+            self.misses += 1
+
+        # Decode outside the lock so other threads are not blocked on PNG decoding
+        array = decode()
+        array.flags.writeable = False
+
+        with self._lock:
+            self._store(cache_key, array)
+
+        return array
+
+    def _store(self, cache_key, needle: np.ndarray):
+        """Insert an entry and evict least recently used entries (lock must be held)"""
+        if cache_key in self._entries:
+            return
+
+        if needle.nbytes > self.max_bytes:
+            logger.debug(f"Needle {cache_key[0]} is larger than the cache, not caching")
+            return
+
+        self._entries[cache_key] = needle
+        self.current_bytes += needle.nbytes
+
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def warm(self, bitmap_keys: Iterable[str], color_mode: str = COLOR_BGR,
+             trans_color: Optional[int] = None, scale: float = 1.0) -> int:
+        """
+        Pre-decode a list of bitmaps, with their masks, at a capture scale
+
+        Args:
+            bitmap_keys: Keys to decode
+            color_mode: COLOR_BGR or COLOR_GRAY
+            trans_color: Transparent color (0xRRGGBB) or None
+            scale: Capture scale to pre-scale to (2.0 on Retina)
+
+        Returns:
+            Number of needles successfully warmed
+        """
+        warmed = 0
+        for bitmap_key in bitmap_keys:
+            try:
+                self.get(bitmap_key, color_mode, trans_color, scale)
+                self.get_mask(bitmap_key, trans_color, scale)
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"Could not warm needle {bitmap_key}: {e}")
+        return warmed
+
+    def clear(self):
+        """Drop all cached needles (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._binary.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with entries, bytes, hits, misses, evictions and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def log_stats(self, level: int = logging.INFO):
+        """Log cache statistics"""
+        stats = self.stats()
+        logger.log(level, f"Needle cache: {stats['entries']} entries, "
+                          f"{stats['bytes'] / 1024:.1f}/{stats['max_bytes'] / 1024:.1f} KiB, "
+                          f"{stats['hits']} hits, {stats['misses']} misses, "
+                          f"{stats['evictions']} evictions ({stats['hit_rate']:.1%} hit rate)")
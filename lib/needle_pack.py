@@ -0,0 +1,325 @@
+"""
+Precompiled needle pack for image search
+Compiles every bitmap in nm_image_assets into one memory-mapped binary file
+
+Run `python3 -m lib.needle_pack` to (re)build the pack after changing any bitmaps.py.
+
+Pack layout (little endian):
+    8 bytes   magic b"NMPACK01"
+    8 bytes   index length N (uint64)
+    N bytes   JSON index (key -> shape, offsets, palette/mask info, stats)
+    ...       needle data, every array aligned to DATA_ALIGNMENT bytes
+"""
+
+import hashlib
+import json
+import logging
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .image_assets import BITMAPS, CATEGORY_BITMAPS, find_duplicate_bitmap_keys, get_bitmap_image
+
+logger = logging.getLogger(__name__)
+
+PACK_MAGIC = b"NMPACK01"
+PACK_VERSION = 2
+DATA_ALIGNMENT = 64
+
+# Palettes with this many opaque colors or fewer are stored in the index
+MAX_PALETTE_COLORS = 16
+
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "nm_image_assets"
+DEFAULT_PACK_PATH = ASSETS_DIR / "needles.pack"
+
+# Files whose changes make a compiled pack stale (image_assets.py sets the merge order)
+SOURCE_FILES = ("*/bitmaps.py",)
+MERGE_FILE = Path(__file__).resolve().parent / "image_assets.py"
+
+
+def bitmaps_source_stamp() -> str:
+    """
+    Fingerprint the bitmap sources so a stale pack can be detected
+
+    Only stats the files (name, size, modification time), so it is cheap enough
+    to run on every load; the base64 data itself is never read or hashed.
+
+    Returns:
+        Hex digest of the bitmaps.py files and image_assets.py
+    """
+    paths = sorted(path for pattern in SOURCE_FILES for path in ASSETS_DIR.glob(pattern))
+    paths.append(MERGE_FILE)
+
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = path.stat()
+            entry = f"{path.relative_to(path.parent.parent)}:{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            entry = f"{path.name}:missing"
+        digest.update(entry.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the data alignment"""
+    return (offset + DATA_ALIGNMENT - 1) // DATA_ALIGNMENT * DATA_ALIGNMENT
+
+
+def _needle_stats(bgr: np.ndarray, opaque: Optional[np.ndarray]) -> Dict[str, Any]:
+    """Precompute per-needle statistics over the pixels the search mask keeps"""
+    pixels = bgr.reshape(-1, 3)
+    if opaque is not None:
+        pixels = pixels[opaque]
+
+    if len(pixels) == 0:
+        return {'mean': [0.0, 0.0, 0.0], 'std': [0.0, 0.0, 0.0],
+                'unique_colors': 0, 'opaque_fraction': 0.0}
+
+    packed = (pixels[:, 0].astype(np.uint32) << 16) | (pixels[:, 1].astype(np.uint32) << 8) | pixels[:, 2]
+    return {
+        'mean': [round(float(v), 3) for v in pixels.mean(axis=0)],
+        'std': [round(float(v), 3) for v in pixels.std(axis=0)],
+        'unique_colors': int(len(np.unique(packed))),
+        'opaque_fraction': round(len(pixels) / (bgr.shape[0] * bgr.shape[1]), 4),
+    }
+
+
+def _needle_palette(bgr: np.ndarray, opaque: Optional[np.ndarray]) -> Optional[list]:
+    """Get the distinct BGR colors the search mask keeps if there are few of them"""
+    pixels = bgr.reshape(-1, 3)
+    if opaque is not None:
+        pixels = pixels[opaque]
+
+    colors = np.unique(pixels, axis=0)
+    if len(colors) > MAX_PALETTE_COLORS:
+        return None
+    return colors.tolist()
+
+
+def compile_needle_pack(output_path=DEFAULT_PACK_PATH) -> Dict[str, Any]:
+    """
+    Compile every bitmap into a binary needle pack
+
+    Args:
+        output_path: Where to write the pack
+
+    Returns:
+        Report dictionary with needle count, byte size, duplicate keys and failures
+    """
+    # needle_cache imports this module for NeedlePack
+    from .needle_cache import MASK_ALPHA_THRESHOLD, decode_needle_image
+
+    output_path = Path(output_path)
+
+    # Report keys that BITMAPS silently overwrites
+    duplicates = find_duplicate_bitmap_keys()
+    for key, categories in duplicates.items():
+        logger.warning(f"Duplicate bitmap key '{key}' in categories {categories}, "
+                       f"'{categories[-1]}' wins")
+
+    # Keys map to the category that BITMAPS actually uses (the last one merged)
+    key_categories = {}
+    for category, bitmaps in CATEGORY_BITMAPS.items():
+        for key in bitmaps:
+            key_categories[key] = category
+
+    index = {}
+    chunks = []
+    failed = []
+    offset = 0
+
+    for key in BITMAPS:
+        try:
+            image = get_bitmap_image(key)
+            bgr, alpha = decode_needle_image(image)
+        except Exception as e:
+            logger.error(f"Could not decode bitmap {key}: {e}")
+            failed.append(key)
+            continue
+
+        # Same pixels the runtime alpha mask keeps
+        opaque = None if alpha is None else alpha.reshape(-1) >= MASK_ALPHA_THRESHOLD
+
+        entry = {
+            'category': key_categories.get(key),
+            'mode': image.mode,
+            'shape': list(bgr.shape[:2]),
+            'pixels': offset,
+            'alpha': None,
+            'palette': _needle_palette(bgr, opaque),
+            'stats': _needle_stats(bgr, opaque),
+        }
+        chunks.append((offset, bgr))
+        offset = _align(offset + bgr.nbytes)
+
+        if alpha is not None:
+            entry['alpha'] = offset
+            chunks.append((offset, alpha))
+            offset = _align(offset + alpha.nbytes)
+
+        index[key] = entry
+
+    index_bytes = json.dumps({
+        'version': PACK_VERSION,
+        'source_stamp': bitmaps_source_stamp(),
+        'data_size': offset,
+        'needles': index,
+    }, separators=(',', ':')).encode("utf-8")
+
+    # Data starts on an aligned boundary after the header and index
+    header_size = len(PACK_MAGIC) + 8 + len(index_bytes)
+    data_start = _align(header_size)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(PACK_MAGIC)
+        f.write(struct.pack('<Q', len(index_bytes)))
+        f.write(index_bytes)
+        f.write(b"\0" * (data_start - header_size))
+        for chunk_offset, array in chunks:
+            f.seek(data_start + chunk_offset)
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    tmp_path.replace(output_path)
+
+    report = {
+        'path': str(output_path),
+        'needles': len(index),
+        'bytes': data_start + offset,
+        'duplicates': duplicates,
+        'failed': failed,
+    }
+    logger.info(f"Compiled {report['needles']} needles into {output_path} "
+                f"({report['bytes'] / 1024:.1f} KiB, {len(duplicates)} duplicate keys, "
+                f"{len(failed)} failed)")
+    return report
+
+
+class NeedlePack:
+    """Read-only, memory-mapped view of a compiled needle pack"""
+
+    def __init__(self, path=DEFAULT_PACK_PATH):
+        """
+        Args:
+            path: Path to a pack written by compile_needle_pack()
+
+        Raises:
+            ValueError: If the file is not a needle pack or has the wrong version
+        """
+        self.path = Path(path)
+
+        with open(self.path, 'rb') as f:
+            magic = f.read(len(PACK_MAGIC))
+            if magic != PACK_MAGIC:
+                raise ValueError(f"Not a needle pack: {self.path}")
+            index_length = struct.unpack('<Q', f.read(8))[0]
+            header = json.loads(f.read(index_length).decode("utf-8"))
+
+        if header.get('version') != PACK_VERSION:
+            raise ValueError(f"Unsupported needle pack version {header.get('version')}: {self.path}")
+
+        self.source_stamp = header['source_stamp']
+        self.index: Dict[str, Dict[str, Any]] = header['needles']
+
+        data_start = _align(len(PACK_MAGIC) + 8 + index_length)
+        self._data = np.memmap(self.path, dtype=np.uint8, mode='r', offset=data_start,
+                               shape=(header['data_size'],))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def is_stale(self) -> bool:
+        """
+        Check whether the bitmap sources changed since the pack was compiled
+
+        Returns:
+            True if any bitmaps.py (or image_assets.py) was touched since
+        """
+        return self.source_stamp != bitmaps_source_stamp()
+
+    def info(self, key: str) -> Dict[str, Any]:
+        """
+        Get the index entry (mode, shape, palette, stats) for a needle
+
+        Raises:
+            KeyError: If the key is not in the pack
+        """
+        return self.index[key]
+
+    def get_pixels(self, key: str) -> np.ndarray:
+        """
+        Get a needle's BGR pixels as a read-only view into the pack
+
+        Raises:
+            KeyError: If the key is not in the pack
+        """
+        entry = self.index[key]
+        height, width = entry['shape']
+        start = entry['pixels']
+        return np.asarray(self._data[start:start + height * width * 3]).reshape(height, width, 3)
+
+    def get_alpha(self, key: str) -> Optional[np.ndarray]:
+        """
+        Get a needle's alpha plane as a read-only view, or None if fully opaque
+
+        Raises:
+            KeyError: If the key is not in the pack
+        """
+        entry = self.index[key]
+        if entry['alpha'] is None:
+            return None
+        height, width = entry['shape']
+        start = entry['alpha']
+        return np.asarray(self._data[start:start + height * width]).reshape(height, width)
+
+
+def load_needle_pack(path=DEFAULT_PACK_PATH) -> Optional[NeedlePack]:
+    """
+    Open the needle pack if it exists and is up to date
+
+    Args:
+        path: Path to the pack
+
+    Returns:
+        NeedlePack, or None if missing, unreadable or stale (callers fall back to PNG decoding)
+    """
+    path = Path(path)
+    if not path.exists():
+        logger.info(f"No needle pack at {path}, decoding bitmaps on demand "
+                    f"(run 'python3 -m lib.needle_pack' to build it)")
+        return None
+
+    try:
+        pack = NeedlePack(path)
+    except Exception as e:
+        logger.warning(f"Could not open needle pack {path}: {e}")
+        return None
+
+    if pack.is_stale():
+        logger.warning(f"Needle pack {path} is out of date, decoding bitmaps on demand "
+                       f"(run 'python3 -m lib.needle_pack' to rebuild it)")
+        return None
+
+    return pack
+
+
+def main(argv=None) -> int:
+    """Command line entry point: compile the pack and report duplicates"""
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    report = compile_needle_pack(argv[0] if argv else DEFAULT_PACK_PATH)
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Pixel color probes for image search
+Equivalent to PixelGetColor / PixelSearch, vectorized so many probes cost one NumPy pass
+"""
+
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from .match_suppression import first_on_surface, order_matches
+
+
+def rgb_to_bgr(color: int) -> Tuple[int, int, int]:
+    """Split an AHK 0xRRGGBB color into a (B, G, R) tuple"""
+    return (color & 0xFF, (color >> 8) & 0xFF, (color >> 16) & 0xFF)
+
+
+def bgr_to_rgb(pixel) -> int:
+    """Pack a (B, G, R) pixel into an AHK 0xRRGGBB color"""
+    blue, green, red = (int(value) for value in pixel[:3])
+    return (red << 16) | (green << 8) | blue
+
+
+def point_grid(image: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Reduce a capture to one pixel per screen point (the top-left pixel of each point),
+    so probes and results use screen coordinates on Retina captures too
+
+    Args:
+        image: BGR capture
+        scale: Pixels per screen point
+
+    Returns:
+        Image with one pixel per point (the input itself at 1x)
+    """
+    if scale == 1:
+        return image
+    if float(scale).is_integer():
+        step = int(scale)
+        return image[::step, ::step]
+
+    height, width = image.shape[:2]
+    size = (max(1, int(round(width / scale))), max(1, int(round(height / scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_NEAREST)
+
+
+def match_colors(pixels: np.ndarray, colors: np.ndarray, variation: int = 0) -> np.ndarray:
+    """
+    Check pixels against expected colors, every channel within +/- variation
+
+    Args:
+        pixels: (n, 3) BGR pixels
+        colors: (n, 3) or (3,) expected BGR colors
+        variation: Per-channel tolerance (0-255)
+
+    Returns:
+        (n,) bool array
+    """
+    difference = np.abs(pixels.astype(np.int16) - np.asarray(colors, dtype=np.int16))
+    return difference.max(axis=-1) <= variation
+
+
+def find_color(image: np.ndarray, color: int, variation: int = 0, search_direction: int = 1,
+               first_only: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find pixels of a color, like PixelSearch
+
+    Args:
+        image: BGR image
+        color: Color to find (0xRRGGBB)
+        variation: Per-channel tolerance (0-255)
+        search_direction: Search direction (1-8)
+        first_only: Stop at the first pixel in search order
+
+    Returns:
+        (xs, ys) arrays of matching pixels, in search order
+    """
+    blue, green, red = rgb_to_bgr(color)
+    lower = (max(0, blue - variation), max(0, green - variation), max(0, red - variation))
+    upper = (min(255, blue + variation), min(255, green + variation), min(255, red + variation))
+    hits = cv2.inRange(image, lower, upper)
+
+    if first_only:
+        # A 0x0 "needle" keeps every pixel in bounds
+        return first_on_surface(hits, 1, 0, 0, hits.shape, search_direction)
+
+    ys, xs = np.nonzero(hits)
+    order = order_matches(xs, ys, search_direction)
+    if order is not None:
+        xs, ys = xs[order], ys[order]
+    return xs.astype(np.int64), ys.astype(np.int64)
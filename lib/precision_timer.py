@@ -0,0 +1,181 @@
+"""
+Calibrated precision sleep
+Sleeps natively until just before the deadline and spins only for the measured OS sleep overshoot
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Native sleeps measured at calibration, and how long each one asks for (seconds)
+CALIBRATION_SAMPLES = 40
+CALIBRATION_SLEEP = 0.001
+# Overshoot percentile the spin window has to cover, plus a fixed safety margin (seconds)
+OVERSHOOT_PERCENTILE = 99
+SPIN_MARGIN = 0.0002
+# Bounds of the spin window (seconds)
+MIN_SPIN = 0.0002
+MAX_SPIN = 0.03
+# Recent native sleep overshoots kept, and native sleeps between re-estimates of the spin window
+OVERSHOOT_WINDOW = 256
+RECALIBRATE_EVERY = 64
+# Recent deadline errors kept for jitter statistics
+ERROR_WINDOW = 1024
+
+
+class JitterStats(NamedTuple):
+    """Deadline error (wake-up time minus deadline) over recent sleeps, in milliseconds"""
+    count: int
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+    late: int               # Sleeps where the native sleep alone already overshot the deadline
+    spin_ms: float          # Current spin window
+    spin_total_ms: float    # Time spent spinning since the timer was created
+
+
+class PrecisionTimer:
+    """Hybrid native-sleep / spin timer calibrated to this machine's sleep overshoot"""
+
+    def __init__(self, calibrate: bool = True, percentile: float = OVERSHOOT_PERCENTILE,
+                 margin: float = SPIN_MARGIN):
+        """
+        Args:
+            calibrate: Measure the sleep overshoot now (otherwise the first sleeps
+                       use MAX_SPIN until enough overshoots were seen)
+            percentile: Overshoot percentile the spin window covers
+            margin: Seconds added to the spin window
+        """
+        self.percentile = percentile
+        self.margin = margin
+        self.spin_window = MAX_SPIN
+
+        self._overshoots = deque(maxlen=OVERSHOOT_WINDOW)
+        self._errors = deque(maxlen=ERROR_WINDOW)
+        self._since_estimate = 0
+        self._late = 0
+        self._spin_total = 0.0
+        self._lock = threading.Lock()
+
+        if calibrate:
+            self.calibrate()
+
+    def calibrate(self, samples: int = CALIBRATION_SAMPLES, duration: float = CALIBRATION_SLEEP):
+        """
+        Measure how far native sleeps overshoot and size the spin window from it
+
+        Args:
+            samples: Native sleeps to measure
+            duration: Seconds each sleep asks for
+        """
+        for _ in range(samples):
+            start = time.perf_counter()
+            time.sleep(duration)
+            self._overshoots.append(time.perf_counter() - start - duration)
+
+        with self._lock:
+            self._estimate()
+        logger.debug(f"Precision timer calibrated: spin window {self.spin_window * 1000:.3f} ms")
+
+    def _estimate(self):
+        """Size the spin window from the recent overshoots (call with the lock held)"""
+        if self._overshoots:
+            overshoot = float(np.percentile(self._overshoots, self.percentile))
+            self.spin_window = min(MAX_SPIN, max(MIN_SPIN, overshoot + self.margin))
+        self._since_estimate = 0
+
+    def sleep_until(self, deadline: float, stop_event=None) -> bool:
+        """
+        Sleep until a time.perf_counter() deadline
+
+        Args:
+            deadline: perf_counter() value to wake up at
+            stop_event: Optional threading.Event; the native part of the sleep
+                        waits on it and returns early once it is set
+
+        Returns:
+            True if the deadline was reached, False if stop_event ended the sleep
+        """
+        if stop_event is not None and stop_event.is_set():
+            return False
+
+        now = time.perf_counter()
+        remaining = deadline - now
+
+        # Native sleep up to the spin window, measuring how far it overshoots
+        if remaining > self.spin_window:
+            requested = remaining - self.spin_window
+            if stop_event is None:
+                time.sleep(requested)
+            elif stop_event.wait(requested):
+                return False
+            now = time.perf_counter()
+            overshoot = now - deadline + self.spin_window
+
+            with self._lock:
+                self._overshoots.append(overshoot)
+                if now > deadline:
+                    self._late += 1
+                self._since_estimate += 1
+                if self._since_estimate >= RECALIBRATE_EVERY:
+                    self._estimate()
+
+        # Spin for the residual
+        spin_start = now
+        while now < deadline:
+            now = time.perf_counter()
+
+        with self._lock:
+            self._spin_total += now - spin_start
+            self._errors.append(now - deadline)
+        return True
+
+    def sleep(self, seconds: float):
+        """Sleep for a number of seconds"""
+        self.sleep_until(time.perf_counter() + seconds)
+
+    def sleep_ms(self, ms: float):
+        """Sleep for a number of milliseconds"""
+        self.sleep_until(time.perf_counter() + ms / 1000.0)
+
+    def stats(self) -> JitterStats:
+        """Get deadline error statistics over recent sleeps"""
+        with self._lock:
+            errors = np.asarray(self._errors, dtype=np.float64) * 1000.0
+            late, spin_total = self._late, self._spin_total
+
+        if len(errors) == 0:
+            return JitterStats(0, 0.0, 0.0, 0.0, 0.0, late, self.spin_window * 1000.0,
+                               spin_total * 1000.0)
+
+        return JitterStats(len(errors), float(errors.mean()), float(np.percentile(errors, 50)),
+                           float(np.percentile(errors, 99)), float(errors.max()), late,
+                           self.spin_window * 1000.0, spin_total * 1000.0)
+
+    def log_stats(self, level: int = logging.INFO):
+        """Log the deadline error statistics"""
+        stats = self.stats()
+        logger.log(level, f"Precision timer: {stats.count} sleeps, error mean {stats.mean_ms:.3f} ms / "
+                          f"p99 {stats.p99_ms:.3f} ms / max {stats.max_ms:.3f} ms, {stats.late} late, "
+                          f"spin window {stats.spin_ms:.3f} ms, {stats.spin_total_ms:.0f} ms spinning")
+
+
+_default_timer: Optional[PrecisionTimer] = None
+_default_lock = threading.Lock()
+
+
+def get_timer() -> PrecisionTimer:
+    """Get the shared timer, calibrating it on first use"""
+    global _default_timer
+    if _default_timer is None:
+        with _default_lock:
+            if _default_timer is None:
+                _default_timer = PrecisionTimer()
+    return _default_timer
@@ -0,0 +1,152 @@
+"""
+Coarse-to-fine pyramid search
+Correlate a downscaled haystack first, then refine only around the candidates at full resolution
+"""
+
+import logging
+from typing import Callable, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Full-resolution pixels searched around each coarse candidate on top of the scale factor
+REFINE_PADDING = 2
+
+
+class PyramidConfig(NamedTuple):
+    """Settings for coarse-to-fine search"""
+
+    levels: int = 1                        # Times the haystack is halved for the coarse pass
+    coarse_slack: float = 0.15             # How far below the threshold coarse candidates may score
+    ambiguity_band: float = 0.1            # A coarse near-miss within this of the slack = search in full
+    max_candidates: int = 32               # More candidate areas than this = ambiguous, search in full
+    min_needle_size: int = 8               # Smallest needle side (pixels) allowed at the coarse level
+    min_haystack_pixels: int = 640 * 360   # Smaller search areas are always searched in full
+
+
+def downscale(image: np.ndarray, level: int) -> np.ndarray:
+    """Shrink an image by 2**level with area averaging"""
+    scale = 1 << level
+    height, width = image.shape[:2]
+    return cv2.resize(image, (max(1, width // scale), max(1, height // scale)),
+                      interpolation=cv2.INTER_AREA)
+
+
+def coarse_view(frame, level: int, x1: int = 0, y1: int = 0, x2: int = 0, y2: int = 0) -> np.ndarray:
+    """
+    Get a downscaled copy of a frame region, cached on the frame so every needle
+    searched in the same region shares it
+
+    Args:
+        frame: FrameContext the region comes from
+        level: Pyramid level (1 = half size)
+        x1, y1, x2, y2: Screen region bounds (x2 <= x1 or y2 <= y1 = whole frame)
+
+    Returns:
+        Downscaled region
+    """
+    if not (x2 > x1 and y2 > y1):
+        x1, y1, x2, y2 = frame.region
+
+    cache_key = (level, x1, y1, x2, y2)
+    coarse = frame.pyramid_cache.get(cache_key)
+    if coarse is None:
+        # Two threads may both build it; the result is the same either way
+        coarse = downscale(frame.view(x1, y1, x2, y2), level)
+        frame.pyramid_cache[cache_key] = coarse
+    return coarse
+
+
+def _coarse_mask(mask: Optional[np.ndarray], level: int) -> Optional[np.ndarray]:
+    """Shrink a needle mask, keeping only coarse pixels that are entirely opaque"""
+    if mask is None:
+        return None
+    coarse = downscale(mask, level)
+    return np.where(coarse == 255, 255, 0).astype(np.uint8)
+
+
+def pyramid_match(haystack: np.ndarray, needle: np.ndarray, threshold: float,
+                  match_template: Callable[..., np.ndarray],
+                  mask: Optional[np.ndarray] = None,
+                  config: PyramidConfig = PyramidConfig(),
+                  coarse_haystack: Optional[np.ndarray] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Find every position scoring at least threshold, correlating at full resolution
+    only around the positions that look promising at the coarse level
+
+    Args:
+        haystack: Full-resolution search image
+        needle: Full-resolution needle
+        threshold: Score a full-resolution position needs to match
+        match_template: Function (haystack, needle, mask) -> result surface
+        mask: Optional needle mask (255 = match, 0 = transparent)
+        config: PyramidConfig
+        coarse_haystack: Haystack already downscaled to config.levels (e.g. from coarse_view)
+
+    Returns:
+        (xs, ys) of matching positions in row-major order, or None if the
+        coarse pass was not usable and the caller should search in full
+    """
+    haystack_height, haystack_width = haystack.shape[:2]
+    needle_height, needle_width = needle.shape[:2]
+    scale = 1 << config.levels
+
+    if (haystack_height * haystack_width < config.min_haystack_pixels or
+            min(needle_height, needle_width) // scale < config.min_needle_size):
+        return None
+
+    coarse_needle = downscale(needle, config.levels)
+    coarse_mask = _coarse_mask(mask, config.levels)
+    if coarse_mask is not None and not coarse_mask.any():
+        return None
+    if coarse_haystack is None:
+        coarse_haystack = downscale(haystack, config.levels)
+
+    coarse_result = match_template(coarse_haystack, coarse_needle, coarse_mask)
+    coarse_threshold = threshold - config.coarse_slack
+    candidates = (coarse_result >= coarse_threshold).astype(np.uint8)
+
+    # Merge neighbouring candidates into areas and refine each area once
+    _, _, boxes, _ = cv2.connectedComponentsWithStats(candidates, connectivity=8)
+    boxes = boxes[1:]
+    if len(boxes) == 0:
+        # A near miss at the coarse level may still be a hit at full resolution
+        if coarse_result.size and coarse_result.max() >= coarse_threshold - config.ambiguity_band:
+            logger.debug("Pyramid search ambiguous (coarse near miss), searching in full")
+            return None
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    if len(boxes) > config.max_candidates:
+        logger.debug(f"Pyramid search ambiguous ({len(boxes)} candidate areas), searching in full")
+        return None
+
+    result_width = haystack_width - needle_width + 1
+    result_height = haystack_height - needle_height + 1
+    padding = scale + REFINE_PADDING
+    found_xs, found_ys = [], []
+
+    for box_x, box_y, box_width, box_height, _ in boxes:
+        x1 = max(0, box_x * scale - padding)
+        y1 = max(0, box_y * scale - padding)
+        x2 = min(result_width, (box_x + box_width - 1) * scale + padding + 1)
+        y2 = min(result_height, (box_y + box_height - 1) * scale + padding + 1)
+        if x2 <= x1 or y2 <= y1:
+            continue
+
+        window = haystack[y1:y2 + needle_height - 1, x1:x2 + needle_width - 1]
+        ys, xs = np.nonzero(match_template(window, needle, mask) >= threshold)
+        found_xs.append(xs + x1)
+        found_ys.append(ys + y1)
+
+    if not found_xs:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    # Padded areas can overlap; dedupe and restore np.nonzero's row-major order
+    flat = np.unique(np.concatenate(found_ys).astype(np.int64) * result_width +
+                     np.concatenate(found_xs).astype(np.int64))
+    ys, xs = np.divmod(flat, result_width)
+    return xs, ys
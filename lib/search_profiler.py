@@ -0,0 +1,210 @@
+"""
+Per-needle image search profiling
+Fixed-bucket timing histograms so the expensive needles can be found cheaply
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the histogram buckets; the last bucket catches everything slower
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+# Seconds between periodic summaries in the log
+DEFAULT_LOG_INTERVAL = 300.0
+# Needles listed in summaries
+DEFAULT_TOP_N = 10
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in milliseconds"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        """Record one duration (ms)"""
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimate a percentile from the buckets
+
+        Args:
+            percent: Percentile (0-100)
+
+        Returns:
+            Upper bound of the bucket holding the percentile, capped at the max seen
+        """
+        if not self.count:
+            return 0.0
+
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(BUCKET_BOUNDS_MS[index], self.max) if index < len(BUCKET_BOUNDS_MS) else self.max
+        return self.max
+
+
+class SearchTimings:
+    """Time and area accumulated over the region searches that make up one needle search"""
+
+    __slots__ = ('capture', 'match', 'filter', 'area')
+
+    def __init__(self):
+        self.capture = 0.0
+        self.match = 0.0
+        self.filter = 0.0
+        self.area = 0
+
+
+class NeedleProfile:
+    """Everything recorded for one needle"""
+
+    __slots__ = ('capture', 'match', 'filter', 'searches', 'hits', 'area')
+
+    def __init__(self):
+        self.capture = Histogram()
+        self.match = Histogram()
+        self.filter = Histogram()
+        self.searches = 0
+        self.hits = 0
+        self.area = 0            # Total pixels searched
+
+    @property
+    def total_ms(self) -> float:
+        return self.capture.total + self.match.total + self.filter.total
+
+    def summary(self, key: str) -> dict:
+        """Flatten into a dict for dumps and logs"""
+        return {
+            'needle': key,
+            'searches': self.searches,
+            'hit_rate': self.hits / self.searches if self.searches else 0.0,
+            'mean_area': self.area / self.searches if self.searches else 0,
+            'total_ms': self.total_ms,
+            'capture_mean_ms': self.capture.mean,
+            'match_mean_ms': self.match.mean,
+            'match_p95_ms': self.match.percentile(95),
+            'match_max_ms': self.match.max,
+            'filter_mean_ms': self.filter.mean,
+        }
+
+
+class SearchProfiler:
+    """Thread-safe collection of NeedleProfiles, keyed by bitmap key or needle path"""
+
+    def __init__(self, enabled: bool = True, log_interval: Optional[float] = DEFAULT_LOG_INTERVAL,
+                 top_n: int = DEFAULT_TOP_N):
+        """
+        Args:
+            enabled: Record searches (a disabled profiler costs one attribute check)
+            log_interval: Seconds between periodic summaries (None = never)
+            top_n: Needles listed in periodic summaries
+        """
+        self.enabled = enabled
+        self.log_interval = log_interval
+        self.top_n = top_n
+
+        self._profiles: Dict[str, NeedleProfile] = {}
+        self._lock = threading.Lock()
+        self._last_log = time.monotonic()
+
+    def record(self, key: str, capture_ms: float, match_ms: float, filter_ms: float,
+               area: int, hit: bool):
+        """
+        Record one search
+
+        Args:
+            key: Bitmap key or needle path
+            capture_ms: Time spent getting the haystack (screenshot or frame view)
+            match_ms: Time spent matching
+            filter_ms: Time spent ordering / suppressing matches
+            area: Pixels searched
+            hit: Whether anything was found
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = NeedleProfile()
+
+            profile.capture.add(capture_ms)
+            profile.match.add(match_ms)
+            profile.filter.add(filter_ms)
+            profile.searches += 1
+            profile.area += area
+            if hit:
+                profile.hits += 1
+
+            log_due = (self.log_interval is not None and
+                       time.monotonic() - self._last_log >= self.log_interval)
+            if log_due:
+                self._last_log = time.monotonic()
+
+        if log_due:
+            self.log_summary(self.top_n)
+
+    def record_timings(self, key: str, timings: SearchTimings, hit: bool):
+        """Record one search from its accumulated SearchTimings (seconds)"""
+        self.record(key, timings.capture * 1000.0, timings.match * 1000.0,
+                    timings.filter * 1000.0, timings.area, hit)
+
+    def dump(self, top_n: Optional[int] = DEFAULT_TOP_N) -> List[dict]:
+        """
+        Get the most expensive needles by total search time
+
+        Args:
+            top_n: Number of needles (None = all)
+
+        Returns:
+            List of summary dicts, most expensive first
+        """
+        with self._lock:
+            summaries = [profile.summary(key) for key, profile in self._profiles.items()]
+
+        summaries.sort(key=lambda summary: summary['total_ms'], reverse=True)
+        return summaries if top_n is None else summaries[:top_n]
+
+    def log_summary(self, top_n: int = DEFAULT_TOP_N, level: int = logging.INFO):
+        """Log the most expensive needles"""
+        summaries = self.dump(top_n)
+        if not summaries:
+            return
+
+        lines = [f"Top {len(summaries)} image searches by total time:"]
+        for summary in summaries:
+            lines.append(f"  {summary['needle']}: {summary['searches']} searches, "
+                         f"{summary['total_ms']:.0f} ms total, "
+                         f"match {summary['match_mean_ms']:.2f} ms mean / "
+                         f"{summary['match_p95_ms']:.2f} ms p95, "
+                         f"capture {summary['capture_mean_ms']:.2f} ms, "
+                         f"filter {summary['filter_mean_ms']:.2f} ms, "
+                         f"{summary['mean_area']:.0f} px area, "
+                         f"{summary['hit_rate']:.0%} hits")
+        logger.log(level, "\n".join(lines))
+
+    def reset(self):
+        """Drop everything recorded so far"""
+        with self._lock:
+            self._profiles.clear()
@@ -0,0 +1,231 @@
+"""
+AHK Send string compiler
+Equivalent to the Send command's key syntax; compiles strings like "{w up}{a down}" into cached input event tuples
+"""
+
+import logging
+import re
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .input_backends import InputEvent, click, key_down, key_press, key_up
+
+logger = logging.getLogger(__name__)
+
+# AHK key names -> pyautogui key names (anything else is lowercased)
+AHK_KEY_NAMES = {
+    'enter': 'enter', 'return': 'enter', 'esc': 'esc', 'escape': 'esc', 'space': 'space',
+    'tab': 'tab', 'bs': 'backspace', 'backspace': 'backspace', 'del': 'delete', 'delete': 'delete',
+    'ins': 'insert', 'insert': 'insert', 'home': 'home', 'end': 'end',
+    'pgup': 'pageup', 'pgdn': 'pagedown', 'up': 'up', 'down': 'down', 'left': 'left', 'right': 'right',
+    'shift': 'shift', 'lshift': 'shiftleft', 'rshift': 'shiftright',
+    'ctrl': 'ctrl', 'control': 'ctrl', 'lctrl': 'ctrlleft', 'rctrl': 'ctrlright',
+    'alt': 'alt', 'lalt': 'altleft', 'ralt': 'altright',
+    'lwin': 'winleft', 'rwin': 'winright', 'capslock': 'capslock',
+    'printscreen': 'printscreen', 'appskey': 'apps',
+    'numpadenter': 'enter', 'numpadadd': 'add', 'numpadsub': 'subtract',
+    'numpadmult': 'multiply', 'numpaddiv': 'divide', 'numpaddot': 'decimal',
+}
+# Modifier prefixes -> the key held around the next key
+MODIFIERS = {'^': 'ctrl', '+': 'shift', '!': 'alt', '#': 'win'}
+
+# "{name}", "{name down}", "{name up}", "{name 3}", "{Click 100 200}"
+_BRACE_PATTERN = re.compile(r'^(\S+?)(?:\s+(.*))?$')
+_VARIABLE_PATTERN = re.compile(r'%(\w+)%')
+
+
+class KeyMappings(dict):
+    """
+    Key mapping dict ({'FwdKey': 'w', ...}) with a version counter that
+    changes on every modification, so compiled programs know when to rebuild
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def _changed(self):
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._changed()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self._changed()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._changed()
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
+def _resolve(name: str, mappings: List[Mapping[str, str]]) -> str:
+    """Map an AHK key or key-mapping variable name to a pyautogui key name"""
+    for layer in mappings:
+        if name in layer:
+            return layer[name]
+        lowered = name.lower()
+        for mapping_name, key in layer.items():
+            if mapping_name.lower() == lowered:
+                return key
+
+    if len(name) == 1:
+        return name
+    return AHK_KEY_NAMES.get(name.lower(), name.lower())
+
+
+def _brace_events(content: str, mappings: List[Mapping[str, str]]) -> List[InputEvent]:
+    """Events for the inside of one {...} group"""
+    match = _BRACE_PATTERN.match(content)
+    if match is None:
+        # "{ }" sends a space
+        return [key_press('space')] if content else []
+
+    name, argument = match.group(1), (match.group(2) or '').strip()
+
+    if name.lower() == 'click':
+        coordinates = [int(value) for value in argument.split()[:2] if value.lstrip('-').isdigit()]
+        if len(coordinates) == 2:
+            return [click(*coordinates)]
+        return [click()]
+
+    key = _resolve(name, mappings)
+    state = argument.lower()
+    if state.startswith('down'):     # down, downR, downTemp
+        return [key_down(key)]
+    if state == 'up':
+        return [key_up(key)]
+    if state.isdigit():
+        return [key_press(key)] * int(state)
+    if state:
+        logger.warning(f"Unsupported Send key option '{{{content}}}', pressing {key}")
+    return [key_press(key)]
+
+
+def compile_send(sequence: str, *mappings: Mapping[str, str]) -> Tuple[InputEvent, ...]:
+    """
+    Compile an AHK Send string into input events
+
+    Supports {key}, {key down}, {key up}, {key N}, {{} and {}}, {Click [x y]},
+    {Raw}/{Text} (rest sent literally), {Blind} (ignored), the ^ + ! # modifier
+    prefixes and %Variable% references. Key names are looked up in the
+    mappings (first layer first, case-insensitive), then as AHK key names.
+    An unterminated "{" is skipped with a warning.
+
+    Args:
+        sequence: AHK Send string
+        *mappings: Key mapping layers ({'FwdKey': 'w', ...})
+
+    Returns:
+        Tuple of InputEvents
+    """
+    layers = list(mappings)
+    sequence = _VARIABLE_PATTERN.sub(lambda match: _resolve(match.group(1), layers), sequence)
+
+    events: List[InputEvent] = []
+    modifiers: List[str] = []
+    raw = False
+    index = 0
+
+    while index < len(sequence):
+        char = sequence[index]
+
+        if raw:
+            group = [key_press(char)]
+            index += 1
+        elif char in MODIFIERS and index + 1 < len(sequence):
+            modifiers.append(MODIFIERS[char])
+            index += 1
+            continue
+        elif char == '{':
+            # "{{}" and "{}}" are literal braces; otherwise the group ends at the next "}"
+            if sequence.startswith('{}}', index):
+                end = index + 2
+            else:
+                end = sequence.find('}', index + 1)
+            if end < 0:
+                logger.warning(f"Unterminated '{{' in Send string {sequence!r}, skipping "
+                               f"{sequence[index:]!r}")
+                break
+
+            content = sequence[index + 1:end]
+            index = end + 1
+            mode = content.lower()
+            if mode in ('raw', 'text'):
+                raw = True
+                continue
+            if mode == 'blind':
+                continue
+            group = _brace_events(content, layers)
+        else:
+            group = [key_press('enter' if char == '\n' else char)]
+            index += 1
+
+        if modifiers:
+            group = ([key_down(key) for key in modifiers] + group +
+                     [key_up(key) for key in reversed(modifiers)])
+            modifiers = []
+        events.extend(group)
+
+    return tuple(events)
+
+
+class SendCompiler:
+    """Compiles Send strings against key mapping layers, memoized by (string, mapping versions)"""
+
+    def __init__(self, *mappings: Mapping[str, str]):
+        """
+        Args:
+            *mappings: Key mapping layers, first layer first (KeyMappings invalidate
+                       the cache when changed; plain dicts are treated as fixed)
+        """
+        self.mappings = mappings
+        self._cache: Dict[Tuple[str, tuple], Tuple[InputEvent, ...]] = {}
+        self._versions: Optional[tuple] = None
+
+    def _current_versions(self) -> tuple:
+        return tuple(getattr(layer, 'version', 0) for layer in self.mappings)
+
+    def compile(self, sequence: str) -> Tuple[InputEvent, ...]:
+        """
+        Get the events for a Send string, compiling it on first use
+
+        Args:
+            sequence: AHK Send string
+
+        Returns:
+            Tuple of InputEvents
+        """
+        versions = self._current_versions()
+        if versions != self._versions:
+            # A mapping changed: every cached program may be stale
+            self._cache.clear()
+            self._versions = versions
+
+        key = (sequence, versions)
+        program = self._cache.get(key)
+        if program is None:
+            program = compile_send(sequence, *self.mappings)
+            self._cache[key] = program
+        return program
+
+    def clear(self):
+        """Drop every compiled program"""
+        self._cache.clear()
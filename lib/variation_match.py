@@ -0,0 +1,148 @@
+"""
+AHK-compatible variation matching for image search
+Equivalent to the per-channel color tolerance of Gdip_ImageSearch; variation 0 is the exact match
+"""
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Needle colors considered when picking the rarest anchor
+ANCHOR_COLOR_CANDIDATES = 8
+# Haystack subsampling step used to estimate how common an anchor color is
+ANCHOR_SAMPLE_STEP = 4
+# Needle pixels checked one at a time before switching to block verification
+EARLY_REJECT_PIXELS = 16
+# Needle pixels compared per block during full verification
+VERIFY_BLOCK_PIXELS = 64
+
+# How ImageSearch interprets the variation argument
+VARIATION_MODE_CORRELATION = "correlation"  # (100 - variation) / 100 as a TM_CCOEFF_NORMED threshold
+VARIATION_MODE_AHK = "ahk"                  # Every channel of every pixel within +/- variation
+
+
+def as_channels(image: np.ndarray) -> np.ndarray:
+    """View a BGR or grayscale image as HxWxC"""
+    return image[..., np.newaxis] if image.ndim == 2 else image
+
+
+def tolerance_mask(image: np.ndarray, color: np.ndarray, variation: int = 0) -> np.ndarray:
+    """Mask of the pixels whose every channel is within variation of a color (0 = exactly equal)"""
+    lower = tuple(max(0, int(value) - variation) for value in color)
+    upper = tuple(min(255, int(value) + variation) for value in color)
+    return cv2.inRange(image, lower, upper)
+
+
+def _within(values: np.ndarray, expected: np.ndarray, variation: int) -> np.ndarray:
+    """Per-channel |values - expected| <= variation, as int16 to avoid uint8 wraparound"""
+    if variation == 0:
+        return values == expected
+    return np.abs(values.astype(np.int16) - expected.astype(np.int16)) <= variation
+
+
+def pick_anchor(haystack: np.ndarray, needle: np.ndarray, opaque: np.ndarray,
+                variation: int = 0) -> Tuple[int, int]:
+    """
+    Pick the needle pixel whose tolerance box should match the fewest haystack pixels
+
+    Returns:
+        (row, column) of the anchor pixel in the needle
+    """
+    channels = needle.shape[2]
+    pixels = needle.reshape(-1, channels)[opaque.reshape(-1)]
+    colors, first_index, counts = np.unique(pixels, axis=0, return_index=True, return_counts=True)
+
+    # Colors that are rare in the needle are usually rare on screen too;
+    # confirm on a subsample of the haystack
+    shortlist = np.argsort(counts, kind='stable')[:ANCHOR_COLOR_CANDIDATES]
+    sample = np.ascontiguousarray(haystack[::ANCHOR_SAMPLE_STEP, ::ANCHOR_SAMPLE_STEP])
+    sample_counts = [cv2.countNonZero(tolerance_mask(sample, colors[i], variation)) for i in shortlist]
+    best = shortlist[int(np.argmin(sample_counts))]
+
+    # first_index points into the opaque pixel list; map it back to the needle
+    opaque_positions = np.flatnonzero(opaque.reshape(-1))
+    flat = opaque_positions[first_index[best]]
+    return divmod(int(flat), needle.shape[1])
+
+
+def verify_order(opaque: np.ndarray, anchor: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Order the needle pixels to verify so that early checks are spread out
+    (neighbouring pixels tend to agree, distant ones reject faster)
+
+    Returns:
+        (rows, columns) of every opaque needle pixel except the anchor
+    """
+    rows, cols = np.nonzero(opaque)
+    keep = ~((rows == anchor[0]) & (cols == anchor[1]))
+    rows, cols = rows[keep], cols[keep]
+
+    # Deterministic shuffle so results and timings are repeatable
+    order = np.random.RandomState(len(rows)).permutation(len(rows))
+    return rows[order], cols[order]
+
+
+def find_variation_matches(haystack: np.ndarray, needle: np.ndarray, variation: int,
+                           mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find every position where each needle pixel is within variation on every channel
+    Equivalent to Gdip_ImageSearch's Variation parameter
+
+    Candidates are seeded from one anchor pixel (the needle color that looks
+    rarest on screen) and then verified against the rest of the needle,
+    dropping candidates as soon as a pixel is out of tolerance.
+
+    Args:
+        haystack: BGR or grayscale search image
+        needle: Needle with the same number of channels
+        variation: Per-channel color tolerance (0-255, 0 = pixel-identical)
+        mask: Optional needle mask (nonzero = pixel must match, 0 = ignored)
+
+    Returns:
+        (xs, ys) of matching top-left positions, in row-major order
+    """
+    haystack = as_channels(haystack)
+    needle = as_channels(needle)
+    haystack_height, haystack_width = haystack.shape[:2]
+    needle_height, needle_width = needle.shape[:2]
+    variation = max(0, min(255, int(variation)))
+
+    empty = np.empty(0, dtype=np.int64)
+    if needle_height > haystack_height or needle_width > haystack_width:
+        return empty, empty
+
+    opaque = np.ones((needle_height, needle_width), dtype=bool) if mask is None else mask != 0
+    if variation == 255 or not opaque.any():
+        # Nothing can fail to match
+        ys, xs = np.mgrid[0:haystack_height - needle_height + 1, 0:haystack_width - needle_width + 1]
+        return xs.reshape(-1).astype(np.int64), ys.reshape(-1).astype(np.int64)
+
+    # Seed candidates from the anchor pixel's tolerance box over every valid top-left position
+    anchor_row, anchor_col = pick_anchor(haystack, needle, opaque, variation)
+    anchor_area = haystack[anchor_row:anchor_row + haystack_height - needle_height + 1,
+                           anchor_col:anchor_col + haystack_width - needle_width + 1]
+    ys, xs = np.nonzero(tolerance_mask(anchor_area, needle[anchor_row, anchor_col], variation))
+    if len(xs) == 0:
+        return empty, empty
+
+    rows, cols = verify_order(opaque, (anchor_row, anchor_col))
+
+    # Early rejection: a few pixels, one at a time, while the candidate set is large
+    checked = 0
+    while checked < min(EARLY_REJECT_PIXELS, len(rows)) and len(xs):
+        row, col = rows[checked], cols[checked]
+        keep = np.all(_within(haystack[ys + row, xs + col], needle[row, col], variation), axis=-1)
+        ys, xs = ys[keep], xs[keep]
+        checked += 1
+
+    # Full verification of the survivors, a block of pixels at a time
+    while checked < len(rows) and len(xs):
+        block_rows = rows[checked:checked + VERIFY_BLOCK_PIXELS]
+        block_cols = cols[checked:checked + VERIFY_BLOCK_PIXELS]
+        values = haystack[ys[:, np.newaxis] + block_rows, xs[:, np.newaxis] + block_cols]
+        keep = np.all(_within(values, needle[block_rows, block_cols], variation), axis=(1, 2))
+        ys, xs = ys[keep], xs[keep]
+        checked += len(block_rows)
+
+    return xs.astype(np.int64), ys.astype(np.int64)
@@ -36,10 +36,14 @@ from AppKit import NSWorkspace
 # Import custom modules
 from lib.roblox import RobloxController
 from lib.image_search import ImageSearch
+from lib.location_memory import LocationMemory
 from lib.duration_from_seconds import duration_from_seconds, hms_from_seconds
 from lib.enum.enum_int import EnumInt
 from lib.enum.enum_str import EnumStr
 from lib.hyper_sleep import hyper_sleep, sleep_ms, sleep_us
+from lib.precision_timer import get_timer
+from lib.input_backends import PyAutoGUIInput, click
+from lib.send_parser import SendCompiler
 from lib.json_utils import JSON
 from lib.now_unix import now_unix, now_unix_ms
 from lib.inventory_search import InventorySearch
@@ -51,7 +55,8 @@ from patterns.pattern_handler import PatternHandler
 
 # Configure pyautogui
 pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.1
+# No PAUSE tuning: input goes through lib/input_backends.py, which skips it and
+# uses explicit delays between events instead
 
 # Set up logging
 logging.basicConfig(
@@ -80,9 +85,15 @@ class NatroMacro:
         self.heartbeat_thread = None
         self.running = False
 
+        # Where keyboard and mouse input goes (see lib/input_backends.py)
+        self.input = PyAutoGUIInput()
+        # AHK Send strings compiled to input events (see lib/send_parser.py)
+        self.send_compiler = SendCompiler()
+
         # Initialize controllers
         self.roblox = RobloxController(self)
-        self.image_search = ImageSearch(self)
+        self.image_search = ImageSearch(
+            self, location_memory=LocationMemory(self.script_dir / "location_memory.json"))
         self.inventory_search = InventorySearch(self)
         self.menu_manager = MenuManager(self)
         self.walk_system = WalkSystem(self)
@@ -107,6 +118,9 @@ class NatroMacro:
         # Close any existing instances
         self.close_existing_instances()
 
+        # Measure sleep overshoot now so the first timed inputs are already precise
+        get_timer()
+
         # Start heartbeat
         self.start_heartbeat()
 
@@ -171,16 +185,21 @@ class NatroMacro:
     def click_at(self, x, y, clicks=1, interval=0.1):
         """Click at specified coordinates"""
         try:
-            pyautogui.click(x, y, clicks=clicks, interval=interval)
+            delay = interval * 1000
+            self.input.send([click(x, y, delay=delay if i < clicks - 1 else 0)
+                             for i in range(clicks)])
             return True
         except Exception as e:
             logger.error(f"Click error: {e}")
             return False
 
     def send_keys(self, keys):
-        """Send keystrokes"""
+        """
+        Send keystrokes
+        Equivalent to Send (AHK key syntax such as "{w down}" or "^c")
+        """
         try:
-            pyautogui.typewrite(keys)
+            self.input.send(self.send_compiler.compile(keys))
             return True
         except Exception as e:
             logger.error(f"Send keys error: {e}")
@@ -225,6 +244,22 @@ class NatroMacro:
         if self.heartbeat_thread and self.heartbeat_thread.is_alive():
             self.heartbeat_thread.join(timeout=5)
 
+        # Stop vision worker threads
+        self.image_search.shutdown()
+
+        # Report how well the needle cache did this session
+        self.image_search.needle_cache.log_stats()
+
+        # Report which needles cost the most search time
+        self.image_search.profiler.log_summary()
+
+        # Report how precise input timing was
+        get_timer().log_stats()
+
+        # Keep where needles were found for the next run
+        self.image_search.location_memory.log_stats()
+        self.image_search.location_memory.save()
+
         logger.info("Natro Macro stopped")
 
 def main():
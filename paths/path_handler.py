@@ -4,11 +4,33 @@ Converted from paths/*.ahk
 """
 
 import logging
-import time
 from typing import Optional
 
+from lib.hyper_sleep import hyper_sleep
+from lib.input_backends import key_down, key_up
+from lib.send_parser import KeyMappings, SendCompiler
+
 logger = logging.getLogger(__name__)
 
+# Movespeed the walk timing below is calibrated for
+DEFAULT_MOVESPEED = 28.0
+# Seconds to walk one unit at DEFAULT_MOVESPEED (simplified)
+WALK_SECONDS_PER_UNIT = 0.1
+
+
+def walk_time(distance: float, movespeed: float = DEFAULT_MOVESPEED) -> float:
+    """
+    Seconds needed to walk a distance
+
+    Args:
+        distance: Distance to walk (in studs/tiles)
+        movespeed: Player movespeed
+
+    Returns:
+        Walk duration in seconds
+    """
+    return distance * WALK_SECONDS_PER_UNIT * DEFAULT_MOVESPEED / movespeed
+
 
 class PathHandler:
     """Handles movement paths and sequences"""
@@ -17,7 +39,7 @@ class PathHandler:
         self.macro = macro_instance
 
         # Key mappings (these would be defined in the main macro)
-        self.key_mappings = {
+        self.key_mappings = KeyMappings({
             'FwdKey': 'w',
             'BackKey': 's',
             'LeftKey': 'a',
@@ -25,7 +47,13 @@ class PathHandler:
             'RotLeft': 'q',
             'RotRight': 'e',
             'Space': 'space'
-        }
+        })
+
+        # Send strings compiled once per key mapping version
+        self.send_compiler = SendCompiler(self.key_mappings)
+
+        # Player movespeed used to turn walk distances into durations
+        self.movespeed = DEFAULT_MOVESPEED
 
     def execute_path(self, path_name: str, move_method: str = "walk"):
         """
@@ -62,22 +90,17 @@ class PathHandler:
         """
         logger.info(f"Walking {distance} units with keys: {keys}")
 
-        # Calculate walk time based on distance (this is a simplified calculation)
-        # In the real implementation, this would be more complex
-        walk_time = distance * 0.1  # 100ms per unit (simplified)
+        duration = walk_time(distance, self.movespeed)
 
-        # Send key down events
-        for key in keys:
-            actual_key = self.key_mappings.get(key, key)
-            self.macro.send_keys(f"{{{actual_key} down}}")
-
-        # Wait for walk duration
-        time.sleep(walk_time)
-
-        # Send key up events
-        for key in keys:
-            actual_key = self.key_mappings.get(key, key)
-            self.macro.send_keys(f"{{{actual_key} up}}")
+        # Hold the keys for the walk duration, then release them, as one timed batch
+        actual_keys = [self.key_mappings.get(key, key) for key in keys]
+        events = [key_down(key) for key in actual_keys]
+        if events:
+            events[-1] = key_down(actual_keys[-1], delay=duration * 1000)
+            events.extend(key_up(key) for key in actual_keys)
+            self.macro.input.send(events)
+        else:
+            hyper_sleep(duration * 1000)
 
     def nm_gotoramp(self):
         """Go to the ramp location"""
@@ -99,10 +122,17 @@ class PathHandler:
         Args:
             sequence: Key sequence to send (AHK format)
         """
-        logger.info(f"Sending key sequence: {sequence}")
-        # Convert AHK-style sequences to pyautogui format
-        # This is a simplified conversion
-        self.macro.send_keys(sequence)
+        logger.debug(f"Sending key sequence: {sequence}")
+        self.send_events(self.send_compiler.compile(sequence))
+
+    def send_events(self, events):
+        """
+        Send compiled input events (see lib/send_parser.py)
+
+        Args:
+            events: Sequence of InputEvents
+        """
+        self.macro.input.send(events)
 
     def hyper_sleep(self, milliseconds: int):
         """
@@ -112,7 +142,6 @@ class PathHandler:
         Args:
             milliseconds: Time to sleep in milliseconds
         """
-        from lib.hyper_sleep import hyper_sleep
         hyper_sleep(milliseconds)
 
     def nm_resetwindow(self):
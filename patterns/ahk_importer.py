@@ -0,0 +1,846 @@
+"""
+AHK pattern importer for Natro Macro
+Parses original .ahk pattern files into a compact IR, caches it on disk by file hash and runs it
+
+Supported subset (AHK v1 and v2 syntax):
+    nm_Walk(tiles, key1, key2) / Walk(tiles, ...)   walk while holding keys
+    Send / SendInput / SendEvent / SendPlay         literal text with %Var%, or an expression
+    Sleep / HyperSleep                              pause in milliseconds
+    Loop [count] / While / If / Else, braces or single statements, Break / Continue / Return
+    name := expr (and += -= *= /= //= .=), legacy name = text
+    Numbers, strings, concatenation, arithmetic, comparison, logic, ternary and the
+    math functions in _FUNCTIONS; A_Index, reps, size, pattern keyword arguments
+    (facingcorner, ...) and key mapping variables (TCFBKey, FwdKey, RotLeft, ...)
+
+Run `python3 -m patterns.ahk_importer` to import every .ahk file in patterns/ and warm the cache.
+"""
+
+import hashlib
+import importlib.util
+import logging
+import marshal
+import math
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERN_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = DEFAULT_PATTERN_DIR / "__pycache__"
+
+# Cached IR files: magic, then the interpreter's bytecode magic (expression code objects are
+# version specific), then marshal((source sha256, IR))
+CACHE_MAGIC = b"NMAHK01\0"
+CACHE_SUFFIX = ".ahkc"
+
+# Safety limit for loops without a count (and While) so a broken file cannot hang compilation
+MAX_LOOP_ITERATIONS = 100000
+
+# IR opcodes; every statement is a tuple (opcode, line, ...)
+OP_SEND = 0       # (OP_SEND, line, text_code)
+OP_WALK = 1       # (OP_WALK, line, distance_code, (key_code, ...))
+OP_SLEEP = 2      # (OP_SLEEP, line, milliseconds_code)
+OP_SET = 3        # (OP_SET, line, variable, value_code)
+OP_LOOP = 4       # (OP_LOOP, line, count_code or None, body)
+OP_WHILE = 5      # (OP_WHILE, line, condition_code, body)
+OP_IF = 6         # (OP_IF, line, condition_code, body, else_body)
+OP_BREAK = 7      # (OP_BREAK, line)
+OP_CONTINUE = 8   # (OP_CONTINUE, line)
+OP_RETURN = 9     # (OP_RETURN, line)
+
+# Block results
+_BREAK = 1
+_CONTINUE = 2
+_RETURN = 3
+
+_SEND_COMMANDS = {'send': '', 'sendinput': '', 'sendevent': '', 'sendplay': '',
+                  'sendraw': '{Raw}', 'sendtext': '{Text}'}
+_SLEEP_COMMANDS = {'sleep', 'hypersleep'}
+_WALK_COMMANDS = {'nm_walk', 'walk'}
+_IGNORED_COMMANDS = {'global', 'local', 'static'}
+
+_CONTROL_PATTERN = re.compile(r'^(?:loop|while|if|else)\b', re.IGNORECASE)
+_ASSIGN_PATTERN = re.compile(r'^([A-Za-z_]\w*)\s*(:=|\+=|-=|\*=|//=|/=|\.=)\s*(.*)$')
+_LEGACY_ASSIGN_PATTERN = re.compile(r'^([A-Za-z_]\w*)\s*=\s*(.*)$')
+_CALL_PATTERN = re.compile(r'^([A-Za-z_]\w*)\((.*)\)$')
+_COMMAND_PATTERN = re.compile(r'^([A-Za-z_]\w*)(?:\s*,\s*|\s+|$)(.*)$')
+_DEREF_PATTERN = re.compile(r'%(\w+)%')
+
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<string>"(?:[^"`]|""|`.)*"|'(?:[^'`]|`.)*')
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>\*\*|//|<=|>=|<>|!=|==|&&|\|\||:=|[-+*/()<>=!?:,.])
+''', re.VERBOSE)
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 's': ' '}
+
+_COMPARISONS = {'=': '==', '==': '==', '!=': '!=', '<>': '!=',
+                '<': '<', '>': '>', '<=': '<=', '>=': '>='}
+
+
+class AhkPatternError(ValueError):
+    """An .ahk pattern uses syntax outside the supported subset, or failed while running"""
+
+
+def _text(value) -> str:
+    """Convert a value to text the way AHK concatenation does"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return str(value)
+
+
+def _number(value):
+    """Convert a value to a number the way AHK arithmetic does"""
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip()
+    try:
+        return int(text, 0) if text.lower().startswith('0x') else int(text)
+    except ValueError:
+        return float(text)
+
+
+def _truthy(value) -> bool:
+    """AHK truth: "", 0 and "0" are false"""
+    return bool(value) and value != '0'
+
+
+def _concat(*parts) -> str:
+    return ''.join(_text(part) for part in parts)
+
+
+def _ahk_round(value, places=0):
+    # AHK rounds half away from zero
+    factor = 10 ** int(places)
+    result = math.floor(abs(_number(value)) * factor + 0.5) / factor
+    result = math.copysign(result, _number(value))
+    return int(result) if places <= 0 else result
+
+
+def _ahk_mod(dividend, divisor):
+    # Sign follows the dividend, like AHK (and C) rather than Python
+    return math.fmod(dividend, divisor) if isinstance(dividend, float) or isinstance(divisor, float) \
+        else int(math.fmod(dividend, divisor))
+
+
+_FUNCTIONS = {
+    'abs': abs, 'ceil': math.ceil, 'floor': math.floor, 'round': _ahk_round, 'mod': _ahk_mod,
+    'sqrt': math.sqrt, 'exp': math.exp, 'ln': math.log, 'log': math.log10,
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
+    'min': min, 'max': max, 'integer': lambda value: int(_number(value)),
+    'float': lambda value: float(_number(value)), 'number': _number,
+}
+
+# Globals for evaluating expression code objects: helpers and functions only, no builtins
+_EVAL_GLOBALS = {'__builtins__': {}, '_cat': _concat, '_num': _number, '_truth': _truthy}
+_EVAL_GLOBALS.update({f'f_{name}': function for name, function in _FUNCTIONS.items()})
+
+
+def _variable(name: str) -> str:
+    """Python name an AHK variable compiles to (AHK names are case-insensitive)"""
+    return 'v_' + name.lower()
+
+
+def _unescape(text: str) -> str:
+    """Decode AHK backtick escapes"""
+    result = []
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == '`' and index + 1 < len(text):
+            index += 1
+            char = _ESCAPES.get(text[index], text[index])
+        result.append(char)
+        index += 1
+    return ''.join(result)
+
+
+def _strip_comment(line: str) -> str:
+    """Remove a ";" comment (at the start of the line or after whitespace, outside strings)"""
+    quoted = False
+    index = 0
+    while index < len(line):
+        char = line[index]
+        if char == '`':
+            index += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif char == ';' and not quoted and (index == 0 or line[index - 1] in ' \t'):
+            return line[:index].rstrip()
+        index += 1
+    return line
+
+
+def _split_arguments(text: str) -> List[str]:
+    """Split function arguments on top-level commas"""
+    arguments = []
+    depth = 0
+    quote = None
+    start = 0
+    for index, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            arguments.append(text[start:index].strip())
+            start = index + 1
+    arguments.append(text[start:].strip())
+    return arguments if arguments != [''] else []
+
+
+def _logical_lines(source: str) -> List[Tuple[int, str]]:
+    """
+    Split source into (line number, statement) items without comments,
+    giving block braces their own items ("} else {" -> "}", "else", "{")
+    """
+    items = []
+    in_comment = False
+
+    for lineno, raw in enumerate(source.splitlines(), 1):
+        line = raw.strip()
+        if in_comment:
+            if '*/' in line:
+                in_comment = False
+            continue
+        if line.startswith('/*'):
+            in_comment = '*/' not in line[2:]
+            continue
+
+        line = _strip_comment(line)
+        while line.startswith('}'):
+            items.append((lineno, '}'))
+            line = line[1:].strip()
+        if not line:
+            continue
+
+        if line.endswith('{') and (line == '{' or _CONTROL_PATTERN.match(line)):
+            head = line[:-1].strip()
+            if head:
+                items.append((lineno, head))
+            items.append((lineno, '{'))
+        else:
+            items.append((lineno, line))
+
+    return items
+
+
+class _ExpressionParser:
+    """Translates one AHK expression into Python source for the interpreter"""
+
+    def __init__(self, text: str, filename: str, line: int):
+        self.filename = filename
+        self.line = line
+        self.tokens = []   # (kind, text, preceded by whitespace)
+        self.pos = 0
+
+        spaced = False
+        index = 0
+        while index < len(text):
+            match = _TOKEN_PATTERN.match(text, index)
+            if match is None:
+                raise self.error(f"Unexpected character {text[index]!r} in expression {text!r}")
+            index = match.end()
+            if match.lastgroup == 'space':
+                spaced = True
+                continue
+            kind, value = match.lastgroup, match.group()
+            if kind == 'name' and value.lower() in ('and', 'or', 'not'):
+                kind = 'op'
+                value = value.lower()
+            self.tokens.append((kind, value, spaced))
+            spaced = False
+
+    def error(self, message: str) -> AhkPatternError:
+        return AhkPatternError(f"{self.filename}:{self.line}: {message}")
+
+    def peek(self, offset: int = 0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None, False)
+
+    def accept(self, *operators) -> Optional[str]:
+        kind, value, _ = self.peek()
+        if kind == 'op' and value in operators:
+            self.pos += 1
+            return value
+        return None
+
+    def expect(self, operator: str):
+        if self.accept(operator) is None:
+            raise self.error(f"Expected {operator!r}")
+
+    def parse(self) -> str:
+        if not self.tokens:
+            raise self.error("Empty expression")
+        source = self.ternary()
+        if self.pos < len(self.tokens):
+            raise self.error(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return source
+
+    def ternary(self) -> str:
+        condition = self.logical_or()
+        if self.accept('?'):
+            when_true = self.ternary()
+            self.expect(':')
+            when_false = self.ternary()
+            return f"(({when_true}) if _truth({condition}) else ({when_false}))"
+        return condition
+
+    def logical_or(self) -> str:
+        source = self.logical_and()
+        while self.accept('||', 'or'):
+            source = f"(_truth({source}) or _truth({self.logical_and()}))"
+        return source
+
+    def logical_and(self) -> str:
+        source = self.logical_not()
+        while self.accept('&&', 'and'):
+            source = f"(_truth({source}) and _truth({self.logical_not()}))"
+        return source
+
+    def logical_not(self) -> str:
+        if self.accept('!', 'not'):
+            return f"(not _truth({self.logical_not()}))"
+        return self.comparison()
+
+    def comparison(self) -> str:
+        source = self.concatenation()
+        operator = self.accept(*_COMPARISONS)
+        if operator:
+            source = f"({source} {_COMPARISONS[operator]} {self.concatenation()})"
+        return source
+
+    def starts_operand(self) -> bool:
+        kind, value, _ = self.peek()
+        return kind in ('number', 'string', 'name') or (kind == 'op' and value == '(')
+
+    def concatenation(self) -> str:
+        parts = [self.additive()]
+        while True:
+            if self.accept('.'):
+                parts.append(self.additive())
+            elif self.starts_operand():
+                # AHK joins adjacent operands ("{" key " down}")
+                parts.append(self.additive())
+            else:
+                break
+        return parts[0] if len(parts) == 1 else f"_cat({', '.join(parts)})"
+
+    def additive(self) -> str:
+        source = self.term()
+        while True:
+            operator = self.accept('+', '-')
+            if operator is None:
+                return source
+            source = f"({source} {operator} {self.term()})"
+
+    def term(self) -> str:
+        source = self.unary()
+        while True:
+            operator = self.accept('*', '/', '//')
+            if operator is None:
+                return source
+            source = f"({source} {operator} {self.unary()})"
+
+    def unary(self) -> str:
+        operator = self.accept('-', '+')
+        if operator:
+            return f"({operator}{self.unary()})"
+        return self.power()
+
+    def power(self) -> str:
+        source = self.primary()
+        if self.accept('**'):
+            source = f"({source} ** {self.unary()})"
+        return source
+
+    def primary(self) -> str:
+        kind, value, _ = self.peek()
+        if kind is None:
+            raise self.error("Unexpected end of expression")
+        self.pos += 1
+
+        if kind == 'number':
+            return repr(_number(value))
+        if kind == 'string':
+            body = value[1:-1]
+            if value[0] == '"':
+                body = body.replace('""', '"')
+            return repr(_unescape(body))
+        if kind == 'name':
+            next_kind, next_value, next_spaced = self.peek()
+            if next_kind == 'op' and next_value == '(' and not next_spaced:
+                return self.call(value)
+            lowered = value.lower()
+            if lowered in ('true', 'false'):
+                return '1' if lowered == 'true' else '0'
+            return _variable(value)
+        if value == '(':
+            source = self.ternary()
+            self.expect(')')
+            return f"({source})"
+        raise self.error(f"Unexpected {value!r}")
+
+    def call(self, name: str) -> str:
+        function = name.lower()
+        if function not in _FUNCTIONS:
+            raise self.error(f"Unsupported function {name}()")
+        self.expect('(')
+        arguments = []
+        if not self.accept(')'):
+            while True:
+                arguments.append(f"_num({self.ternary()})")
+                if self.accept(')'):
+                    break
+                self.expect(',')
+        return f"f_{function}({', '.join(arguments)})"
+
+
+class _StatementParser:
+    """Builds the IR from logical lines"""
+
+    def __init__(self, source: str, filename: str):
+        self.filename = filename
+        self.items = _logical_lines(source)
+        self.pos = 0
+
+    def error(self, line: int, message: str) -> AhkPatternError:
+        return AhkPatternError(f"{self.filename}:{line}: {message}")
+
+    def compile(self, source: str, line: int):
+        """Compile translated Python source to a code object"""
+        return compile(source, f"{self.filename}:{line}", 'eval')
+
+    def expression(self, text: str, line: int) -> str:
+        """Translate an AHK expression"""
+        return _ExpressionParser(text, self.filename, line).parse()
+
+    def argument(self, text: str, line: int) -> str:
+        """Translate a v1 command argument (%var% references or an expression)"""
+        text = text.strip()
+        if text.startswith('% '):
+            text = text[2:]
+        return self.expression(_DEREF_PATTERN.sub(r'\1', text), line)
+
+    @staticmethod
+    def literal(text: str) -> str:
+        """Translate v1 literal text with %var% references"""
+        parts = _DEREF_PATTERN.split(text)
+        sources = []
+        for index, part in enumerate(parts):
+            if index % 2:
+                sources.append(_variable(part))
+            elif part:
+                sources.append(repr(_unescape(part)))
+        return f"_cat({', '.join(sources)})"
+
+    def parse(self) -> tuple:
+        return self.block(closing=False)
+
+    def block(self, closing: bool) -> tuple:
+        statements = []
+        while self.pos < len(self.items):
+            line, text = self.items[self.pos]
+            if text == '}':
+                if not closing:
+                    raise self.error(line, "Unexpected '}'")
+                self.pos += 1
+                return tuple(statements)
+            statements.extend(self.statement())
+
+        if closing:
+            line = self.items[-1][0] if self.items else 0
+            raise self.error(line, "Missing '}'")
+        return tuple(statements)
+
+    def body(self, line: int) -> tuple:
+        """The block or single statement after Loop / While / If / Else"""
+        if self.pos >= len(self.items):
+            raise self.error(line, "Missing statement body")
+        if self.items[self.pos][1] == '{':
+            self.pos += 1
+            return self.block(closing=True)
+        return tuple(self.statement())
+
+    def statement(self) -> tuple:
+        """Parse the next statement; returns a tuple of IR statements"""
+        line, text = self.items[self.pos]
+        self.pos += 1
+
+        if text == '{':
+            return self.block(closing=True)
+
+        match = _ASSIGN_PATTERN.match(text)
+        if match:
+            name, operator, value = match.groups()
+            if operator == ':=':
+                source = self.expression(value, line)
+            elif operator == '.=':
+                source = self.expression(f"{name} . ({value})", line)
+            else:
+                source = self.expression(f"{name} {operator[:-1]} ({value})", line)
+            return ((OP_SET, line, _variable(name), self.compile(source, line)),)
+
+        call = _CALL_PATTERN.match(text)
+        match = call or _COMMAND_PATTERN.match(text)
+        if match is None:
+            raise self.error(line, f"Unsupported statement {text!r}")
+        word = match.group(1).lower()
+        rest = text[match.end(1):].strip() if call else match.group(2).strip()
+
+        if word == 'loop':
+            rest = rest.lstrip(',').strip()
+            if re.match(r'(?:parse|read|files|reg)\b', rest, re.IGNORECASE):
+                raise self.error(line, f"Unsupported loop {text!r}")
+            count = self.compile(self.argument(rest, line), line) if rest else None
+            return ((OP_LOOP, line, count, self.body(line)),)
+
+        if word == 'while':
+            condition = self.compile(self.expression(rest, line), line)
+            return ((OP_WHILE, line, condition, self.body(line)),)
+
+        if word == 'if':
+            condition = self.compile(self.expression(rest, line), line)
+            body = self.body(line)
+            else_body = ()
+            if self.pos < len(self.items):
+                else_line, else_text = self.items[self.pos]
+                else_match = re.match(r'else\b\s*(.*)$', else_text, re.IGNORECASE)
+                if else_match:
+                    inline = else_match.group(1)
+                    if inline:
+                        # "else if ...", "else Send ..." - parse the rest as the body
+                        self.items[self.pos] = (else_line, inline)
+                        else_body = tuple(self.statement())
+                    else:
+                        self.pos += 1
+                        else_body = self.body(else_line)
+            return ((OP_IF, line, condition, body, else_body),)
+
+        if word == 'else':
+            raise self.error(line, "Else without If")
+        if word == 'break':
+            return ((OP_BREAK, line),)
+        if word == 'continue':
+            return ((OP_CONTINUE, line),)
+        if word == 'return':
+            return ((OP_RETURN, line),)
+        if word in _IGNORED_COMMANDS:
+            return ()
+
+        match = _LEGACY_ASSIGN_PATTERN.match(text)
+        if match:
+            name, value = match.groups()
+            value = value.strip()
+            try:
+                source = repr(_number(value))
+            except ValueError:
+                source = self.literal(value)
+            return ((OP_SET, line, _variable(name), self.compile(source, line)),)
+
+        arguments = _split_arguments(call.group(2)) if call else None
+
+        if word in _SEND_COMMANDS:
+            if arguments is not None:
+                source = self.expression(call.group(2), line)
+            elif rest.startswith(('"', "'", '(')):
+                source = self.expression(rest, line)
+            elif rest.startswith('% '):
+                source = self.expression(rest[2:], line)
+            else:
+                source = self.literal(rest)
+            prefix = _SEND_COMMANDS[word]
+            if prefix:
+                source = f"_cat({prefix!r}, {source})"
+            return ((OP_SEND, line, self.compile(source, line)),)
+
+        if word in _SLEEP_COMMANDS:
+            value = arguments[0] if arguments else rest
+            return ((OP_SLEEP, line, self.compile(self.argument(value, line), line)),)
+
+        if word in _WALK_COMMANDS:
+            if not arguments:
+                raise self.error(line, f"{word}() needs a distance")
+            distance = self.compile(self.expression(arguments[0], line), line)
+            keys = tuple(self.compile(self.expression(key, line), line) for key in arguments[1:])
+            return ((OP_WALK, line, distance, keys),)
+
+        raise self.error(line, f"Unsupported statement {text!r}")
+
+
+def parse_pattern(source: str, filename: str = "<pattern>") -> tuple:
+    """
+    Parse AHK pattern source into the IR
+
+    Args:
+        source: Contents of an .ahk pattern file
+        filename: Name used in error messages
+
+    Returns:
+        Tuple of IR statements (see the OP_* opcodes)
+
+    Raises:
+        AhkPatternError: If the source uses syntax outside the supported subset
+    """
+    return _StatementParser(source, filename).parse()
+
+
+class _Variables(dict):
+    """Pattern variables; unset names fall back to the key mappings, then to "" like AHK"""
+
+    def __init__(self, layers):
+        super().__init__()
+        self.layers = layers
+
+    def __missing__(self, name):
+        if not name.startswith('v_'):
+            # Helpers and functions are looked up here first, then in the globals
+            raise KeyError(name)
+        ahk_name = name[2:]
+        for layer in self.layers:
+            for mapping_name, key in layer.items():
+                if mapping_name.lower() == ahk_name:
+                    self[name] = key
+                    return key
+        return ''
+
+
+class AhkPattern:
+    """An imported .ahk pattern, callable like the pattern functions in pattern_handler"""
+
+    def __init__(self, name: str, ir: tuple, digest: str = ""):
+        self.name = name
+        self.ir = ir
+        self.digest = digest
+
+    def __repr__(self):
+        return f"AhkPattern({self.name!r}, {len(self.ir)} statements)"
+
+    def __call__(self, pattern_handler, reps: int, size: float = 1.0, **kwargs):
+        """
+        Run the pattern
+
+        Args:
+            pattern_handler: PatternHandler (or a recording stand-in) that performs the
+                             Send, nm_walk and hyper_sleep calls
+            reps: Number of repetitions
+            size: Size multiplier for movements
+            **kwargs: Additional pattern variables (facingcorner, ...)
+
+        Raises:
+            AhkPatternError: If an expression fails while running
+        """
+        layers = getattr(pattern_handler, 'send_compiler', None)
+        layers = layers.mappings if layers is not None else (pattern_handler.key_mappings,)
+
+        variables = _Variables(layers)
+        variables[_variable('reps')] = reps
+        variables[_variable('size')] = size
+        variables[_variable('A_Index')] = 0
+        for name, value in kwargs.items():
+            variables[_variable(name)] = value
+
+        self._run(self.ir, variables, pattern_handler)
+
+    def _eval(self, code, line: int, variables):
+        try:
+            return eval(code, _EVAL_GLOBALS, variables)
+        except Exception as e:
+            raise AhkPatternError(f"{self.name}.ahk:{line}: {e}") from e
+
+    def _loop(self, statement, variables, handler) -> Optional[int]:
+        """Run a Loop or While statement, keeping A_Index like AHK"""
+        op, line, expression, body = statement
+        if op == OP_LOOP:
+            count = MAX_LOOP_ITERATIONS + 1 if expression is None \
+                else int(_number(self._eval(expression, line, variables)))
+        else:
+            count = MAX_LOOP_ITERATIONS + 1
+
+        index_name = _variable('A_Index')
+        outer_index = variables[index_name]
+        result = None
+        index = 0
+        while index < count:
+            if op == OP_WHILE and not _truthy(self._eval(expression, line, variables)):
+                break
+            index += 1
+            if index > MAX_LOOP_ITERATIONS:
+                raise AhkPatternError(f"{self.name}.ahk:{line}: Loop ran more than "
+                                      f"{MAX_LOOP_ITERATIONS} times")
+            variables[index_name] = index
+            signal = self._run(body, variables, handler)
+            if signal == _BREAK:
+                break
+            if signal == _RETURN:
+                result = _RETURN
+                break
+        variables[index_name] = outer_index
+        return result
+
+    def _run(self, block: tuple, variables, handler) -> Optional[int]:
+        """Run a block; returns _BREAK, _CONTINUE or _RETURN if one ended it early"""
+        for statement in block:
+            op, line = statement[0], statement[1]
+
+            if op == OP_SEND:
+                handler.send_key_sequence(_text(self._eval(statement[2], line, variables)))
+            elif op == OP_WALK:
+                distance = float(_number(self._eval(statement[2], line, variables)))
+                keys = [_text(key) for key in (self._eval(code, line, variables) for code in statement[3])
+                        if key not in ('', 0)]
+                handler.nm_walk(distance, *keys)
+            elif op == OP_SLEEP:
+                handler.hyper_sleep(float(_number(self._eval(statement[2], line, variables))))
+            elif op == OP_SET:
+                variables[statement[2]] = self._eval(statement[3], line, variables)
+            elif op == OP_LOOP or op == OP_WHILE:
+                if self._loop(statement, variables, handler) == _RETURN:
+                    return _RETURN
+            elif op == OP_IF:
+                branch = statement[3] if _truthy(self._eval(statement[2], line, variables)) else statement[4]
+                signal = self._run(branch, variables, handler)
+                if signal is not None:
+                    return signal
+            elif op == OP_BREAK:
+                return _BREAK
+            elif op == OP_CONTINUE:
+                return _CONTINUE
+            elif op == OP_RETURN:
+                return _RETURN
+        return None
+
+
+def _cache_header() -> bytes:
+    return CACHE_MAGIC + importlib.util.MAGIC_NUMBER
+
+
+def _cache_path(cache_dir: Path, path: Path, digest: str) -> Path:
+    return cache_dir / f"{path.stem}.{digest[:16]}{CACHE_SUFFIX}"
+
+
+def _read_cache(cache_path: Path, digest: str) -> Optional[tuple]:
+    """Load a cached IR if it exists and matches the source hash"""
+    try:
+        data = cache_path.read_bytes()
+    except OSError:
+        return None
+
+    header = _cache_header()
+    if not data.startswith(header):
+        return None
+    try:
+        cached_digest, ir = marshal.loads(data[len(header):])
+    except (EOFError, ValueError, TypeError):
+        logger.warning(f"Ignoring corrupt pattern cache {cache_path.name}")
+        return None
+    return ir if cached_digest == digest else None
+
+
+def _write_cache(cache_path: Path, digest: str, ir: tuple):
+    """Write a cached IR, replacing older caches of the same pattern"""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        stem = cache_path.name.split('.')[0]
+        for stale in cache_path.parent.glob(f"{stem}.*{CACHE_SUFFIX}"):
+            if stale != cache_path:
+                stale.unlink()
+
+        temporary = cache_path.with_suffix(CACHE_SUFFIX + '.tmp')
+        temporary.write_bytes(_cache_header() + marshal.dumps((digest, ir)))
+        os.replace(temporary, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write pattern cache {cache_path}: {e}")
+
+
+def load_pattern(path, cache_dir=DEFAULT_CACHE_DIR) -> Optional[AhkPattern]:
+    """
+    Import one .ahk pattern, using the cached IR when the file is unchanged
+
+    Args:
+        path: Path to the .ahk file
+        cache_dir: Directory for cached IR files (None disables the cache)
+
+    Returns:
+        AhkPattern, or None if the file could not be read or parsed
+    """
+    path = Path(path)
+    try:
+        data = path.read_bytes()
+    except OSError as e:
+        logger.error(f"Could not read pattern {path}: {e}")
+        return None
+
+    digest = hashlib.sha256(data).hexdigest()
+    cache_path = _cache_path(Path(cache_dir), path, digest) if cache_dir is not None else None
+
+    ir = _read_cache(cache_path, digest) if cache_path is not None else None
+    if ir is None:
+        try:
+            ir = parse_pattern(data.decode('utf-8-sig', errors='replace'), path.name)
+        except AhkPatternError as e:
+            logger.error(f"Could not import pattern {path.name}: {e}")
+            return None
+        if cache_path is not None:
+            _write_cache(cache_path, digest, ir)
+
+    return AhkPattern(path.stem, ir, digest)
+
+
+def load_patterns(directory=DEFAULT_PATTERN_DIR, cache_dir=DEFAULT_CACHE_DIR) -> Dict[str, AhkPattern]:
+    """
+    Import every .ahk pattern in a directory
+
+    Args:
+        directory: Directory containing .ahk files
+        cache_dir: Directory for cached IR files (None disables the cache)
+
+    Returns:
+        Dictionary of lowercased pattern name (file stem) -> AhkPattern, so "Squares.ahk"
+        is found as "squares" like the Python patterns; files that fail are left out
+    """
+    start = time.perf_counter()
+    patterns = {}
+    for path in sorted(Path(directory).glob("*.ahk")):
+        pattern = load_pattern(path, cache_dir)
+        if pattern is not None:
+            patterns[pattern.name.lower()] = pattern
+
+    if patterns:
+        logger.info(f"Imported {len(patterns)} AHK patterns in "
+                    f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    return patterns
+
+
+def main(argv=None) -> int:
+    """Command line entry point: import .ahk patterns and report failures"""
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    paths = []
+    for argument in argv or [DEFAULT_PATTERN_DIR]:
+        argument = Path(argument)
+        paths.extend(sorted(argument.glob("*.ahk")) if argument.is_dir() else [argument])
+
+    failed = [path.name for path in paths if load_pattern(path) is None]
+    logger.info(f"{len(paths) - len(failed)}/{len(paths)} patterns imported")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
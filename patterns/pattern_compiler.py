@@ -0,0 +1,201 @@
+"""
+Pattern compiler for Natro Macro
+Runs a pattern function once against a recording handler and replays the resulting key timeline
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Mapping, NamedTuple, Tuple
+
+from lib.input_backends import InputEvent, KEY_DOWN, KEY_UP, key_down, key_up
+from lib.precision_timer import get_timer
+from lib.send_parser import SendCompiler
+from paths.path_handler import walk_time
+
+logger = logging.getLogger(__name__)
+
+# Compiled timelines kept (least recently used are dropped first)
+MAX_CACHED_TIMELINES = 64
+
+
+def pattern_walk_keys(key_mappings: Mapping[str, str], keys: Iterable[str]) -> List[str]:
+    """
+    Resolve nm_walk key arguments through the pattern key mappings
+
+    Shared by PatternHandler.nm_walk and the recording handler so live and
+    compiled patterns hold the same keys.
+
+    Args:
+        key_mappings: Pattern key mappings ({'TCFBKey': 'w', ...})
+        keys: Key names or AHK variable names
+
+    Returns:
+        Mapped key names; unmapped names are lowercased
+    """
+    return [key_mappings[key] if key in key_mappings else key.lower() for key in keys]
+
+
+class Segment(NamedTuple):
+    """Events due at the same moment of a compiled pattern"""
+    time: float                      # Seconds from the start of the pattern
+    events: Tuple[InputEvent, ...]   # Sent together, without delays
+    held: Tuple[str, ...]            # Keys held down once these events are sent
+
+
+class CompiledPattern(NamedTuple):
+    """A pattern run turned into input events on an absolute timeline"""
+    name: str
+    events: Tuple[InputEvent, ...]   # Each event's delay is the gap to the next one
+    times: Tuple[float, ...]         # Seconds from the start of the pattern to each event
+    duration: float                  # Seconds from the start to the end of the pattern
+    segments: Tuple[Segment, ...]    # Events grouped by time, as play() sends them
+
+
+class RecordingPatternHandler:
+    """
+    Stands in for PatternHandler while a pattern is compiled: Send strings,
+    walks and sleeps append events to a timeline instead of being performed
+    """
+
+    def __init__(self, pattern_handler):
+        self.key_mappings = pattern_handler.key_mappings
+        self.path_mappings = pattern_handler.path_handler.key_mappings
+        self.send_compiler: SendCompiler = pattern_handler.send_compiler
+        self.movespeed = pattern_handler.path_handler.movespeed
+
+        self.time = 0.0
+        self.timeline: List[Tuple[float, InputEvent]] = []
+
+    def _emit(self, events):
+        self.timeline.extend((self.time, event) for event in events)
+
+    def send_key_sequence(self, sequence: str):
+        """Record a Send string at the current time"""
+        self._emit(self.send_compiler.compile(sequence))
+
+    def nm_walk(self, distance: float, *keys):
+        """Record holding keys for the walk duration (same mapping as PatternHandler.nm_walk)"""
+        actual_keys = [self.path_mappings.get(key, key)
+                       for key in pattern_walk_keys(self.key_mappings, keys)]
+
+        self._emit(key_down(key) for key in actual_keys)
+        self.time += walk_time(distance, self.movespeed)
+        self._emit(key_up(key) for key in actual_keys)
+
+    def hyper_sleep(self, milliseconds: float):
+        """Record a pause"""
+        self.time += milliseconds / 1000.0
+
+    def compiled(self, name: str) -> CompiledPattern:
+        """Turn the recorded timeline into a CompiledPattern"""
+        times = tuple(event_time for event_time, _ in self.timeline)
+        events = []
+        for index, (event_time, event) in enumerate(self.timeline):
+            next_time = times[index + 1] if index + 1 < len(times) else self.time
+            events.append(event._replace(delay=(next_time - event_time) * 1000.0))
+
+        segments = []
+        held: List[str] = []
+        for event_time, event in self.timeline:
+            if event.kind == KEY_DOWN and event.key not in held:
+                held.append(event.key)
+            elif event.kind == KEY_UP and event.key in held:
+                held.remove(event.key)
+
+            event = event._replace(delay=0.0)
+            if segments and segments[-1].time == event_time:
+                segments[-1] = Segment(event_time, segments[-1].events + (event,), tuple(held))
+            else:
+                segments.append(Segment(event_time, (event,), tuple(held)))
+
+        return CompiledPattern(name, tuple(events), times, self.time, tuple(segments))
+
+
+class PatternCompiler:
+    """Compiles pattern functions into timelines, cached per configuration, and plays them"""
+
+    def __init__(self, pattern_handler):
+        self.pattern_handler = pattern_handler
+        self._cache: "OrderedDict[tuple, CompiledPattern]" = OrderedDict()
+
+    def _cache_key(self, name: str, reps: int, size: float, kwargs: dict) -> tuple:
+        """Everything a compiled timeline depends on"""
+        handler = self.pattern_handler
+        return (name, reps, size, tuple(sorted(kwargs.items())),
+                tuple(sorted(handler.key_mappings.items())),
+                tuple(sorted(handler.path_handler.key_mappings.items())),
+                handler.path_handler.movespeed)
+
+    def compile(self, name: str, pattern_function: Callable, reps: int, size: float = 1.0,
+                **kwargs) -> CompiledPattern:
+        """
+        Get the timeline for a pattern configuration, compiling it on first use
+
+        Args:
+            name: Pattern name
+            pattern_function: Pattern implementation (handler, reps, size, **kwargs)
+            reps: Number of repetitions
+            size: Size multiplier for movements
+            **kwargs: Additional pattern-specific parameters
+
+        Returns:
+            CompiledPattern
+        """
+        key = self._cache_key(name, reps, size, kwargs)
+        compiled = self._cache.get(key)
+        if compiled is not None:
+            self._cache.move_to_end(key)
+            return compiled
+
+        recorder = RecordingPatternHandler(self.pattern_handler)
+        pattern_function(recorder, reps, size, **kwargs)
+        compiled = recorder.compiled(name)
+        logger.debug(f"Compiled pattern {name}: {len(compiled.events)} events, {compiled.duration:.2f}s")
+
+        self._cache[key] = compiled
+        if len(self._cache) > MAX_CACHED_TIMELINES:
+            self._cache.popitem(last=False)
+        return compiled
+
+    def play(self, compiled: CompiledPattern, stop_event=None) -> bool:
+        """
+        Play a compiled timeline through the macro's input backend
+
+        Every segment is scheduled at its absolute time from the start of the
+        pattern, so timer overshoot and dispatch time do not add up over the
+        run. The backend is only locked while a segment is sent, so other input
+        (clicks, Send strings) can go through during long key holds.
+
+        Args:
+            compiled: Timeline from compile()
+            stop_event: Optional threading.Event that stops playback early, also
+                        during a hold (keys the pattern is holding are released)
+
+        Returns:
+            True if the whole timeline was played
+        """
+        timer = get_timer()
+        backend = self.pattern_handler.macro.input
+        held: Tuple[str, ...] = ()
+        played = 0
+        start = time.perf_counter()
+
+        for segment in compiled.segments:
+            if not timer.sleep_until(start + segment.time, stop_event):
+                break
+            backend.send(segment.events)
+            held = segment.held
+            played += 1
+        else:
+            if timer.sleep_until(start + compiled.duration, stop_event):
+                return True
+
+        if held:
+            backend.send([key_up(key) for key in held])
+        logger.info(f"Pattern {compiled.name} stopped after {played}/{len(compiled.segments)} segments")
+        return False
+
+    def clear(self):
+        """Drop every cached timeline"""
+        self._cache.clear()
@@ -6,6 +6,10 @@ Converts AHK pattern files to Python executable movement patterns
 import logging
 from typing import Dict, Any, Optional
 
+from lib.send_parser import KeyMappings, SendCompiler
+from patterns.ahk_importer import load_patterns
+from patterns.pattern_compiler import PatternCompiler, pattern_walk_keys
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +21,7 @@ class PatternHandler:
         self.path_handler = macro_instance.path_handler
 
         # Pattern key mappings (these correspond to AHK variables)
-        self.key_mappings = {
+        self.key_mappings = KeyMappings({
             'TCFBKey': 'w',      # Top-Close Forward-Back
             'TCLRKey': 'a',      # Top-Close Left-Right
             'AFCFBKey': 's',     # Away-From-Center Forward-Back
@@ -26,10 +30,20 @@ class PatternHandler:
             'BackKey': 's',
             'LeftKey': 'a',
             'RightKey': 'd',
-        }
+        })
+
+        # Pattern mappings first, then the path handler's (RotLeft, Space, ...)
+        self.send_compiler = SendCompiler(self.key_mappings, self.path_handler.key_mappings)
+
+        # Run patterns as precomputed key timelines instead of step by step
+        self.compile_patterns = True
+        self.pattern_compiler = PatternCompiler(self)
+
+        # Original .ahk pattern files in patterns/ (imported through the IR cache)
+        self.ahk_patterns = load_patterns()
 
     def execute_pattern(self, pattern_name: str, reps: int, size: float = 1.0,
-                       **kwargs) -> bool:
+                       stop_event=None, **kwargs) -> bool:
         """
         Execute a movement pattern by name
 
@@ -37,15 +51,28 @@ class PatternHandler:
             pattern_name: Name of the pattern to execute
             reps: Number of repetitions
             size: Size multiplier for movements
+            stop_event: Optional threading.Event that stops a compiled pattern early
             **kwargs: Additional pattern-specific parameters
 
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Import the specific pattern module
-            pattern_module = __import__(f'patterns.{pattern_name}', fromlist=[pattern_name])
-            pattern_function = getattr(pattern_module, pattern_name.replace('-', '_'))
+            # An original .ahk file takes precedence over the Python port
+            pattern_function = self.ahk_patterns.get(pattern_name.lower())
+            function_name = pattern_name.replace('-', '_')
+            if pattern_function is None:
+                pattern_function = globals().get(function_name)
+            if not callable(pattern_function):
+                # Import the specific pattern module
+                pattern_module = __import__(f'patterns.{pattern_name}', fromlist=[pattern_name])
+                pattern_function = getattr(pattern_module, function_name)
+
+            if self.compile_patterns:
+                # Record once per configuration, then replay the timeline
+                compiled = self.pattern_compiler.compile(pattern_name, pattern_function,
+                                                         reps, size, **kwargs)
+                return self.pattern_compiler.play(compiled, stop_event)
 
             # Execute the pattern
             pattern_function(self, reps, size, **kwargs)
@@ -63,22 +90,17 @@ class PatternHandler:
 
     def nm_walk(self, distance: float, *keys: str):
         """Walk with pattern-specific key mapping"""
-        actual_keys = []
-        for key in keys:
-            if key in self.key_mappings:
-                actual_keys.append(self.key_mappings[key])
-            else:
-                actual_keys.append(key.lower())
-
+        actual_keys = pattern_walk_keys(self.key_mappings, keys)
         return self.path_handler.nm_walk(distance, *actual_keys)
 
     def send_key_sequence(self, sequence: str):
         """Send key sequence with pattern key mapping"""
-        # Replace pattern keys in the sequence
-        for pattern_key, actual_key in self.key_mappings.items():
-            sequence = sequence.replace(f"{{{pattern_key}", f"{{{actual_key}")
+        # Compiled once per sequence; later calls replay the cached events
+        return self.path_handler.send_events(self.send_compiler.compile(sequence))
 
-        return self.path_handler.send_key_sequence(sequence)
+    def hyper_sleep(self, milliseconds: float):
+        """Sleep for specified milliseconds"""
+        return self.path_handler.hyper_sleep(milliseconds)
 
 
 # Individual pattern implementations
@@ -580,8 +602,7 @@ def Stationary(pattern_handler: PatternHandler, reps: int, size: float = 1.0):
     Stationary gathering pattern
     Converted from patterns/Stationary.ahk
     """
-    import time
-    time.sleep(10)
+    pattern_handler.hyper_sleep(10000)
 
 
 def SuperCat(pattern_handler: PatternHandler, reps: int, size: float = 1.0):
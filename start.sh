@@ -44,6 +44,9 @@ source venv/bin/activate
 echo -e "${YELLOW}Installing/updating dependencies...${NC}"
 pip install -r requirements.txt
 
+echo -e "${YELLOW}Compiling image assets...${NC}"
+python3 -m lib.needle_pack
+
 # Check if Roblox is running
 if ! pgrep -f "RobloxPlayer" > /dev/null; then
     echo -e "${RED}Warning: Roblox does not appear to be running.${NC}"